@@ -4,5 +4,6 @@
 """
 from .registry import CalculatorRegistry
 from .base_calculator import BaseCalculator
+from .position_batch import PositionBatch
 
-__all__ = ['CalculatorRegistry', 'BaseCalculator']
+__all__ = ['CalculatorRegistry', 'BaseCalculator', 'PositionBatch']
@@ -1,22 +1,27 @@
 """
 평균 헤지 환율 계산기
 """
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Tuple
 from .base_calculator import BaseCalculator
+from .normalize import NormalizedPosition
+from .position_batch import PositionBatch
 
 class AvgHedgeRateCalculator(BaseCalculator):
     """
     평균 헤지 환율 계산
-    헤지 포지션들의 가중 평균 환율
+    헤지 포지션들의 가중 평균 환율 (가중치: amount × 헤지 비중)
     """
     
     name = "avgHedgeRate"
+    version = "1.2"  # hedgeStatus 헤지 비중 반영
     priority = 50
     dependencies = []
+    numeric_fields = ['amount', 'rate']
     
     def calculate(self, positions: List[Dict[str, Any]], context: Dict[str, Any]) -> float:
         """
-        평균 헤지 환율 = SUM(헤지포지션.amount * rate) / SUM(헤지포지션.amount)
+        평균 헤지 환율 = SUM(헤지 금액 * rate) / SUM(헤지 금액)
+        (헤지 금액 = amount × 헤지 비중, hedgedAmount와 같은 정의)
         
         Args:
             positions: 헤지 포지션 리스트
@@ -25,44 +30,47 @@ class AvgHedgeRateCalculator(BaseCalculator):
         Returns:
             평균 헤지 환율 (float)
         """
-        total_weighted = 0.0
-        total_amount = 0.0
-        
-        for pos in positions:
-            direction = pos.get('direction', '').lower()
-            
-            # 헤지 포지션만 계산
-            if direction in ['hedge', 'hedged', '헤지', '헷지']:
-                amount = pos.get('amount', 0)
-                rate = pos.get('rate', 0)
-                
-                # 문자열인 경우 숫자로 변환
-                if isinstance(amount, str):
-                    amount = amount.replace(',', '').replace('$', '').strip()
-                    try:
-                        amount = float(amount)
-                    except (ValueError, AttributeError):
-                        amount = 0
-                
-                if isinstance(rate, str):
-                    rate = rate.replace(',', '').strip()
-                    try:
-                        rate = float(rate)
-                    except (ValueError, AttributeError):
-                        rate = 0
-                
-                amount = float(amount)
-                rate = float(rate)
-                
-                total_weighted += amount * rate
-                total_amount += amount
-        
+        return self.fold(positions, context)
+    
+    def create_state(self) -> Tuple[float, float]:
+        # (SUM(헤지 금액 * rate), SUM(헤지 금액))
+        return (0.0, 0.0)
+    
+    def accumulate(self, state: Tuple[float, float], row: NormalizedPosition) -> Tuple[float, float]:
+        # 헤지 비중이 0인 포지션은 건너뜀
+        if not row.hedge_weight:
+            return state
+        hedged = row.amount * row.hedge_weight
+        total_weighted, total_amount = state
+        return (total_weighted + hedged * row.rate, total_amount + hedged)
+    
+    def retract(self, state: Tuple[float, float], row: NormalizedPosition) -> Tuple[float, float]:
+        if not row.hedge_weight:
+            return state
+        hedged = row.amount * row.hedge_weight
+        total_weighted, total_amount = state
+        return (total_weighted - hedged * row.rate, total_amount - hedged)
+    
+    def merge(self, state: Tuple[float, float], other: Tuple[float, float]) -> Tuple[float, float]:
+        return (state[0] + other[0], state[1] + other[1])
+    
+    def finalize(self, state: Tuple[float, float], context: Dict[str, Any]) -> float:
+        total_weighted, total_amount = state
         if total_amount == 0:
             return 0.0
         
         avg_rate = total_weighted / total_amount
         return avg_rate
     
+    def calculate_batch(self, batch: PositionBatch, context: Dict[str, Any]) -> float:
+        mask = batch.hedge_weight > 0
+        hedged = batch.amount[mask] * batch.hedge_weight[mask]
+        total_amount = float(hedged.sum())
+        if total_amount == 0:
+            return 0.0
+        
+        return float(hedged @ batch.rate[mask]) / total_amount
+    
     def format_result(self, result: float) -> float:
         """결과를 소수점 2자리로 포맷"""
         return round(result, 2)
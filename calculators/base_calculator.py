@@ -4,6 +4,8 @@
 """
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List
+from .normalize import NormalizedPosition, normalize_position
+from .position_batch import PositionBatch
 
 class BaseCalculator(ABC):
     """
@@ -14,17 +16,45 @@ class BaseCalculator(ABC):
     2. name 속성 정의
     3. calculate() 메서드 구현
     4. registry에 자동 등록됨
+    
+    단일 패스(fused) 실행 지원 (선택):
+        포지션을 순회하며 합산하는 계산기는 create_state() / accumulate() /
+        finalize()를 구현하면 레지스트리가 포지션을 한 번만 순회하면서
+        정규화된 행을 모든 계산기에 동시에 공급함
+        retract()까지 구현하면 IncrementalKPI로 포지션 추가/삭제/수정을
+        전체 재계산 없이 O(1)로 반영할 수 있음
+        merge()까지 구현하면 고객별 누적 상태를 저장해 두었다가 포지션을
+        다시 읽지 않고 전사/세그먼트 단위로 합산할 수 있음
+    
+    벡터화 실행 지원 (선택):
+        calculate_batch()를 구현하면 numpy 사용 가능 시 레지스트리가
+        PositionBatch(컬럼형 배열)로 이 메서드를 우선 호출함
     """
     
     # 계산기 이름 (하위 클래스에서 정의 필수)
     name: str = None
     
+    # 계산 로직 버전 (결과가 바뀌는 수정 시 올려서 KPI 결과 캐시를 무효화)
+    version: str = "1.0"
+    
     # 계산 우선순위 (낮을수록 먼저 실행, 의존성 관리용)
     priority: int = 100
     
     # 이 계산기가 의존하는 다른 계산기들
     dependencies: List[str] = []
     
+    # 포지션을 직접 읽는지 여부 (False면 context의 다른 계산 결과만 사용)
+    uses_positions: bool = True
+    
+    # True면 targets로 직접 요청할 때만 실행 (VaR처럼 비용이 큰 계산기)
+    on_demand: bool = False
+    
+    # 포지션에 반드시 있어야 하는 필드 (레지스트리가 요청당 1회 검증)
+    required_fields: List[str] = ['currency', 'amount', 'direction']
+    
+    # 값이 있으면 숫자(쉼표/통화기호 허용)여야 하는 필드
+    numeric_fields: List[str] = ['amount']
+    
     def __init__(self):
         if not self.name:
             raise ValueError(f"{self.__class__.__name__}은 'name' 속성을 정의해야 합니다")
@@ -48,23 +78,173 @@ class BaseCalculator(ABC):
         """
         입력 데이터 검증
         
+        레지스트리는 required_fields/numeric_fields로 만든 공통 검증을 요청당
+        한 번 수행하고 통과한 포지션만 넘기므로, 필드 검사 외의 추가 조건이
+        있을 때만 오버라이드하면 됨
+        
         Args:
             positions: 헤지 포지션 리스트
         
         Returns:
             True if valid, False otherwise
         """
+        if isinstance(positions, PositionBatch):
+            # 컬럼형 배치는 생성 시 모든 필드가 채워짐
+            return len(positions) > 0
+        
         if not positions:
             return False
         
         # 기본 필드 검증
-        required_fields = ['currency', 'amount', 'direction']
+        required_fields = self.required_fields
         for pos in positions:
             if not all(field in pos for field in required_fields):
                 return False
         
         return True
     
+    @property
+    def has_custom_validation(self) -> bool:
+        """validate_input()을 오버라이드한 계산기인지 여부"""
+        return type(self).validate_input is not BaseCalculator.validate_input
+    
+    # ━━━ 단일 패스 누적기 프로토콜 (선택 구현) ━━━
+    
+    def create_state(self) -> Any:
+        """
+        누적 상태 초기값 생성
+        
+        Returns:
+            초기 상태 (예: 0.0, (0.0, 0.0))
+        """
+        return None
+    
+    def accumulate(self, state: Any, row: NormalizedPosition) -> Any:
+        """
+        정규화된 포지션 1건을 상태에 누적
+        
+        Args:
+            state: 현재 누적 상태
+            row: 정규화된 포지션 (amount, rate, hedge_weight, is_hedge, raw)
+        
+        Returns:
+            갱신된 상태
+        """
+        raise NotImplementedError
+    
+    def finalize(self, state: Any, context: Dict[str, Any]) -> Any:
+        """
+        누적 상태로부터 최종 결과 계산
+        
+        Args:
+            state: 모든 포지션을 누적한 상태
+            context: 다른 계산기 결과 및 컨텍스트 정보
+        
+        Returns:
+            계산 결과 (format_result 적용 전)
+        """
+        raise NotImplementedError
+    
+    def retract(self, state: Any, row: NormalizedPosition) -> Any:
+        """
+        accumulate()의 역연산 - 포지션 1건을 상태에서 제거 (증분 계산용)
+        
+        Args:
+            state: 현재 누적 상태
+            row: 제거할 정규화된 포지션
+        
+        Returns:
+            갱신된 상태
+        """
+        raise NotImplementedError
+    
+    def merge(self, state: Any, other: Any) -> Any:
+        """
+        두 누적 상태 병합 (서로 다른 포지션 집합의 상태 → 합집합의 상태)
+        
+        합계/가중합/건수처럼 순서와 무관하게 더할 수 있는 상태여야 함
+        (분위수처럼 정렬이 필요한 통계는 병합 가능한 스케치를 상태로 사용)
+        
+        Args:
+            state: 누적 상태
+            other: 다른 포지션 집합의 누적 상태
+        
+        Returns:
+            병합된 상태
+        """
+        raise NotImplementedError
+    
+    def dump_state(self, state: Any) -> Any:
+        """누적 상태 → JSON 저장 가능한 값 (기본: tuple은 리스트로)"""
+        return list(state) if isinstance(state, tuple) else state
+    
+    def load_state(self, data: Any) -> Any:
+        """dump_state()의 역변환 (기본: 리스트는 tuple로)"""
+        return tuple(data) if isinstance(data, list) else data
+    
+    @property
+    def supports_fused(self) -> bool:
+        """accumulate()를 구현한 계산기인지 여부"""
+        return type(self).accumulate is not BaseCalculator.accumulate
+    
+    @property
+    def supports_incremental(self) -> bool:
+        """accumulate()와 retract()를 모두 구현하여 증분 갱신이 가능한지 여부"""
+        return self.supports_fused and type(self).retract is not BaseCalculator.retract
+    
+    @property
+    def supports_merge(self) -> bool:
+        """스트림 누적 상태를 merge()로 합칠 수 있는지 여부"""
+        return self.supports_stream and type(self).merge is not BaseCalculator.merge
+    
+    @property
+    def supports_stream(self) -> bool:
+        """
+        포지션 스트림(calculate_stream)으로 계산 가능한지 여부
+
+        포지션을 읽지 않거나 누적기를 구현한 계산기만 가능하며,
+        전체 리스트를 보는 validate_input()을 오버라이드한 계산기는 제외됨
+        """
+        if self.has_custom_validation:
+            return False
+        return self.supports_fused or not self.uses_positions
+    
+    def fold(self, positions: List[Dict[str, Any]], context: Dict[str, Any]) -> Any:
+        """
+        누적기 프로토콜로 포지션 리스트를 단독 계산 (calculate() 구현용)
+        
+        Args:
+            positions: 헤지 포지션 리스트
+            context: 컨텍스트
+        
+        Returns:
+            계산 결과
+        """
+        state = self.create_state()
+        for pos in positions:
+            state = self.accumulate(state, normalize_position(pos))
+        return self.finalize(state, context)
+    
+    # ━━━ 벡터화 실행 (선택 구현) ━━━
+    
+    def calculate_batch(self, batch: PositionBatch, context: Dict[str, Any]) -> Any:
+        """
+        컬럼형 배치로 계산 수행 (배열 연산)
+        
+        Args:
+            batch: PositionBatch
+            context: 다른 계산기 결과 및 컨텍스트 정보
+        
+        Returns:
+            계산 결과 (format_result 적용 전)
+        """
+        raise NotImplementedError
+    
+    @property
+    def supports_batch(self) -> bool:
+        """calculate_batch()를 구현한 계산기인지 여부"""
+        return type(self).calculate_batch is not BaseCalculator.calculate_batch
+    
     def format_result(self, result: Any) -> Any:
         """
         결과 포맷팅 (필요시 오버라이드)
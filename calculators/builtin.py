@@ -0,0 +1,44 @@
+"""
+기본 제공 계산기 매니페스트
+서버와 배치 워커 프로세스가 같은 계산기 구성을 쓰도록 한 곳에서 관리
+
+계산기 모듈은 여기서 import하지 않음 - 등록은 매니페스트 값으로만 하고
+실제 클래스는 처음 실행될 때 불러옴 (plugins.LazyCalculator).
+항목의 name/dependencies는 계산기 클래스 정의와 같아야 함.
+"""
+from .plugins import discover_calculators
+
+BUILTIN_MANIFEST = [
+    {'name': 'totalExposure', 'class': 'calculators.total_exposure:TotalExposureCalculator',
+     'priority': 10},
+    {'name': 'hedgedAmount', 'class': 'calculators.hedged_amount:HedgedAmountCalculator',
+     'priority': 20},
+    {'name': 'hedgeRatio', 'class': 'calculators.hedge_ratio:HedgeRatioCalculator',
+     'priority': 30, 'dependencies': ['totalExposure', 'hedgedAmount']},
+    {'name': 'unhedgedGap', 'class': 'calculators.unhedged_gap:UnhedgedGapCalculator',
+     'priority': 40, 'dependencies': ['totalExposure', 'hedgedAmount']},
+    {'name': 'avgHedgeRate', 'class': 'calculators.avg_hedge_rate:AvgHedgeRateCalculator',
+     'priority': 50},
+    {'name': 'recommendation', 'class': 'calculators.recommendation:RecommendationCalculator',
+     'priority': 60, 'dependencies': ['hedgeRatio']},
+    # on_demand - targets로 요청할 때만 실행 (요청이 없으면 모듈도 import되지 않음)
+    {'name': 'fxVaR', 'class': 'calculators.fx_var:FXVaRCalculator',
+     'priority': 200, 'on_demand': True},
+    {'name': 'maturityLadder', 'class': 'calculators.maturity:MaturityLadderCalculator',
+     'priority': 200, 'on_demand': True},
+]
+
+
+def register_builtin_calculators(registry, include_entry_points: bool = True):
+    """
+    기본 계산기(및 설치된 플러그인)를 지연 로딩 상태로 레지스트리에 등록
+
+    Args:
+        registry: CalculatorRegistry
+        include_entry_points: entry point로 설치된 플러그인 매니페스트 포함 여부
+
+    Returns:
+        등록된 계산기 이름 리스트
+    """
+    return discover_calculators(registry, [BUILTIN_MANIFEST],
+                                include_entry_points=include_entry_points)
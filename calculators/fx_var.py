@@ -0,0 +1,147 @@
+"""
+환율 VaR 계산기
+미헤지 원화 노출에 대해 상관된 환율 변동을 가정하여 VaR / 기대손실(ES) 계산
+"""
+from statistics import NormalDist
+from typing import Dict, List, Any
+
+from .base_calculator import BaseCalculator
+from .position_batch import PositionBatch, np
+from .scenario import currency_totals
+
+# 통화별 연간 변동성 (원화 대비, 목록에 없으면 DEFAULT_VOLATILITY)
+ANNUAL_VOLATILITIES = {
+    'USD': 0.08,
+    'EUR': 0.09,
+    'JPY': 0.11,
+    'CNY': 0.06,
+    'GBP': 0.10,
+}
+DEFAULT_VOLATILITY = 0.10
+
+# 통화 쌍 상관계수 (목록에 없으면 DEFAULT_CORRELATION)
+CORRELATIONS = {
+    ('USD', 'EUR'): 0.55,
+    ('USD', 'JPY'): 0.45,
+    ('USD', 'CNY'): 0.80,
+    ('USD', 'GBP'): 0.55,
+    ('EUR', 'JPY'): 0.40,
+    ('EUR', 'CNY'): 0.50,
+    ('EUR', 'GBP'): 0.70,
+    ('JPY', 'CNY'): 0.40,
+    ('JPY', 'GBP'): 0.35,
+    ('CNY', 'GBP'): 0.45,
+}
+DEFAULT_CORRELATION = 0.30
+
+TRADING_DAYS = 252
+
+
+class FXVaRCalculator(BaseCalculator):
+    """
+    분산-공분산(파라메트릭) 환율 VaR
+
+    포지션을 통화별 부호 있는 미헤지 원화 금액(수출 +, 수입 -, 헤지 비중 제외)으로
+    줄인 뒤 손익 표준편차 σ = √(eᵀΣe)를 구함. 환율 변동률이 다변량 정규분포이고
+    손익이 노출에 선형이면 손익은 정규분포 하나이므로 시뮬레이션 없이 해석해 사용:
+        VaR_α = z_α·σ,  ES_α = φ(z_α) / (1 - α)·σ
+
+    대시보드 기본 KPI가 아니므로 on_demand로 등록됨 (targets에 'fxVaR'을 지정할 때만 실행).
+
+    context['varOptions']로 설정 변경 가능:
+        {'horizonDays': 1, 'volatilities': {'USD': 0.08}, 'correlations': {'USD/EUR': 0.5}}
+    """
+
+    name = "fxVaR"
+    version = "2.0"  # 몬테카를로 → 해석해
+    priority = 200
+    dependencies = []
+    on_demand = True
+    required_fields = ['currency', 'krwAmount']
+    numeric_fields = ['krwAmount']
+
+    # 기본 설정
+    horizon_days = 1
+
+    def calculate(self, positions: List[Dict[str, Any]], context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        VaR 계산 (포지션 리스트 → 컬럼형 변환 후 calculate_batch)
+
+        Args:
+            positions: 포지션 리스트 (currency, krwAmount, hedgeStatus, type)
+            context: 컨텍스트 (varOptions 선택)
+
+        Returns:
+            {'var95', 'var99', 'es95', 'es99', 'sigma', 'horizonDays', 'openExposure'}
+        """
+        return self.calculate_batch(PositionBatch.from_positions(positions), context)
+
+    def calculate_batch(self, batch: PositionBatch, context: Dict[str, Any]) -> Dict[str, Any]:
+        options = context.get('varOptions') or {}
+        horizon_days = float(options.get('horizonDays', self.horizon_days))
+
+        totals = currency_totals(batch)
+        currencies = totals['currencies']
+        open_exposure = totals['signedOpen']
+
+        result = {
+            'horizonDays': horizon_days,
+            'openExposure': {currency: float(amount)
+                             for currency, amount in zip(currencies, open_exposure)}
+        }
+
+        active = np.flatnonzero(open_exposure)
+        sigma = 0.0
+        if len(active):
+            active_currencies = [currencies[i] for i in active]
+            scale = self._volatilities(active_currencies, options) * np.sqrt(horizon_days / TRADING_DAYS)
+            loading = self._cholesky(active_currencies, options) * scale[:, None]
+            # 손익 = Z @ (σ·L)ᵀ @ 노출 → 표준편차는 (σ·L)ᵀ @ 노출의 노름
+            sigma = float(np.linalg.norm(loading.T @ open_exposure[active]))
+
+        result['sigma'] = sigma
+        normal = NormalDist()
+        for level, label in ((0.95, '95'), (0.99, '99')):
+            z = normal.inv_cdf(level)
+            result[f'var{label}'] = z * sigma
+            result[f'es{label}'] = normal.pdf(z) / (1 - level) * sigma
+
+        return result
+
+    def _volatilities(self, currencies: List[str], options: Dict[str, Any]):
+        overrides = options.get('volatilities') or {}
+        return np.array([
+            float(overrides.get(c, ANNUAL_VOLATILITIES.get(c, DEFAULT_VOLATILITY)))
+            for c in currencies
+        ])
+
+    def _cholesky(self, currencies: List[str], options: Dict[str, Any]):
+        """상관행렬의 촐레스키 분해 (양의 정부호가 아니면 음의 고유값을 0으로 보정)"""
+        overrides = {}
+        for pair, value in (options.get('correlations') or {}).items():
+            first, second = pair.split('/')
+            overrides[(first, second)] = overrides[(second, first)] = float(value)
+
+        size = len(currencies)
+        matrix = np.eye(size)
+        for i in range(size):
+            for j in range(i + 1, size):
+                pair = (currencies[i], currencies[j])
+                value = overrides.get(pair, CORRELATIONS.get(
+                    pair, CORRELATIONS.get(pair[::-1], DEFAULT_CORRELATION)))
+                matrix[i, j] = matrix[j, i] = value
+
+        try:
+            return np.linalg.cholesky(matrix)
+        except np.linalg.LinAlgError:
+            eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+            return eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+
+    def format_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """금액을 소수점 2자리로 포맷"""
+        formatted = dict(result)
+        for key in ('var95', 'var99', 'es95', 'es99', 'sigma'):
+            formatted[key] = round(result[key], 2)
+        formatted['openExposure'] = {currency: round(amount, 2)
+                                     for currency, amount in result['openExposure'].items()}
+        return formatted
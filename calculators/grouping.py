@@ -0,0 +1,86 @@
+"""
+그룹별 KPI 분해용 그룹 키 정의
+통화, 거래구분(수출/수입), 만기 구간 등 포지션을 나누는 기준
+"""
+from typing import Dict, Any, Callable, List
+
+from .normalize import parse_amount
+
+# 만기 구간 (daysUntil 상한, 라벨) - 상한 이하이면 해당 구간
+MATURITY_BUCKETS = [
+    (30, '1M'),
+    (90, '3M'),
+    (180, '6M'),
+    (365, '1Y'),
+]
+MATURITY_BUCKET_OVER = '1Y+'
+MATURITY_BUCKET_OVERDUE = 'overdue'
+MATURITY_BUCKET_UNKNOWN = 'unknown'
+
+# 요청에서 쓰는 이름 → 포지션 필드명
+GROUP_FIELD_ALIASES = {
+    'tradeType': 'type',
+    'trade_type': 'type',
+    'maturity': 'maturityBucket',
+}
+
+
+def maturity_bucket(days_until: Any) -> str:
+    """
+    D-Day를 만기 구간 라벨로 변환
+
+    Args:
+        days_until: 결제일까지 남은 일수
+
+    Returns:
+        구간 라벨 ('1M', '3M', '6M', '1Y', '1Y+', 'overdue', 'unknown')
+    """
+    if days_until is None or days_until == '':
+        return MATURITY_BUCKET_UNKNOWN
+
+    days = parse_amount(days_until)
+    if days < 0:
+        return MATURITY_BUCKET_OVERDUE
+
+    for limit, label in MATURITY_BUCKETS:
+        if days <= limit:
+            return label
+    return MATURITY_BUCKET_OVER
+
+
+def _field_key(field: str) -> Callable[[Dict[str, Any]], Any]:
+    def key(position: Dict[str, Any]) -> Any:
+        value = position.get(field)
+        return '' if value is None else value
+    return key
+
+
+def _maturity_key(position: Dict[str, Any]) -> str:
+    return maturity_bucket(position.get('daysUntil'))
+
+
+def group_key_function(group_by: List[str]) -> Callable[[Dict[str, Any]], tuple]:
+    """
+    그룹 기준 목록으로 포지션 → 그룹 키(tuple) 함수 생성
+
+    Args:
+        group_by: 그룹 기준 리스트 (예: ['currency'], ['currency', 'maturityBucket'])
+                  'maturityBucket'은 daysUntil로 계산, 나머지는 포지션 필드 값
+
+    Returns:
+        포지션을 받아 그룹 값 tuple을 반환하는 함수
+    """
+    if not group_by:
+        raise ValueError("group_by에 그룹 기준이 1개 이상 필요합니다")
+
+    fields = [GROUP_FIELD_ALIASES.get(field, field) for field in group_by]
+    extractors = [
+        _maturity_key if field == 'maturityBucket' else _field_key(field)
+        for field in fields
+    ]
+
+    if len(extractors) == 1:
+        extract = extractors[0]
+        return lambda position: (extract(position),)
+
+    return lambda position: tuple(extract(position) for extract in extractors)
@@ -13,6 +13,7 @@ class HedgeRatioCalculator(BaseCalculator):
     name = "hedgeRatio"
     priority = 30  # totalExposure와 hedgedAmount 이후 실행
     dependencies = ["totalExposure", "hedgedAmount"]
+    uses_positions = False
     
     def calculate(self, positions: List[Dict[str, Any]], context: Dict[str, Any]) -> float:
         """
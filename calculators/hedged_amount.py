@@ -3,20 +3,23 @@
 """
 from typing import Dict, List, Any
 from .base_calculator import BaseCalculator
+from .normalize import NormalizedPosition
+from .position_batch import PositionBatch
 
 class HedgedAmountCalculator(BaseCalculator):
     """
     헤지된 금액 계산
-    direction이 'hedge'인 포지션의 합계
+    포지션별 amount × 헤지 비중의 합계 (헤지 비중 정의는 normalize.hedge_weight)
     """
     
     name = "hedgedAmount"
+    version = "1.2"  # hedgeStatus 헤지 비중 반영
     priority = 20
     dependencies = []
     
     def calculate(self, positions: List[Dict[str, Any]], context: Dict[str, Any]) -> float:
         """
-        헤지된 금액 = SUM(direction='hedge'인 포지션의 amount)
+        헤지된 금액 = SUM(amount × 헤지 비중)
         
         Args:
             positions: 헤지 포지션 리스트
@@ -25,26 +28,25 @@ class HedgedAmountCalculator(BaseCalculator):
         Returns:
             헤지된 금액 (float)
         """
-        hedged = 0.0
-        
-        for pos in positions:
-            direction = pos.get('direction', '').lower()
-            
-            # 'hedge', '헤지', 'hedged' 등 다양한 표현 지원
-            if direction in ['hedge', 'hedged', '헤지', '헷지']:
-                amount = pos.get('amount', 0)
-                
-                # 문자열인 경우 숫자로 변환
-                if isinstance(amount, str):
-                    amount = amount.replace(',', '').replace('$', '').strip()
-                    try:
-                        amount = float(amount)
-                    except (ValueError, AttributeError):
-                        amount = 0
-                
-                hedged += float(amount)
-        
-        return hedged
+        return self.fold(positions, context)
+    
+    def create_state(self) -> float:
+        return 0.0
+    
+    def accumulate(self, state: float, row: NormalizedPosition) -> float:
+        return state + row.amount * row.hedge_weight
+    
+    def retract(self, state: float, row: NormalizedPosition) -> float:
+        return state - row.amount * row.hedge_weight
+    
+    def merge(self, state: float, other: float) -> float:
+        return state + other
+    
+    def finalize(self, state: float, context: Dict[str, Any]) -> float:
+        return state
+    
+    def calculate_batch(self, batch: PositionBatch, context: Dict[str, Any]) -> float:
+        return float(batch.amount @ batch.hedge_weight)
     
     def format_result(self, result: float) -> float:
         """결과를 소수점 2자리로 포맷"""
@@ -0,0 +1,179 @@
+"""
+증분 KPI 계산
+포지션 추가/삭제/수정 델타를 누적 상태에 바로 반영하여 전체 재계산을 피함
+"""
+from typing import Dict, List, Any, Optional
+import threading
+import logging
+
+from .normalize import normalize_position
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalKPI:
+    """
+    고객 1명의 포지션 집합에 대한 증분 KPI 상태
+
+    retract()를 구현한 계산기(총 노출액, 헤지 금액, 가중 환율 분자/분모)는
+    포지션 1건당 O(1)로 상태를 갱신하고, 포지션을 읽지 않는 파생 계산기
+    (헤지 비율, 미헤지 금액, 권장사항)는 결과 조회 시 context로만 계산함.
+    그 외 계산기는 보관 중인 포지션 전체로 폴백 계산함.
+
+    포지션은 'id' 필드로 식별함.
+
+    사용법:
+        kpi = IncrementalKPI(registry, positions)
+        kpi.apply([{'op': 'update', 'position': {...}}, {'op': 'remove', 'id': 'T1'}])
+        results = kpi.results()
+    """
+
+    OPS = ('add', 'remove', 'update')
+
+    def __init__(self, registry, positions: Optional[List[Dict[str, Any]]] = None):
+        """
+        Args:
+            registry: CalculatorRegistry
+            positions: 초기 포지션 리스트 (선택)
+        """
+        self.registry = registry
+        self._lock = threading.Lock()
+        self.reset(positions or [])
+
+    def reset(self, positions: List[Dict[str, Any]]):
+        """
+        포지션 전체를 기준 상태로 다시 적재
+
+        Args:
+            positions: 포지션 리스트 (각 포지션에 'id' 필요)
+        """
+        with self._lock:
+            self._positions = {}
+            # 실행 계획과 검증기를 같은 스냅샷에서 얻음
+            snapshot = self.registry.snapshot()
+            self._calculators = snapshot.execution_plan()
+            self._incremental = [c for c in self._calculators if c.supports_incremental]
+            self._states = {c.name: c.create_state() for c in self._incremental}
+            self._schema = snapshot.position_schema()
+
+            for position in positions:
+                self._add(position)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def apply(self, deltas: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        델타 목록 적용
+
+        Args:
+            deltas: [{'op': 'add'|'update', 'position': {...}} 또는
+                     {'op': 'remove', 'id': 'T1'}, ...]
+
+        Returns:
+            {'applied': 적용 건수, 'errors': [{'index': i, 'error': 메시지}, ...]}
+        """
+        applied = 0
+        errors = []
+
+        with self._lock:
+            for index, delta in enumerate(deltas):
+                try:
+                    op = delta.get('op')
+                    if op == 'add':
+                        self._add(delta['position'])
+                    elif op == 'remove':
+                        position_id = delta.get('id') or (delta.get('position') or {}).get('id')
+                        self._remove(position_id)
+                    elif op == 'update':
+                        self._update(delta['position'])
+                    else:
+                        raise ValueError(f"알 수 없는 op: {op} (허용: {', '.join(self.OPS)})")
+                    applied += 1
+                except (KeyError, ValueError, TypeError, AttributeError) as e:
+                    errors.append({'index': index, 'error': str(e)})
+
+        return {'applied': applied, 'errors': errors}
+
+    def results(self, context: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        현재 상태의 KPI 결과 (calculate_all과 같은 형태)
+
+        Args:
+            context: 초기 컨텍스트 (선택)
+
+        Returns:
+            {계산기 이름: 결과}
+        """
+        if context is None:
+            context = {}
+
+        with self._lock:
+            results = {}
+
+            # calculate_all과 동일하게 빈 포트폴리오는 검증 실패로 처리
+            if not self._positions:
+                return {c.name: None for c in self._calculators}
+
+            fallback_positions = None
+            for calculator in self._calculators:
+                try:
+                    calc_context = {**context, **results}
+                    if calculator.name in self._states:
+                        result = calculator.finalize(self._states[calculator.name], calc_context)
+                    elif not calculator.uses_positions:
+                        result = calculator.calculate([], calc_context)
+                    else:
+                        # 증분 미지원 계산기는 보관 중인 포지션 전체로 계산
+                        if fallback_positions is None:
+                            fallback_positions = list(self._positions.values())
+                        if not calculator.validate_input(fallback_positions):
+                            results[calculator.name] = None
+                            continue
+                        result = calculator.calculate(fallback_positions, calc_context)
+
+                    results[calculator.name] = calculator.format_result(result)
+
+                except Exception as e:
+                    logger.error(f"{calculator.name} 증분 계산 오류: {str(e)}", exc_info=True)
+                    results[calculator.name] = None
+
+            return results
+
+    # ━━━ 내부 갱신 (호출 측에서 잠금 보유) ━━━
+
+    def _validate(self, position: Dict[str, Any]):
+        if not isinstance(position, dict) or position.get('id') is None:
+            raise ValueError("포지션에 'id' 필드가 필요합니다")
+        problems = self._schema.check(position)
+        if problems:
+            raise ValueError(f"포지션 {position['id']} 검증 실패: "
+                             + ', '.join(problem['error'] for problem in problems))
+        for calculator in self._incremental:
+            if calculator.has_custom_validation and not calculator.validate_input([position]):
+                raise ValueError(f"{calculator.name}: 포지션 {position['id']} 검증 실패")
+
+    def _add(self, position: Dict[str, Any]):
+        self._validate(position)
+        position_id = str(position['id'])
+        if position_id in self._positions:
+            raise ValueError(f"이미 존재하는 포지션: {position_id}")
+
+        row = normalize_position(position)
+        for calculator in self._incremental:
+            self._states[calculator.name] = calculator.accumulate(self._states[calculator.name], row)
+        self._positions[position_id] = position
+
+    def _remove(self, position_id: Any):
+        position_id = str(position_id)
+        if position_id not in self._positions:
+            raise ValueError(f"존재하지 않는 포지션: {position_id}")
+
+        row = normalize_position(self._positions.pop(position_id))
+        for calculator in self._incremental:
+            self._states[calculator.name] = calculator.retract(self._states[calculator.name], row)
+
+    def _update(self, position: Dict[str, Any]):
+        self._validate(position)
+        self._remove(position['id'])
+        self._add(position)
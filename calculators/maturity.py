@@ -0,0 +1,245 @@
+"""
+만기 사다리 (결제일별 노출/헤지 분포)
+결제일 순으로 정렬한 인덱스와 누적합으로 "N일 내 만기" 조회를 이분 탐색 + 뺄셈 1회로 처리
+"""
+from typing import Dict, List, Any, Iterable, Optional
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+import bisect
+
+from .base_calculator import BaseCalculator
+from .normalize import parse_amount, hedge_weight
+
+# 기본 조회 구간 (일)
+DEFAULT_HORIZONS = [7, 30, 90, 180, 365]
+
+GRANULARITIES = ('week', 'month')
+
+
+def _settlement_ordinal(position: Dict[str, Any], reference: date) -> Optional[int]:
+    """
+    포지션 결제일의 날짜 서수 (date.toordinal)
+
+    settlementDate가 있으면 그 날짜, 없으면 기준일 + daysUntil
+    둘 다 없으면 None
+    """
+    value = position.get('settlementDate')
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and value:
+        try:
+            return datetime.strptime(value[:10], '%Y-%m-%d').toordinal()
+        except ValueError:
+            pass
+
+    days = position.get('daysUntil')
+    if days is None or days == '':
+        return None
+    return reference.toordinal() + int(parse_amount(days))
+
+
+def _as_date(value: Any) -> date:
+    """date / datetime / 'YYYY-MM-DD' 문자열 → date (None이면 오늘)"""
+    if value is None:
+        return date.today()
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+class MaturityIndex:
+    """
+    결제일 정렬 인덱스 (고객 1명의 포지션 집합)
+
+    생성 시 한 번 정렬하고 원화 노출액/헤지 금액 누적합을 만들어 두면
+    이후 구간 조회는 O(log n). 결제일을 절대 날짜로 저장하므로 날짜가 바뀌어도
+    today만 넘기면 그대로 재사용 가능함.
+
+    노출액은 krwAmount(원화)로만 집계하고, 헤지 금액은 krwAmount × normalize.hedge_weight
+    (레지스트리 hedgedAmount와 같은 헤지 비중 정의).
+
+    사용법:
+        index = MaturityIndex(positions)
+        index.maturing_within(30)        # {'exposure', 'hedged', 'unhedged', 'count'}
+        index.horizons([7, 30, 90])
+        index.ladder('month')
+    """
+
+    def __init__(self, positions: Iterable[Dict[str, Any]], reference_date: Any = None):
+        """
+        Args:
+            positions: 포지션 리스트 (krwAmount, hedgeStatus, settlementDate 또는 daysUntil)
+            reference_date: daysUntil의 기준일 (기본: 오늘)
+        """
+        reference = _as_date(reference_date)
+
+        entries = []
+        unknown_exposure = unknown_hedged = 0.0
+        unknown_count = 0
+        for position in positions:
+            exposure = parse_amount(position.get('krwAmount', 0))
+            hedged = exposure * hedge_weight(position)
+            ordinal = _settlement_ordinal(position, reference)
+            if ordinal is None:
+                unknown_exposure += exposure
+                unknown_hedged += hedged
+                unknown_count += 1
+            else:
+                entries.append((ordinal, exposure, hedged))
+
+        entries.sort(key=lambda entry: entry[0])
+
+        self._dates = [entry[0] for entry in entries]
+        self._cum_exposure = [0.0] + list(accumulate(entry[1] for entry in entries))
+        self._cum_hedged = [0.0] + list(accumulate(entry[2] for entry in entries))
+        self.unknown = self._summary(unknown_exposure, unknown_hedged, unknown_count)
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    @staticmethod
+    def _summary(exposure: float, hedged: float, count: int) -> Dict[str, Any]:
+        return {
+            'exposure': round(exposure, 2),
+            'hedged': round(hedged, 2),
+            'unhedged': round(exposure - hedged, 2),
+            'count': count
+        }
+
+    def _slice(self, start: int, stop: int) -> Dict[str, Any]:
+        """정렬 위치 [start, stop) 구간 합계 (누적합 뺄셈)"""
+        return self._summary(
+            self._cum_exposure[stop] - self._cum_exposure[start],
+            self._cum_hedged[stop] - self._cum_hedged[start],
+            stop - start
+        )
+
+    def between(self, first: Any, last: Any) -> Dict[str, Any]:
+        """
+        결제일이 first ~ last (양 끝 포함)인 포지션 합계
+
+        Args:
+            first: 시작일 (date 또는 'YYYY-MM-DD')
+            last: 종료일
+
+        Returns:
+            {'exposure', 'hedged', 'unhedged', 'count'}
+        """
+        start = bisect.bisect_left(self._dates, _as_date(first).toordinal())
+        stop = bisect.bisect_right(self._dates, _as_date(last).toordinal())
+        return self._slice(start, max(start, stop))
+
+    def maturing_within(self, days: int, today: Any = None) -> Dict[str, Any]:
+        """
+        오늘부터 days일 이내(오늘 포함) 만기 합계 (지난 만기 제외)
+
+        Args:
+            days: 조회 일수
+            today: 기준일 (기본: 오늘)
+
+        Returns:
+            {'exposure', 'hedged', 'unhedged', 'count'}
+        """
+        today = _as_date(today)
+        return self.between(today, today + timedelta(days=int(days)))
+
+    def overdue(self, today: Any = None) -> Dict[str, Any]:
+        """결제일이 지난 포지션 합계"""
+        stop = bisect.bisect_left(self._dates, _as_date(today).toordinal())
+        return self._slice(0, stop)
+
+    def horizons(self, days_list: Iterable[int], today: Any = None) -> Dict[str, Dict[str, Any]]:
+        """
+        여러 조회 구간을 한 번에 (구간마다 이분 탐색 2회)
+
+        Returns:
+            {'7': {...}, '30': {...}, ...}
+        """
+        today = _as_date(today)
+        return {str(int(days)): self.maturing_within(days, today) for days in days_list}
+
+    def ladder(self, granularity: str = 'month') -> List[Dict[str, Any]]:
+        """
+        결제 주/월별 만기 사다리
+
+        Args:
+            granularity: 'week' (월요일 시작 주) 또는 'month'
+
+        Returns:
+            [{'period': '2026-03' 또는 '2026-03-02', 'start', 'end', 'exposure', ...}, ...]
+            (결제일 순, 포지션이 있는 구간만)
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"알 수 없는 구간 단위: {granularity} (허용: {', '.join(GRANULARITIES)})")
+
+        buckets = []
+        start = 0
+        while start < len(self._dates):
+            first = date.fromordinal(self._dates[start])
+            if granularity == 'week':
+                period_start = first - timedelta(days=first.weekday())
+                period_end = period_start + timedelta(days=6)
+                period = period_start.isoformat()
+            else:
+                period_start = first.replace(day=1)
+                next_month = (period_start + timedelta(days=32)).replace(day=1)
+                period_end = next_month - timedelta(days=1)
+                period = period_start.strftime('%Y-%m')
+
+            stop = bisect.bisect_right(self._dates, period_end.toordinal(), lo=start)
+            buckets.append({
+                'period': period,
+                'start': period_start.isoformat(),
+                'end': period_end.isoformat(),
+                **self._slice(start, stop)
+            })
+            start = stop
+
+        return buckets
+
+
+class MaturityLadderCalculator(BaseCalculator):
+    """
+    만기 사다리 계산기
+
+    결제 주/월별 원화 노출액·헤지 금액과 조회 구간별(N일 내 만기) 합계.
+    ExcelParser 형식(krwAmount, hedgeStatus, settlementDate/daysUntil)이 필요하므로
+    on_demand로 등록됨 (targets에 'maturityLadder'를 지정할 때만 실행).
+
+    context 설정 (선택):
+        {'granularity': 'week' | 'month', 'horizons': [7, 30, 90], 'referenceDate': '2026-03-01'}
+    """
+
+    name = "maturityLadder"
+    priority = 200
+    dependencies = []
+    on_demand = True
+    required_fields = ['krwAmount']
+    numeric_fields = ['krwAmount', 'daysUntil']
+
+    def calculate(self, positions: List[Dict[str, Any]], context: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        만기 사다리 계산
+
+        Args:
+            positions: 포지션 리스트
+            context: 컨텍스트 (granularity, horizons, referenceDate 선택)
+
+        Returns:
+            {'granularity', 'buckets', 'horizons', 'overdue', 'unknown'}
+        """
+        reference = _as_date(context.get('referenceDate'))
+        granularity = context.get('granularity', 'month')
+        index = MaturityIndex(positions, reference_date=reference)
+
+        return {
+            'granularity': granularity,
+            'buckets': index.ladder(granularity),
+            'horizons': index.horizons(context.get('horizons') or DEFAULT_HORIZONS, reference),
+            'overdue': index.overdue(reference),
+            'unknown': index.unknown
+        }
@@ -0,0 +1,127 @@
+"""
+계산기 실행 지표
+레지스트리 관측 훅으로 계산기별 소요 시간, 입력 크기, 결과/오류 건수를 모아
+Prometheus 텍스트 형식으로 내보냄
+"""
+from typing import Dict, List, Tuple
+import bisect
+import os
+import threading
+
+# 소요 시간 히스토그램 구간 (초)
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                    0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# 입력 행 수 히스토그램 구간
+INPUT_SIZE_BUCKETS = (10, 100, 1000, 10000, 100000, 1000000)
+
+
+class _Histogram:
+    """누적 구간 히스토그램 1개 (라벨 조합 1개분)"""
+
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class CalculatorMetrics:
+    """
+    계산기별 실행 지표 수집기 (레지스트리 관측 함수)
+
+    지표는 프로세스 메모리에 쌓이므로 gunicorn 워커마다 따로 집계됨.
+    include_pid=True면 worker 라벨(프로세스 ID)로 워커를 구분함.
+
+    사용법:
+        metrics = CalculatorMetrics()
+        registry.add_observer(metrics)
+        ...
+        text = metrics.render()   # GET /api/metrics 응답 본문
+    """
+
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self, include_pid: bool = False):
+        """
+        Args:
+            include_pid: 모든 지표에 worker="<프로세스 ID>" 라벨 추가 여부
+        """
+        self.include_pid = include_pid
+        self._lock = threading.Lock()
+        self._durations: Dict[str, _Histogram] = {}
+        self._input_sizes: Dict[str, _Histogram] = {}
+        self._runs: Dict[Tuple[str, str], int] = {}
+
+    def __call__(self, name: str, elapsed: float, input_size: int, status: str):
+        """레지스트리 관측 훅 (CalculatorRegistry.add_observer로 등록)"""
+        with self._lock:
+            duration = self._durations.get(name)
+            if duration is None:
+                duration = self._durations[name] = _Histogram(DURATION_BUCKETS)
+                self._input_sizes[name] = _Histogram(INPUT_SIZE_BUCKETS)
+            duration.observe(elapsed)
+            self._input_sizes[name].observe(input_size)
+            self._runs[(name, status)] = self._runs.get((name, status), 0) + 1
+
+    def _labels(self, calculator: str, **extra) -> str:
+        labels = {'calculator': calculator, **extra}
+        if self.include_pid:
+            labels['worker'] = os.getpid()
+        return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+    def render(self) -> str:
+        """
+        Prometheus 텍스트 형식 (version 0.0.4)
+
+        Returns:
+            지표 텍스트
+        """
+        lines = [
+            '# HELP hedge_calculator_duration_seconds 계산기 1회 실행 소요 시간',
+            '# TYPE hedge_calculator_duration_seconds histogram',
+        ]
+        with self._lock:
+            for name in sorted(self._durations):
+                lines.extend(self._durations[name].render(
+                    'hedge_calculator_duration_seconds', self._labels(name)))
+
+            lines.extend([
+                '# HELP hedge_calculator_input_rows 계산기 실행 시 입력 포지션 수',
+                '# TYPE hedge_calculator_input_rows histogram',
+            ])
+            for name in sorted(self._input_sizes):
+                lines.extend(self._input_sizes[name].render(
+                    'hedge_calculator_input_rows', self._labels(name)))
+
+            lines.extend([
+                '# HELP hedge_calculator_runs_total 계산기 실행 건수 (status: ok, empty, error, invalid)',
+                '# TYPE hedge_calculator_runs_total counter',
+            ])
+            for (name, status), count in sorted(self._runs.items()):
+                lines.append(f'hedge_calculator_runs_total{{{self._labels(name, status=status)}}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    """Prometheus 라벨 값 이스케이프"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,120 @@
+"""
+포지션 값 정규화 유틸리티
+여러 계산기가 공통으로 쓰는 금액/환율/방향 정리 로직을 한 곳에 모음
+
+헤지 비중(hedge_weight)의 정의도 여기 한 곳에만 둠:
+    hedgeStatus가 있으면 HEDGE_STATUS_WEIGHTS, 없으면 direction이 헤지면 1.0
+금액 단위는 포트폴리오 전체에서 하나만 씀 (행마다 섞지 않음):
+레지스트리 KPI는 amount, 만기 사다리/시나리오/헤지 제안은 krwAmount
+"""
+from typing import Dict, Any
+
+# 헤지 포지션으로 간주하는 direction 값 ('hedge', '헤지', 'hedged' 등 다양한 표현 지원)
+HEDGE_DIRECTIONS = frozenset(['hedge', 'hedged', '헤지', '헷지'])
+
+# 헤지 상태별 헤지 비중 (excel_parser.KPIAccumulator와 동일한 가정, 그 외 상태는 0)
+HEDGE_STATUS_WEIGHTS = {
+    '전액헤지': 1.0,
+    '부분헤지': 0.5,
+}
+
+
+def parse_amount(value: Any) -> float:
+    """
+    금액 파싱 (쉼표, 달러 기호 제거)
+
+    Args:
+        value: 숫자 또는 문자열 금액 (예: "1,000,000", "$500")
+
+    Returns:
+        float 금액 (변환 실패 시 0.0)
+    """
+    if isinstance(value, str):
+        value = value.replace(',', '').replace('$', '').strip()
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def parse_rate(value: Any) -> float:
+    """
+    환율 파싱 (쉼표 제거)
+
+    Args:
+        value: 숫자 또는 문자열 환율 (예: "1,350.5")
+
+    Returns:
+        float 환율 (변환 실패 시 0.0)
+    """
+    if isinstance(value, str):
+        value = value.replace(',', '').strip()
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def is_hedge_direction(direction: Any) -> bool:
+    """direction 값이 헤지 포지션을 뜻하는지 여부"""
+    return str(direction or '').lower() in HEDGE_DIRECTIONS
+
+
+def hedge_weight(position: Dict[str, Any]) -> float:
+    """
+    포지션의 헤지 비중 (0.0 ~ 1.0)
+
+    hedgeStatus가 있으면 상태별 비중을 쓰고, 없으면 direction이 헤지인지로 판단
+
+    Args:
+        position: 원본 포지션 딕셔너리
+
+    Returns:
+        float 헤지 비중
+    """
+    status = position.get('hedgeStatus')
+    if status:
+        return HEDGE_STATUS_WEIGHTS.get(status, 0.0)
+    return 1.0 if is_hedge_direction(position.get('direction', '')) else 0.0
+
+
+class NormalizedPosition:
+    """
+    정규화된 포지션 1건
+
+    단일 패스 실행 시 포지션마다 한 번만 생성되어 모든 계산기가 공유함
+    - amount: 정리된 금액 (float)
+    - rate: 정리된 환율 (float)
+    - hedge_weight: 헤지 비중 (hedge_weight)
+    - is_hedge: 헤지 포지션 여부 (direction 기준)
+    - raw: 원본 포지션 딕셔너리 (추가 필드가 필요한 계산기용)
+    """
+
+    __slots__ = ('amount', 'rate', 'hedge_weight', 'is_hedge', 'raw')
+
+    def __init__(self, amount: float, rate: float, hedge_weight: float, is_hedge: bool,
+                 raw: Dict[str, Any]):
+        self.amount = amount
+        self.rate = rate
+        self.hedge_weight = hedge_weight
+        self.is_hedge = is_hedge
+        self.raw = raw
+
+
+def normalize_position(position: Dict[str, Any]) -> NormalizedPosition:
+    """
+    포지션 딕셔너리를 정규화
+
+    Args:
+        position: 원본 포지션 딕셔너리
+
+    Returns:
+        NormalizedPosition
+    """
+    return NormalizedPosition(
+        amount=parse_amount(position.get('amount', 0)),
+        rate=parse_rate(position.get('rate', 0)),
+        hedge_weight=hedge_weight(position),
+        is_hedge=is_hedge_direction(position.get('direction', '')),
+        raw=position
+    )
@@ -0,0 +1,110 @@
+"""
+병합 가능한 고객별 부분 집계
+고객별 누적 상태(합계, 가중합, 건수)를 저장해 두고 전사/세그먼트 KPI는
+저장된 상태만 병합하여 계산 (고객 포지션을 다시 읽지 않음)
+"""
+from typing import Dict, List, Any, Iterable, Optional
+from datetime import datetime
+
+# 부분 집계 저장 형식 버전 (형식이 바뀌면 올려서 이전 파일을 stale로 처리)
+PARTIAL_FORMAT_VERSION = 1
+
+
+def build_partial(registry, positions: Iterable[Dict[str, Any]],
+                  targets: Optional[List[str]] = None, **attributes) -> Dict[str, Any]:
+    """
+    포지션 → 저장용 부분 집계
+
+    Args:
+        registry: CalculatorRegistry
+        positions: 포지션 이터레이터
+        targets: 계산기 이름 리스트 (None이면 on_demand가 아닌 전체)
+        **attributes: 함께 저장할 속성 (customerId, segment 등)
+
+    Returns:
+        {'format', 'rows', 'calculators': {이름: {'version', 'state'}}, 'updatedAt', ...}
+    """
+    snapshot = registry.snapshot()
+    states, report = registry.partial_states(positions, targets, snapshot=snapshot)
+    calculators = snapshot.calculators
+    return {
+        **attributes,
+        'format': PARTIAL_FORMAT_VERSION,
+        'rows': report.valid_rows,
+        'calculators': {
+            name: {'version': calculators[name].version,
+                   'state': calculators[name].dump_state(state)}
+            for name, state in states.items()
+        },
+        'updatedAt': datetime.now().isoformat()
+    }
+
+
+def merge_partials(registry, partials: Iterable[Dict[str, Any]],
+                   targets: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    저장된 부분 집계 병합
+
+    형식 버전이나 계산기 버전이 현재와 다른 부분 집계는 합치지 않고
+    stale로 돌려줌 (해당 고객은 다시 계산해서 저장해야 함)
+
+    Args:
+        registry: CalculatorRegistry
+        partials: build_partial() 결과 이터레이터
+        targets: 계산기 이름 리스트 (None이면 on_demand가 아닌 전체)
+
+    Returns:
+        {'states': {이름: 병합 상태}, 'rows': 포지션 수, 'merged': 병합한 부분 집계 수,
+         'stale': [customerId 또는 순번, ...]}
+    """
+    mergeable = [c for c in registry.snapshot().execution_plan(targets) if c.supports_merge]
+    states = {c.name: c.create_state() for c in mergeable}
+    rows = 0
+    merged = 0
+    stale = []
+
+    for index, partial in enumerate(partials):
+        stored = partial.get('calculators') or {}
+        entries = [stored.get(c.name) for c in mergeable]
+        if partial.get('format') != PARTIAL_FORMAT_VERSION or any(
+                entry is None or entry.get('version') != c.version
+                for c, entry in zip(mergeable, entries)):
+            stale.append(partial.get('customerId', index))
+            continue
+
+        for calculator, entry in zip(mergeable, entries):
+            name = calculator.name
+            states[name] = calculator.merge(states[name], calculator.load_state(entry['state']))
+        rows += int(partial.get('rows', 0))
+        merged += 1
+
+    return {'states': states, 'rows': rows, 'merged': merged, 'stale': stale}
+
+
+def rollup_partials(registry, partials: Iterable[Dict[str, Any]],
+                    context: Dict[str, Any] = None,
+                    targets: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    부분 집계 병합 후 KPI 계산 (전사/세그먼트 롤업)
+
+    Args:
+        registry: CalculatorRegistry
+        partials: build_partial() 결과 이터레이터
+        context: 초기 컨텍스트 (선택)
+        targets: 계산기 이름 리스트 (선택)
+
+    Returns:
+        {'kpi': {...}, 'rows', 'merged', 'stale'}
+
+    사용법:
+        rollup = rollup_partials(registry, (load(path) for path in partial_paths))
+        rollup['kpi']['hedgeRatio']
+    """
+    merged = merge_partials(registry, partials, targets)
+    kpi = registry.calculate_from_states(merged['states'], merged['rows'], context, targets)
+    return {
+        'kpi': kpi,
+        'rows': merged['rows'],
+        'merged': merged['merged'],
+        'stale': merged['stale']
+    }
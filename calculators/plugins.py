@@ -0,0 +1,170 @@
+"""
+계산기 플러그인 탐색
+매니페스트(이름, 클래스 경로, 의존성, 우선순위)만으로 레지스트리에 등록하고
+계산기 모듈은 처음 실행될 때 import / 인스턴스화함
+"""
+from typing import Dict, List, Any, Iterable
+import importlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 외부 패키지 매니페스트 entry point 그룹
+# pyproject.toml 예:
+#   [project.entry-points."hedgefreedom.calculators"]
+#   my_plugin = "my_package.calculators:MANIFEST"
+ENTRY_POINT_GROUP = 'hedgefreedom.calculators'
+
+
+class LazyCalculator:
+    """
+    지연 로딩 계산기 프록시
+
+    실행 계획 구성에 필요한 name / dependencies / priority / on_demand는
+    매니페스트 값을 그대로 쓰고, 그 외 속성에 처음 접근할 때 계산기 클래스를
+    import하여 인스턴스를 만듦 (프로세스당 1회). 이후 모든 속성 접근은 실제
+    인스턴스로 위임됨.
+    """
+
+    def __init__(self, name: str, target: str, dependencies: Iterable[str] = (),
+                 priority: int = 100, on_demand: bool = False):
+        """
+        Args:
+            name: 계산기 이름
+            target: 'module.path:ClassName'
+            dependencies: 의존 계산기 이름
+            priority: 실행 우선순위
+            on_demand: targets로 요청할 때만 실행 여부
+        """
+        self.name = name
+        self.target = target
+        self.dependencies = list(dependencies)
+        self.priority = priority
+        self.on_demand = on_demand
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """계산기 클래스를 이미 불러왔는지 여부"""
+        return self._instance is not None
+
+    def load(self):
+        """
+        계산기 인스턴스 (처음 호출 시 import 후 생성)
+
+        Returns:
+            BaseCalculator 인스턴스
+
+        Raises:
+            ValueError: 클래스의 name/dependencies가 매니페스트와 다른 경우
+        """
+        instance = self._instance
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if self._instance is None:
+                from .base_calculator import BaseCalculator
+
+                started = time.perf_counter()
+                module_name, _, class_name = self.target.partition(':')
+                calculator_class = getattr(importlib.import_module(module_name), class_name)
+                instance = calculator_class()
+
+                if not isinstance(instance, BaseCalculator):
+                    raise TypeError(f"{self.target}는 BaseCalculator를 상속해야 합니다")
+                if instance.name != self.name or set(instance.dependencies) != set(self.dependencies):
+                    raise ValueError(
+                        f"매니페스트와 계산기 정의 불일치: {self.name} → {instance.name}, "
+                        f"의존성 {self.dependencies} → {instance.dependencies}"
+                    )
+
+                self._instance = instance
+                logger.info(f"계산기 로드: {self.name} "
+                            f"({(time.perf_counter() - started) * 1000:.1f}ms)")
+            return self._instance
+
+    def __getattr__(self, attr: str) -> Any:
+        # 매니페스트에 없는 속성 → 실제 인스턴스로 위임
+        return getattr(self.load(), attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.loaded else 'lazy'
+        return f"<LazyCalculator {self.name} ({self.target}, {state})>"
+
+
+def lazy_from_manifest(entry: Dict[str, Any]) -> LazyCalculator:
+    """
+    매니페스트 항목 → LazyCalculator
+
+    Args:
+        entry: {'name': 'totalExposure',
+                'class': 'calculators.total_exposure:TotalExposureCalculator',
+                'dependencies': [], 'priority': 10, 'on_demand': False}
+
+    Returns:
+        LazyCalculator
+    """
+    return LazyCalculator(
+        name=entry['name'],
+        target=entry['class'],
+        dependencies=entry.get('dependencies', []),
+        priority=entry.get('priority', 100),
+        on_demand=entry.get('on_demand', False)
+    )
+
+
+def entry_point_manifests() -> List[List[Dict[str, Any]]]:
+    """
+    설치된 패키지의 매니페스트 목록 (entry point 그룹 ENTRY_POINT_GROUP)
+
+    entry point는 매니페스트(딕셔너리 리스트)를 가리켜야 하며,
+    매니페스트 모듈만 import되고 계산기 모듈은 import되지 않음
+
+    Returns:
+        매니페스트 리스트
+    """
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+
+    try:
+        points = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # Python 3.9 이하
+        points = entry_points().get(ENTRY_POINT_GROUP, [])
+
+    manifests = []
+    for point in points:
+        try:
+            manifests.append(list(point.load()))
+        except Exception as e:
+            logger.error(f"계산기 매니페스트 로드 실패 ({point.name}): {str(e)}", exc_info=True)
+    return manifests
+
+
+def discover_calculators(registry, manifests: Iterable[Iterable[Dict[str, Any]]],
+                         include_entry_points: bool = True) -> List[str]:
+    """
+    매니페스트의 계산기를 지연 로딩 상태로 레지스트리에 등록
+
+    Args:
+        registry: CalculatorRegistry
+        manifests: 매니페스트 리스트
+        include_entry_points: 설치된 패키지의 entry point 매니페스트도 등록할지 여부
+
+    Returns:
+        등록된 계산기 이름 리스트
+    """
+    manifests = list(manifests)
+    if include_entry_points:
+        manifests.extend(entry_point_manifests())
+
+    for manifest in manifests:
+        for entry in manifest:
+            registry.register(lazy_from_manifest(entry))
+    return registry.list_calculators()
@@ -0,0 +1,200 @@
+"""
+다중 포트폴리오 배치 계산
+여러 고객의 포트폴리오를 프로세스 풀에 분산하여 계산하고, 끝나는 순서대로 결과를 반환
+"""
+from typing import Dict, Any, Iterable, Iterator, Optional
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import os
+import threading
+import time
+import logging
+
+from .registry import CalculatorRegistry
+from .builtin import register_builtin_calculators
+
+logger = logging.getLogger(__name__)
+
+# 프로세스 풀 (워커 프로세스당 1개를 재사용)
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def calculate_portfolio(registry, portfolio: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    포트폴리오 1개의 KPI와 통화별/그룹별 분해 계산
+
+    Args:
+        registry: CalculatorRegistry
+        portfolio: {
+            'positions': [...],
+            'customerId': 'C001',            # 선택
+            'targetHedgeRatio': 70,          # 선택
+            'groupBy': ['currency', 'type'], # 선택
+            'calculators': ['fxVaR']         # 선택 - 기본 계산기에 더해 실행할 on_demand 계산기
+        }
+
+    Returns:
+        {'summary': {...}, 'kpi': {...}, 'by_currency': {...}, 'validation': {...}, 'groups': [...]}
+    """
+    positions = portfolio.get('positions') or []
+    target_hedge_ratio = float(portfolio.get('targetHedgeRatio', 70))
+    context = {'customerId': portfolio.get('customerId', 'default')}
+
+    targets = None
+    if portfolio.get('calculators'):
+        targets = registry.list_calculators(include_on_demand=False) + list(portfolio['calculators'])
+    
+    kpi, report = registry.calculate_with_report(positions, context=context, targets=targets)
+
+    # 통화별 분해 (단일 패스)
+    by_currency = {}
+    for (currency,), group_kpi in registry.calculate_grouped(
+            positions, ['currency'], context=context).items():
+        by_currency[currency] = {
+            'exposure': group_kpi.get('totalExposure'),
+            'hedged': group_kpi.get('hedgedAmount'),
+            'ratio': group_kpi.get('hedgeRatio'),
+            'recommendation': group_kpi.get('recommendation')
+        }
+
+    result = {
+        'summary': {
+            'total_exposure': kpi.get('totalExposure'),
+            'hedge_ratio': kpi.get('hedgeRatio'),
+            'recommended_hedge': target_hedge_ratio,
+            'gap': round((kpi.get('hedgeRatio') or 0) - target_hedge_ratio, 2)
+        },
+        'kpi': kpi,
+        'by_currency': by_currency,
+        'validation': report.to_dict()
+    }
+
+    # 환율 VaR (요청한 경우)
+    if kpi.get('fxVaR'):
+        result['summary']['var_95'] = kpi['fxVaR']['var95']
+        result['summary']['var_99'] = kpi['fxVaR']['var99']
+    
+    # 임의 조합 분해 (예: 통화 × 거래구분 × 만기구간)
+    group_by = portfolio.get('groupBy')
+    if group_by:
+        result['groups'] = [
+            {'group': dict(zip(group_by, key)), 'kpi': group_kpi}
+            for key, group_kpi in registry.calculate_grouped(
+                positions, group_by, context=context).items()
+        ]
+
+    return result
+
+
+def _init_worker():
+    """
+    워커 프로세스 초기화 (프로세스당 1회)
+
+    fork로 생성되면 부모의 레지스트리를 물려받고, spawn이면 비어 있으므로
+    기본 계산기를 등록함
+    """
+    registry = CalculatorRegistry()
+    if not registry.list_calculators():
+        register_builtin_calculators(registry)
+
+
+def _run_portfolio(index: int, portfolio: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    워커 프로세스에서 포트폴리오 1개 계산 (실패해도 예외 대신 결과로 반환)
+
+    Args:
+        index: 요청 내 순번
+        portfolio: 포트폴리오 딕셔너리
+
+    Returns:
+        포트폴리오 결과 딕셔너리
+    """
+    started = time.perf_counter()
+    result = {
+        'index': index,
+        'portfolioId': portfolio.get('portfolioId') or portfolio.get('customerId') or str(index),
+        'customerId': portfolio.get('customerId'),
+        'positionCount': len(portfolio.get('positions') or [])
+    }
+
+    try:
+        if portfolio.get('parseError'):
+            raise ValueError(f"NDJSON 파싱 오류: {portfolio['parseError']}")
+        if not portfolio.get('positions'):
+            raise ValueError('포지션 데이터가 없습니다')
+        result.update(calculate_portfolio(CalculatorRegistry(), portfolio))
+        result['success'] = True
+    except Exception as e:
+        result['success'] = False
+        result['error'] = str(e)
+
+    result['elapsedMs'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def _get_pool(max_workers: int) -> ProcessPoolExecutor:
+    """프로세스 풀 (같은 크기면 재사용)"""
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker)
+            _pool_workers = max_workers
+        return _pool
+
+
+def iter_portfolio_results(portfolios: Iterable[Dict[str, Any]],
+                           max_workers: Optional[int] = None,
+                           max_pending: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    여러 포트폴리오를 프로세스 풀에 분산 계산하고 끝나는 순서대로 결과 반환
+
+    입력은 필요한 만큼만 읽어 최대 max_pending개까지만 동시에 제출하므로
+    NDJSON 스트림처럼 큰 입력도 메모리를 일정하게 유지함.
+
+    Args:
+        portfolios: 포트폴리오 딕셔너리 이터러블 (제너레이터 가능)
+        max_workers: 프로세스 수 (기본: CPU 코어 수, 1이면 현재 프로세스에서 순차 계산)
+        max_pending: 동시에 제출해 둘 최대 포트폴리오 수 (기본: max_workers * 4)
+
+    Yields:
+        포트폴리오별 결과 ({'index', 'portfolioId', 'success', 'kpi', ...})
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    max_pending = max_pending or max_workers * 4
+
+    if max_workers <= 1:
+        for index, portfolio in enumerate(portfolios):
+            yield _run_portfolio(index, portfolio)
+        return
+
+    pool = _get_pool(max_workers)
+    source = enumerate(portfolios)
+    pending = set()
+    exhausted = False
+
+    try:
+        while True:
+            # 제출 창이 빌 때마다 입력을 더 읽어 채움
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    index, portfolio = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(_run_portfolio, index, portfolio))
+
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+    finally:
+        # 클라이언트 연결이 끊겨 제너레이터가 닫히면 남은 작업 취소
+        for future in pending:
+            future.cancel()
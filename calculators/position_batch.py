@@ -0,0 +1,251 @@
+"""
+컬럼형 포지션 배치
+포지션 딕셔너리 리스트를 NumPy 배열 컬럼으로 변환하여 벡터화 계산에 사용
+"""
+from typing import Dict, List, Any, Iterable, Optional, Sequence
+
+from .normalize import parse_amount, parse_rate, HEDGE_DIRECTIONS, HEDGE_STATUS_WEIGHTS
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+class PositionBatch:
+    """
+    컬럼형 포지션 컨테이너
+
+    - 실수 컬럼: amount, rate, krwAmount, daysUntil (float64 배열, 결측은 NaN)
+    - 범주형 컬럼: currency, direction, hedgeStatus, type (int32 코드 배열 + 범주 리스트)
+    - 파생 컬럼: hedge_weight (헤지 비중, normalize.hedge_weight와 같은 정의)
+
+    사용법:
+        batch = PositionBatch.from_positions(positions)
+        hedged = batch.amount[batch.is_hedge].sum()
+    """
+
+    FLOAT_FIELDS = ('amount', 'rate', 'krwAmount', 'daysUntil')
+    CATEGORICAL_FIELDS = ('currency', 'direction', 'hedgeStatus', 'type')
+
+    def __init__(self, columns: Dict[str, Any], codes: Dict[str, Any],
+                 categories: Dict[str, List[str]],
+                 positions: Optional[List[Dict[str, Any]]] = None):
+        """
+        Args:
+            columns: {실수 필드명: float64 배열}
+            codes: {범주형 필드명: int32 코드 배열}
+            categories: {범주형 필드명: 코드 순서대로의 범주 값 리스트}
+            positions: 원본 포지션 리스트 (있으면 to_positions()에서 재사용)
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("PositionBatch는 numpy가 필요합니다 (pip install numpy)")
+
+        self.columns = columns
+        self.codes = codes
+        self.categories = categories
+        self._positions = positions
+        self._is_hedge = None
+        self._hedge_weight = None
+
+    @classmethod
+    def from_positions(cls, positions: Iterable[Dict[str, Any]]) -> 'PositionBatch':
+        """
+        포지션 딕셔너리 리스트를 컬럼 단위로 변환
+
+        Args:
+            positions: 헤지 포지션 리스트
+
+        Returns:
+            PositionBatch
+        """
+        positions = list(positions)
+
+        columns = {
+            'amount': _float_column([p.get('amount', 0) for p in positions], parse_amount),
+            'rate': _float_column([p.get('rate', 0) for p in positions], parse_rate),
+            'krwAmount': _float_column([p.get('krwAmount', 0) for p in positions], parse_amount),
+            'daysUntil': _float_column([p.get('daysUntil') for p in positions], _parse_days)
+        }
+
+        codes = {}
+        categories = {}
+        for field in cls.CATEGORICAL_FIELDS:
+            values = [p.get(field) or '' for p in positions]
+            if field == 'direction':
+                values = [str(v).lower() for v in values]
+            codes[field], categories[field] = _encode_categorical(values)
+
+        return cls(columns, codes, categories, positions=positions)
+
+    @classmethod
+    def from_columns(cls, amount: Sequence[float],
+                     direction: Sequence[str],
+                     currency: Optional[Sequence[str]] = None,
+                     rate: Optional[Sequence[float]] = None,
+                     krw_amount: Optional[Sequence[float]] = None,
+                     days_until: Optional[Sequence[float]] = None,
+                     hedge_status: Optional[Sequence[str]] = None,
+                     trade_type: Optional[Sequence[str]] = None) -> 'PositionBatch':
+        """
+        이미 컬럼 형태인 데이터로 배치 생성 (딕셔너리 변환 없이)
+
+        Args:
+            amount: 금액 배열
+            direction: direction 값 배열
+            currency, rate, krw_amount, days_until, hedge_status, trade_type: 선택 컬럼
+
+        Returns:
+            PositionBatch
+        """
+        amount = np.asarray(amount, dtype=np.float64)
+        count = len(amount)
+
+        def float_column(values, fill):
+            if values is None:
+                return np.full(count, fill, dtype=np.float64)
+            return np.asarray(values, dtype=np.float64)
+
+        def categorical_column(values, lower=False):
+            if values is None:
+                return np.zeros(count, dtype=np.int32), ['']
+            return _encode_categorical([str(v).lower() if lower else v for v in values])
+
+        columns = {
+            'amount': amount,
+            'rate': float_column(rate, 0.0),
+            'krwAmount': float_column(krw_amount, 0.0),
+            'daysUntil': float_column(days_until, np.nan)
+        }
+
+        codes = {}
+        categories = {}
+        for field, values, lower in (('currency', currency, False),
+                                     ('direction', direction, True),
+                                     ('hedgeStatus', hedge_status, False),
+                                     ('type', trade_type, False)):
+            codes[field], categories[field] = categorical_column(values, lower)
+
+        return cls(columns, codes, categories)
+
+    def __len__(self) -> int:
+        return len(self.columns['amount'])
+
+    # ━━━ 컬럼 접근 ━━━
+
+    @property
+    def amount(self):
+        return self.columns['amount']
+
+    @property
+    def rate(self):
+        return self.columns['rate']
+
+    @property
+    def krw_amount(self):
+        return self.columns['krwAmount']
+
+    @property
+    def days_until(self):
+        return self.columns['daysUntil']
+
+    @property
+    def hedge_weight(self):
+        """
+        헤지 비중 (float 배열, normalize.hedge_weight와 같은 규칙)
+
+        hedgeStatus가 비어 있는 행만 direction으로 판단함
+        """
+        if self._hedge_weight is None:
+            statuses = self.categories['hedgeStatus']
+            if len(statuses) == 0:
+                self._hedge_weight = np.zeros(len(self), dtype=np.float64)
+            else:
+                lookup = np.array([HEDGE_STATUS_WEIGHTS.get(status, 0.0) if status else np.nan
+                                   for status in statuses], dtype=np.float64)
+                weight = lookup[self.codes['hedgeStatus']]
+                by_direction = self.isin('direction', HEDGE_DIRECTIONS)
+                self._hedge_weight = np.where(np.isnan(weight), by_direction, weight)
+        return self._hedge_weight
+
+    @property
+    def is_hedge(self):
+        """헤지 포지션 여부 (bool 배열, direction 기준)"""
+        if self._is_hedge is None:
+            self._is_hedge = self.isin('direction', HEDGE_DIRECTIONS)
+        return self._is_hedge
+
+    def isin(self, field: str, values: Iterable[str]):
+        """
+        범주형 컬럼 값이 values에 속하는지 (bool 배열)
+
+        범주 단위로 한 번만 비교하고 코드 배열에는 조회만 수행함
+        """
+        values = set(values)
+        lookup = np.array([category in values for category in self.categories[field]],
+                          dtype=bool)
+        if len(lookup) == 0:
+            return np.zeros(len(self), dtype=bool)
+        return lookup[self.codes[field]]
+
+    def to_positions(self) -> List[Dict[str, Any]]:
+        """
+        포지션 딕셔너리 리스트로 변환 (배치 미지원 계산기 폴백용)
+
+        Returns:
+            포지션 리스트 (원본이 있으면 원본 그대로)
+        """
+        if self._positions is None:
+            decoded = {field: [self.categories[field][code] for code in self.codes[field]]
+                       for field in self.CATEGORICAL_FIELDS}
+            self._positions = [
+                {
+                    'amount': float(self.amount[i]),
+                    'rate': float(self.rate[i]),
+                    'krwAmount': float(self.krw_amount[i]),
+                    'daysUntil': None if np.isnan(self.days_until[i]) else float(self.days_until[i]),
+                    'currency': decoded['currency'][i],
+                    'direction': decoded['direction'][i],
+                    'hedgeStatus': decoded['hedgeStatus'][i],
+                    'type': decoded['type'][i]
+                }
+                for i in range(len(self))
+            ]
+        return self._positions
+
+
+def _float_column(values: List[Any], parse) -> Any:
+    """
+    값 리스트를 float64 배열로 변환
+
+    모두 숫자면 numpy가 한 번에 변환하고, 문자열 등이 섞여 있으면
+    parse 함수로 값마다 정리한 뒤 변환함. numpy는 None을 NaN으로 바꾸므로
+    NaN이 된 자리는 parse 규칙으로 다시 변환함 (딕셔너리 경로와 같은 값)
+    """
+    try:
+        column = np.array(values, dtype=np.float64)
+    except (ValueError, TypeError):
+        return np.array([parse(v) for v in values], dtype=np.float64)
+    for i in np.flatnonzero(np.isnan(column)):
+        column[i] = parse(values[i])
+    return column
+
+
+def _parse_days(value: Any) -> float:
+    """daysUntil 파싱 (결측은 NaN)"""
+    if value is None:
+        return np.nan
+    return parse_amount(value)
+
+
+def _encode_categorical(values: List[Any]):
+    """
+    범주형 값 리스트를 (int32 코드 배열, 범주 리스트)로 인코딩
+
+    범주 순서는 처음 등장한 순서를 따름
+    """
+    lookup = {}
+    codes = [lookup.setdefault(v, len(lookup)) for v in values]
+    return np.array(codes, dtype=np.int32), list(lookup)
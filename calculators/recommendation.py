@@ -3,43 +3,52 @@
 """
 from typing import Dict, List, Any
 from .base_calculator import BaseCalculator
+from .rules import RecommendationRules
 
 class RecommendationCalculator(BaseCalculator):
     """
     헤지 권장사항 계산
     헤지 비율에 따라 권장사항 제공
+    
+    context['recommendationRules'](RecommendationRules)가 있으면 고객별/통화별
+    정책 구간을 적용하고, 없으면 OPTIMAL_MIN ~ OPTIMAL_MAX 기본 구간을 사용함
+    (통화는 calculate_grouped의 context['group']['currency'])
     """
     
     name = "recommendation"
     priority = 60  # hedgeRatio 이후 실행
     dependencies = ["hedgeRatio"]
+    uses_positions = False
     
     # 권장 헤지 비율 임계값
     OPTIMAL_MIN = 70.0  # 최소 권장 헤지 비율
     OPTIMAL_MAX = 90.0  # 최대 권장 헤지 비율
     
+    def __init__(self):
+        super().__init__()
+        self._default_rules = RecommendationRules(default_min=self.OPTIMAL_MIN,
+                                                  default_max=self.OPTIMAL_MAX)
+    
     def calculate(self, positions: List[Dict[str, Any]], context: Dict[str, Any]) -> str:
         """
         권장사항 = 
             - hedgeRatio < 70% → "추가헤지필요"
             - 70% <= hedgeRatio <= 90% → "적정"
             - hedgeRatio > 90% → "과도헤지"
+            (규칙표에 urgentBelow가 있으면 그 미만은 "긴급헤지필요")
         
         Args:
             positions: 헤지 포지션 리스트 (사용 안 함)
-            context: 이전 계산 결과 (hedgeRatio)
+            context: 이전 계산 결과 (hedgeRatio), customerId, recommendationRules (선택)
         
         Returns:
             권장사항 문자열
         """
         hedge_ratio = context.get('hedgeRatio', 0)
+        rules = context.get('recommendationRules') or self._default_rules
+        group = context.get('group') or {}
         
-        if hedge_ratio < self.OPTIMAL_MIN:
-            return "추가헤지필요"
-        elif hedge_ratio > self.OPTIMAL_MAX:
-            return "과도헤지"
-        else:
-            return "적정"
+        return rules.label(hedge_ratio, context.get('customerId'), group.get('currency'))
     
     def format_result(self, result: str) -> str:
         """결과 그대로 반환"""
@@ -2,8 +2,17 @@
 계산기 레지스트리
 모든 계산기를 자동으로 등록하고 관리
 """
-from typing import Dict, List, Any, Type
+from typing import Dict, List, Any, Type, Union, Optional, Tuple, Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
+import time
+
+from .normalize import normalize_position
+from .grouping import group_key_function
+from .position_batch import PositionBatch, NUMPY_AVAILABLE
+from .snapshot import RegistrySnapshot
+from .validation import PositionSchema, ValidationReport, StreamValidationReport
 
 logger = logging.getLogger(__name__)
 
@@ -15,39 +24,80 @@ class CalculatorRegistry:
         registry = CalculatorRegistry()
         registry.register(TotalExposureCalculator())
         results = registry.calculate_all(positions)
+        ratio_only = registry.calculate_all(positions, targets=['hedgeRatio'])
+    
+    실행 계획:
+        등록/해제 시점에 dependencies로 DAG를 만들어 위상 정렬된 실행 순서와
+        병렬 실행 단계(level)를 미리 계산함. 순환 의존성은 등록 시 거부됨.
+    
+    스냅샷:
+        계산기 구성과 실행 계획은 불변 RegistrySnapshot에 담김.
+        등록/해제는 새 스냅샷을 만든 뒤 참조 한 번으로 교체하고(copy-on-write),
+        계산 요청은 시작 시점의 스냅샷을 끝까지 사용하므로 요청 처리 중
+        다른 스레드가 계산기를 바꿔도 한 요청 안에서 구성이 섞이지 않음.
+    
+    입력 검증:
+        실행할 계산기들의 required_fields/numeric_fields로 만든 PositionSchema로
+        요청당 한 번 검증하고, 오류 행은 제외한 포지션을 모든 계산기가 공유함.
+    
+    관측 훅:
+        add_observer()로 등록한 함수가 계산기 실행마다
+        (계산기 이름, 소요 시간(초), 입력 행 수, 상태) 로 호출됨.
+        상태: 'ok', 'empty'(결과 None), 'error'(예외), 'invalid'(검증 실패)
+        단일 패스 누적 순회는 FUSED_PASS 이름으로 따로 기록됨.
     """
     
+    # 단일 패스 누적 순회 구간의 관측 이름
+    FUSED_PASS = 'fusedPass'
+    
     _instance = None
-    _calculators: Dict[str, Any] = {}
+    _instance_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._setup()
+                    cls._instance = instance
         return cls._instance
     
-    def __init__(self):
-        # 이미 초기화되었으면 스킵
-        if hasattr(self, '_initialized'):
-            return
-        self._initialized = True
-        self._calculators = {}
+    def _setup(self):
+        """싱글톤 최초 생성 시 1회 초기화"""
+        # 현재 스냅샷 (등록/해제 시 통째로 교체)
+        self._snapshot = RegistrySnapshot()
+        
+        # 등록/해제끼리의 직렬화용 (계산 경로는 잠그지 않음)
+        self._write_lock = threading.Lock()
+        
+        # 같은 단계의 독립 계산기 동시 실행용 스레드 풀 (set_max_workers로 활성화)
+        self._executor = None
+        
+        # 계산기 실행 관측 훅
+        self._observers: List[Callable[[str, float, int, str], None]] = []
     
     def register(self, calculator):
         """
         계산기 등록
         
         Args:
-            calculator: BaseCalculator를 상속한 계산기 인스턴스
+            calculator: BaseCalculator를 상속한 계산기 인스턴스 또는 LazyCalculator
+        
+        Raises:
+            ValueError: 순환 의존성이 생기는 경우 (기존 스냅샷 유지)
         """
         from .base_calculator import BaseCalculator
+        from .plugins import LazyCalculator
         
-        if not isinstance(calculator, BaseCalculator):
+        if not isinstance(calculator, (BaseCalculator, LazyCalculator)):
             raise TypeError(f"{calculator}는 BaseCalculator를 상속해야 합니다")
         
         if not calculator.name:
             raise ValueError(f"{calculator.__class__.__name__}은 name 속성이 필요합니다")
         
-        self._calculators[calculator.name] = calculator
+        with self._write_lock:
+            self._snapshot = self._snapshot.with_calculator(calculator)
+        
         logger.info(f"계산기 등록: {calculator.name}")
     
     def unregister(self, name: str):
@@ -57,9 +107,70 @@ class CalculatorRegistry:
         Args:
             name: 계산기 이름
         """
-        if name in self._calculators:
-            del self._calculators[name]
-            logger.info(f"계산기 등록 해제: {name}")
+        with self._write_lock:
+            if name not in self._snapshot.calculators:
+                return
+            self._snapshot = self._snapshot.without(name)
+        logger.info(f"계산기 등록 해제: {name}")
+    
+    def snapshot(self) -> RegistrySnapshot:
+        """
+        현재 레지스트리 스냅샷 (불변)
+        
+        여러 번 조회/계산하는 동안 같은 계산기 구성을 써야 할 때 사용
+        (예: 실행 계획과 검증기를 같은 구성에서 얻기)
+        
+        Returns:
+            RegistrySnapshot
+        """
+        return self._snapshot
+    
+    def add_observer(self, observer: Callable[[str, float, int, str], None]):
+        """
+        계산기 실행 관측 함수 등록
+        
+        Args:
+            observer: observer(name, elapsed_seconds, input_size, status)
+        """
+        if observer not in self._observers:
+            self._observers = self._observers + [observer]
+    
+    def remove_observer(self, observer: Callable[[str, float, int, str], None]):
+        """
+        관측 함수 등록 해제
+        
+        Args:
+            observer: add_observer()로 등록한 함수
+        """
+        self._observers = [o for o in self._observers if o is not observer]
+    
+    def _notify(self, name: str, elapsed: float, input_size: int, status: str):
+        """관측 함수 호출 (관측 오류는 계산에 영향을 주지 않음)"""
+        for observer in self._observers:
+            try:
+                observer(name, elapsed, input_size, status)
+            except Exception as e:
+                logger.error(f"관측 함수 오류: {str(e)}", exc_info=True)
+    
+    def set_max_workers(self, max_workers: int):
+        """
+        같은 단계의 독립 계산기를 동시에 실행할 스레드 수 설정
+        
+        numpy 배열 연산처럼 GIL을 놓는 무거운 계산기(VaR, 시나리오 등)가
+        한 단계에 여러 개 있을 때 효과가 있음. 0 또는 1이면 순차 실행.
+        
+        Args:
+            max_workers: 스레드 수
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        
+        if max_workers and max_workers > 1:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='calculator'
+            )
     
     def get(self, name: str):
         """
@@ -71,63 +182,516 @@ class CalculatorRegistry:
         Returns:
             계산기 인스턴스 또는 None
         """
-        return self._calculators.get(name)
+        return self._snapshot.get(name)
     
-    def list_calculators(self) -> List[str]:
+    def list_calculators(self, include_on_demand: bool = True) -> List[str]:
         """
         등록된 모든 계산기 이름 반환
         
+        Args:
+            include_on_demand: False면 targets 없이 실행되는 기본 계산기만
+        
         Returns:
             계산기 이름 리스트
         """
-        return list(self._calculators.keys())
+        return self._snapshot.names(include_on_demand)
     
-    def calculate_all(self, positions: List[Dict[str, Any]], 
-                     context: Dict[str, Any] = None) -> Dict[str, Any]:
+    def calculator_versions(self, targets: Optional[List[str]] = None) -> Dict[str, str]:
         """
-        모든 계산기 실행 (의존성 순서 고려)
+        실행 대상 계산기별 버전 (결과 캐시 키 구성용)
         
         Args:
-            positions: 헤지 포지션 리스트
+            targets: 계산기 이름 리스트 (None이면 on_demand가 아닌 전체)
+        
+        Returns:
+            {계산기 이름: 버전}
+        """
+        return self._snapshot.calculator_versions(targets)
+    
+    def execution_plan(self, targets: Optional[List[str]] = None) -> List[Any]:
+        """
+        DAG 실행 순서대로 정렬된 계산기 인스턴스 리스트
+        
+        Args:
+            targets: 계산기 이름 리스트 (None이면 on_demand가 아닌 전체)
+        
+        Returns:
+            계산기 리스트
+        """
+        return self._snapshot.execution_plan(targets)
+    
+    def position_schema(self, targets: Optional[List[str]] = None) -> PositionSchema:
+        """
+        실행 대상 계산기들의 선언 필드로 만든 검증기 (스냅샷이 바뀔 때까지 캐시)
+        
+        Args:
+            targets: 계산기 이름 리스트 (None이면 전체)
+        
+        Returns:
+            PositionSchema
+        """
+        return self._snapshot.position_schema(targets)
+    
+    def validate_positions(self, positions: Union[List[Dict[str, Any]], PositionBatch],
+                           targets: Optional[List[str]] = None,
+                           snapshot: Optional[RegistrySnapshot] = None) -> ValidationReport:
+        """
+        포지션 1회 검증 (행별 오류 보고 + 통과 포지션)
+        
+        Args:
+            positions: 헤지 포지션 리스트 또는 PositionBatch
+            targets: 계산기 이름 리스트 (None이면 전체)
+            snapshot: 검증기를 얻을 스냅샷 (기본: 현재 스냅샷)
+        
+        Returns:
+            ValidationReport
+        """
+        if isinstance(positions, PositionBatch):
+            # 컬럼형 배치는 생성 시 모든 필드가 채워짐
+            return ValidationReport(positions, [], len(positions))
+        return (snapshot or self._snapshot).position_schema(targets).validate(positions)
+    
+    def calculate_all(self, positions: Union[List[Dict[str, Any]], PositionBatch], 
+                     context: Dict[str, Any] = None,
+                     fused: bool = True,
+                     targets: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        모든 계산기 실행 (의존성 DAG 순서)
+        
+        검증 오류 행은 제외하고 계산함 (행별 오류는 calculate_with_report 사용)
+        
+        Args:
+            positions: 헤지 포지션 리스트 또는 PositionBatch
+            context: 초기 컨텍스트 (선택)
+            fused: True면 누적기를 구현한 계산기들을 포지션 1회 순회로 함께 계산
+            targets: 필요한 계산기 이름 리스트 (선택)
+        
+        Returns:
+            계산 결과를 담은 딕셔너리 (실행 계획 순서)
+        """
+        results, _ = self.calculate_with_report(positions, context, fused, targets)
+        return results
+    
+    def calculate_with_report(self, positions: Union[List[Dict[str, Any]], PositionBatch],
+                              context: Dict[str, Any] = None,
+                              fused: bool = True,
+                              targets: Optional[List[str]] = None
+                              ) -> Tuple[Dict[str, Any], ValidationReport]:
+        """
+        모든 계산기 실행 (의존성 DAG 순서) + 입력 검증 보고
+        
+        실행 경로 우선순위 (계산기별):
+            1. calculate_batch() - numpy 사용 가능 시 컬럼형 배열 연산
+            2. finalize() - 단일 패스 누적 (fused=True)
+            3. calculate() - 개별 순회
+        
+        Args:
+            positions: 헤지 포지션 리스트 또는 PositionBatch
             context: 초기 컨텍스트 (선택)
+            fused: True면 누적기를 구현한 계산기들을 포지션 1회 순회로 함께 계산
+                   (False면 계산기마다 포지션을 개별 순회)
+            targets: 필요한 계산기 이름 리스트 (선택, 예: ['hedgeRatio'])
+                     지정하면 해당 계산기와 그 조상만 실행됨
         
         Returns:
-            모든 계산 결과를 담은 딕셔너리
+            (계산 결과 딕셔너리, ValidationReport)
+            검증 오류 행은 제외하고 계산하며, 통과한 행이 없으면 모든 결과가 None
         """
         if context is None:
             context = {}
         
         results = {}
         
-        # 우선순위 순으로 정렬
-        sorted_calculators = sorted(
-            self._calculators.values(),
-            key=lambda c: c.priority
-        )
+        # 요청 시작 시점의 스냅샷을 끝까지 사용 (도중의 등록/해제와 무관)
+        snapshot = self._snapshot
+        
+        # 실행 대상 (스냅샷에 미리 계산된 DAG에서 필요한 부분만)
+        levels = snapshot.select_levels(targets)
+        selected = [calculator for level in levels for calculator in level]
+        
+        # 입력 검증 (요청당 1회, 통과한 포지션을 모든 계산기가 공유)
+        report = self.validate_positions(positions, targets, snapshot)
+        positions = report.positions
+        valid = self._validate_all(selected, positions)
+        
+        # 컬럼형 배치 (배열 연산을 지원하는 계산기가 있을 때만 생성)
+        batch = positions if isinstance(positions, PositionBatch) else None
+        batched = {c.name for c in selected
+                   if valid[c.name] and c.supports_batch}
+        if batch is None and batched and NUMPY_AVAILABLE:
+            batch = PositionBatch.from_positions(positions)
+        if batch is None:
+            batched = set()
+        elif positions is batch and any(valid[c.name] and c.uses_positions and c.name not in batched
+                                        for c in selected):
+            # 배치 미지원 계산기는 딕셔너리 리스트로 폴백
+            positions = batch.to_positions()
+        
+        observed = bool(self._observers)
+        input_size = len(positions)
+        
+        # 단일 패스 누적 (포지션 1회 순회)
+        states = {}
+        if fused:
+            fusable = [c for c in selected
+                       if valid[c.name] and c.supports_fused and c.name not in batched]
+            if fusable:
+                started = time.perf_counter()
+                states = self._run_fused_pass(fusable, positions)
+                if observed:
+                    self._notify(self.FUSED_PASS, time.perf_counter() - started,
+                                 input_size, 'ok' if states else 'error')
         
-        # 각 계산기 실행
-        for calculator in sorted_calculators:
+        def run(calculator, calc_context):
+            started = time.perf_counter()
+            status = 'ok'
+            formatted_result = None
             try:
-                # 입력 검증
-                if not calculator.validate_input(positions):
+                if not valid[calculator.name]:
                     logger.warning(f"{calculator.name}: 입력 데이터 검증 실패")
-                    results[calculator.name] = None
-                    continue
+                    status = 'invalid'
+                    return None
                 
-                # 계산 수행
-                result = calculator.calculate(positions, {**context, **results})
+                # 계산 수행 (배열 연산 → 누적 상태 마무리 → 개별 순회 순으로 선택)
+                if calculator.name in batched:
+                    result = calculator.calculate_batch(batch, calc_context)
+                elif calculator.name in states:
+                    result = calculator.finalize(states[calculator.name], calc_context)
+                else:
+                    result = calculator.calculate(positions, calc_context)
                 
                 # 결과 포맷팅
                 formatted_result = calculator.format_result(result)
-                
-                results[calculator.name] = formatted_result
+                if formatted_result is None:
+                    status = 'empty'
                 logger.info(f"{calculator.name}: {formatted_result}")
+                return formatted_result
                 
             except Exception as e:
                 logger.error(f"{calculator.name} 계산 오류: {str(e)}", exc_info=True)
-                results[calculator.name] = None
+                status = 'error'
+                return None
+            
+            finally:
+                if observed:
+                    self._notify(calculator.name, time.perf_counter() - started,
+                                 input_size, status)
         
-        return results
+        # 단계별 실행 (같은 단계는 서로 의존하지 않으므로 동시 실행 가능)
+        executor = self._executor
+        for level in levels:
+            if executor is not None and len(level) > 1:
+                level_context = {**context, **results}
+                futures = [executor.submit(run, calculator, level_context)
+                           for calculator in level]
+                for calculator, future in zip(level, futures):
+                    results[calculator.name] = future.result()
+            else:
+                for calculator in level:
+                    results[calculator.name] = run(calculator, {**context, **results})
+        
+        # 실행 계획 순서로 정렬하여 반환
+        return {name: results[name] for name in snapshot.plan if name in results}, report
+    
+    def calculate_stream(self, positions: Iterable[Dict[str, Any]],
+                         context: Dict[str, Any] = None,
+                         targets: Optional[List[str]] = None
+                         ) -> Tuple[Dict[str, Any], StreamValidationReport]:
+        """
+        포지션 이터레이터를 한 번 흘려보내며 계산 (메모리 일정)
+        
+        파서/저장소의 제너레이터처럼 전체 리스트를 만들기 어려운 입력용.
+        포지션마다 검증(PositionSchema.check) → 정규화 → 모든 누적기 갱신 후
+        바로 버리므로 메모리는 행 수와 무관하고, 마지막 행 이후 DAG 순서로
+        finalize()함. 결과는 같은 포지션의 calculate_all()과 동일함.
+        
+        누적기를 구현하지 않았거나 validate_input()을 오버라이드한 계산기
+        (supports_stream이 False)는 전체 포지션이 필요하므로 결과가 None.
+        
+        Args:
+            positions: 포지션 이터레이터 (제너레이터 가능, 한 번만 순회)
+            context: 초기 컨텍스트 (선택)
+            targets: 필요한 계산기 이름 리스트 (선택)
+        
+        Returns:
+            (계산 결과 딕셔너리, StreamValidationReport)
+        
+        사용법:
+            results, report = registry.calculate_stream(parser.iter_positions())
+        """
+        snapshot = self._snapshot
+        states, report = self._fold_stream(snapshot, positions, targets)
+        results = self._finalize_states(snapshot, states, report.valid_rows, context, targets)
+        return results, report
+    
+    def partial_states(self, positions: Iterable[Dict[str, Any]],
+                       targets: Optional[List[str]] = None,
+                       snapshot: Optional[RegistrySnapshot] = None
+                       ) -> Tuple[Dict[str, Any], StreamValidationReport]:
+        """
+        병합 가능한 누적 상태 (고객별 부분 집계)
+        
+        merge()를 구현한 계산기의 누적 상태만 모음. 여러 고객의 상태를
+        merge()로 합친 뒤 calculate_from_states()로 마무리하면 모든 포지션을
+        한 번에 계산한 것과 같은 결과가 나옴.
+        
+        Args:
+            positions: 포지션 이터레이터
+            targets: 계산기 이름 리스트 (None이면 on_demand가 아닌 전체)
+            snapshot: 사용할 스냅샷 (기본: 현재 스냅샷)
+        
+        Returns:
+            ({계산기 이름: 누적 상태}, StreamValidationReport)
+        """
+        snapshot = snapshot or self._snapshot
+        states, report = self._fold_stream(snapshot, positions, targets)
+        mergeable = {c.name for c in snapshot.execution_plan(targets) if c.supports_merge}
+        return {name: state for name, state in states.items() if name in mergeable}, report
+    
+    def calculate_from_states(self, states: Dict[str, Any], valid_rows: int,
+                              context: Dict[str, Any] = None,
+                              targets: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        누적 상태로 결과 계산 (포지션 없이 finalize만 DAG 순서로 실행)
+        
+        Args:
+            states: {계산기 이름: 누적 상태} (partial_states() 또는 병합 결과)
+            valid_rows: 상태에 반영된 포지션 수 (0이면 모든 결과가 None)
+            context: 초기 컨텍스트 (선택)
+            targets: 필요한 계산기 이름 리스트 (선택)
+        
+        Returns:
+            계산 결과 딕셔너리 (상태가 없는 포지션 계산기는 None)
+        """
+        return self._finalize_states(self._snapshot, states, valid_rows, context, targets)
+    
+    def _fold_stream(self, snapshot: RegistrySnapshot, positions: Iterable[Dict[str, Any]],
+                     targets: Optional[List[str]]) -> Tuple[Dict[str, Any], StreamValidationReport]:
+        """
+        포지션 스트림 1회 순회 (행별 검증 + 모든 누적기 갱신)
+        
+        Returns:
+            ({계산기 이름: 누적 상태}, StreamValidationReport)
+            누적 중 오류가 나면 상태는 빈 딕셔너리
+        """
+        selected = snapshot.execution_plan(targets)
+        check = snapshot.position_schema(targets).check
+        
+        fusable = [c for c in selected if c.uses_positions and c.supports_stream]
+        accumulators = [c.accumulate for c in fusable]
+        states = [c.create_state() for c in fusable]
+        slots = range(len(fusable))
+        
+        report = StreamValidationReport()
+        total = valid_rows = 0
+        failed = False
+        started = time.perf_counter()
+        for pos in positions:
+            total += 1
+            problems = check(pos)
+            if problems:
+                report.reject(total - 1, problems)
+                continue
+            valid_rows += 1
+            if failed:
+                continue
+            try:
+                row = normalize_position(pos)
+                for i in slots:
+                    states[i] = accumulators[i](states[i], row)
+            except Exception as e:
+                # 누적 오류 → 누적기 계산기는 None (검증 집계는 끝까지 진행)
+                logger.error(f"스트림 누적 오류 ({total}번째 행): {str(e)}", exc_info=True)
+                failed = True
+        report.total = total
+        report.valid_rows = valid_rows
+        
+        if self._observers and fusable:
+            self._notify(self.FUSED_PASS, time.perf_counter() - started,
+                         valid_rows, 'error' if failed else 'ok')
+        
+        if failed:
+            return {}, report
+        return {c.name: state for c, state in zip(fusable, states)}, report
+    
+    def _finalize_states(self, snapshot: RegistrySnapshot, states: Dict[str, Any],
+                         valid_rows: int, context: Optional[Dict[str, Any]],
+                         targets: Optional[List[str]]) -> Dict[str, Any]:
+        """
+        누적 상태를 DAG 순서로 마무리 계산
+        
+        Returns:
+            {계산기 이름: 결과} (실행 계획 순서)
+        """
+        if context is None:
+            context = {}
+        
+        observed = bool(self._observers)
+        results = {}
+        for calculator in snapshot.execution_plan(targets):
+            started = time.perf_counter()
+            status = 'ok'
+            result = None
+            try:
+                if not valid_rows:
+                    status = 'invalid'
+                elif not calculator.supports_stream:
+                    logger.warning(f"{calculator.name}: 스트리밍 계산 미지원 (전체 포지션 필요)")
+                    status = 'invalid'
+                elif calculator.name in states:
+                    result = calculator.format_result(
+                        calculator.finalize(states[calculator.name], {**context, **results}))
+                elif not calculator.uses_positions:
+                    result = calculator.format_result(
+                        calculator.calculate([], {**context, **results}))
+                else:
+                    status = 'error'
+                if result is None and status == 'ok':
+                    status = 'empty'
+            except Exception as e:
+                logger.error(f"{calculator.name} 계산 오류: {str(e)}", exc_info=True)
+                status = 'error'
+            
+            results[calculator.name] = result
+            if observed:
+                self._notify(calculator.name, time.perf_counter() - started, valid_rows, status)
+        
+        return {name: results[name] for name in snapshot.plan if name in results}
+    
+    def calculate_grouped(self, positions: List[Dict[str, Any]],
+                          group_by: List[str],
+                          context: Dict[str, Any] = None,
+                          targets: Optional[List[str]] = None) -> Dict[tuple, Dict[str, Any]]:
+        """
+        그룹별 KPI 계산 (해시 분할 단일 패스)
+        
+        포지션을 한 번 순회하면서 그룹 키별로 누적기 상태를 따로 유지하고,
+        순회가 끝나면 그룹마다 DAG 순서로 마무리 계산함.
+        레지스트리를 그룹 수만큼 반복 실행하지 않음.
+        
+        Args:
+            positions: 헤지 포지션 리스트
+            group_by: 그룹 기준 (예: ['currency'], ['currency', 'type', 'maturityBucket'])
+            context: 초기 컨텍스트 (선택, 모든 그룹에 공통 적용)
+            targets: 필요한 계산기 이름 리스트 (선택)
+        
+        Returns:
+            {그룹 키 tuple: {계산기 이름: 결과}} (그룹 첫 등장 순서)
+        
+        사용법:
+            by_currency = registry.calculate_grouped(positions, ['currency'])
+            by_currency[('USD',)]['hedgeRatio']
+        """
+        if context is None:
+            context = {}
+        
+        group_key = group_key_function(group_by)
+        
+        snapshot = self._snapshot
+        selected = snapshot.execution_plan(targets)
+        positions = self.validate_positions(positions, targets, snapshot).positions
+        valid = self._validate_all(selected, positions)
+        
+        fusable = [c for c in selected if valid[c.name] and c.supports_fused]
+        needs_rows = any(valid[c.name] and c.uses_positions and not c.supports_fused
+                         for c in selected)
+        
+        # 해시 분할 단일 패스: 그룹 키 → 누적 상태 / (필요 시) 그룹 포지션
+        accumulators = [c.accumulate for c in fusable]
+        slots = range(len(fusable))
+        group_states = {}
+        group_rows = {}
+        
+        for pos in positions:
+            key = group_key(pos)
+            states = group_states.get(key)
+            if states is None:
+                states = group_states[key] = [c.create_state() for c in fusable]
+                group_rows[key] = []
+            row = normalize_position(pos)
+            for i in slots:
+                states[i] = accumulators[i](states[i], row)
+            if needs_rows:
+                group_rows[key].append(pos)
+        
+        # 그룹별 마무리 계산 (DAG 순서)
+        grouped = {}
+        for key, states in group_states.items():
+            state_by_name = {c.name: state for c, state in zip(fusable, states)}
+            group_context = {**context, 'group': dict(zip(group_by, key))}
+            results = {}
+            for calculator in selected:
+                try:
+                    if not valid[calculator.name]:
+                        results[calculator.name] = None
+                        continue
+                    calc_context = {**group_context, **results}
+                    if calculator.name in state_by_name:
+                        result = calculator.finalize(state_by_name[calculator.name], calc_context)
+                    else:
+                        result = calculator.calculate(group_rows[key], calc_context)
+                    results[calculator.name] = calculator.format_result(result)
+                except Exception as e:
+                    logger.error(f"{calculator.name} 그룹 {key} 계산 오류: {str(e)}", exc_info=True)
+                    results[calculator.name] = None
+            grouped[key] = {name: results[name] for name in snapshot.plan if name in results}
+        
+        return grouped
+    
+    def _validate_all(self, calculators: List[Any], positions: Any) -> Dict[str, bool]:
+        """
+        계산기별 입력 검증 (공통 필드 검증을 통과한 포지션 대상)
+        
+        공통 검증은 validate_positions()에서 끝났으므로 validate_input()을
+        오버라이드한 계산기만 따로 호출함
+        
+        Returns:
+            {계산기 이름: 검증 통과 여부}
+        """
+        has_rows = len(positions) > 0
+        valid = {}
+        for calculator in calculators:
+            if not has_rows or not calculator.has_custom_validation:
+                valid[calculator.name] = has_rows
+                continue
+            try:
+                valid[calculator.name] = calculator.validate_input(positions)
+            except Exception as e:
+                logger.error(f"{calculator.name} 입력 검증 오류: {str(e)}", exc_info=True)
+                valid[calculator.name] = False
+        return valid
+    
+    def _run_fused_pass(self, calculators: List[Any],
+                        positions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        포지션을 한 번만 순회하며 모든 누적기 계산기의 상태를 갱신
+        
+        포지션마다 금액/환율 정규화는 1회만 수행되고 모든 계산기가 공유함.
+        누적 중 오류가 나면 빈 결과를 반환하여 개별 calculate()로 폴백함.
+        
+        Args:
+            calculators: supports_fused인 계산기 리스트
+            positions: 헤지 포지션 리스트
+        
+        Returns:
+            {계산기 이름: 누적 상태}
+        """
+        try:
+            names = [c.name for c in calculators]
+            accumulators = [c.accumulate for c in calculators]
+            states = [c.create_state() for c in calculators]
+            slots = range(len(calculators))
+            
+            for pos in positions:
+                row = normalize_position(pos)
+                for i in slots:
+                    states[i] = accumulators[i](states[i], row)
+            
+            return dict(zip(names, states))
+        
+        except Exception as e:
+            logger.error(f"단일 패스 누적 오류 (개별 계산으로 폴백): {str(e)}", exc_info=True)
+            return {}
     
     def calculate_one(self, name: str, positions: List[Dict[str, Any]], 
                      context: Dict[str, Any] = None) -> Any:
@@ -0,0 +1,272 @@
+"""
+KPI 결과 캐시
+동일한 포트폴리오 재요청 시 재계산하지 않도록 결과를 내용 해시로 저장.
+SQLite 파일 하나를 모든 gunicorn 워커 프로세스가 공유함.
+"""
+from typing import Dict, List, Any, Optional, Union
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 저장 값 형식 버전 (형식이 바뀌면 올려서 이전 항목과 키가 겹치지 않게 함)
+CACHE_FORMAT_VERSION = 2
+
+
+def canonical_hash(payload: Any) -> str:
+    """
+    JSON 직렬화 가능한 값의 정규화 SHA-256 해시
+
+    키 순서와 공백에 관계없이 같은 내용이면 같은 해시가 나옴
+
+    Args:
+        payload: 해시할 값
+
+    Returns:
+        16진수 해시 문자열
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'),
+                           ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def raw_digest(body: bytes) -> str:
+    """
+    요청 본문 바이트의 SHA-256 해시 (캐시 키용)
+
+    canonical_hash는 전체 값을 정렬·재직렬화하므로 대용량 포지션에서는 계산 자체보다
+    느릴 수 있음. 클라이언트가 보낸 본문은 받은 바이트를 그대로 해시함
+    (키 순서/공백이 다르면 다른 키가 되지만 같은 클라이언트의 재요청은 같은 바이트).
+
+    Args:
+        body: 요청 본문
+
+    Returns:
+        16진수 해시 문자열
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+class KPIResultCache:
+    """
+    워커 간 공유 KPI 결과 캐시 (SQLite, WAL 모드)
+
+    - 키: 포지션(또는 요청 본문 해시) + 목표 헤지비율 + 계산기 버전(+ 요청 계산기 목록)의 정규화 해시
+    - 만료: TTL (생성 후 ttl_seconds 경과 시)
+    - 제거: 항목 수/전체 크기 한도 초과 시 가장 오래 사용되지 않은 항목부터 (LRU)
+
+    사용법:
+        cache = KPIResultCache('server_data/cache/kpi_cache.sqlite3')
+        key = cache.make_key(positions, 70, registry.calculator_versions())
+        kpi = cache.get(key)
+        if kpi is None:
+            kpi = registry.calculate_all(positions)
+            cache.put(key, kpi)
+    """
+
+    def __init__(self, db_path, ttl_seconds: int = 3600,
+                 max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            db_path: SQLite 파일 경로
+            ttl_seconds: 항목 유효 시간 (초)
+            max_entries: 최대 항목 수
+            max_bytes: 저장 결과의 최대 전체 크기 (바이트)
+        """
+        self.db_path = str(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS kpi_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_kpi_cache_access ON kpi_cache(last_access)')
+
+    def _connect(self) -> sqlite3.Connection:
+        """스레드별 연결 (sqlite3 연결은 스레드/프로세스 간 공유 불가)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def make_key(positions: Union[List[Dict[str, Any]], str], target_hedge_ratio: float,
+                 calculator_versions: Dict[str, str],
+                 targets: Optional[List[str]] = None) -> str:
+        """
+        캐시 키 생성
+
+        Args:
+            positions: 포지션 리스트 (서버에서 만든 값, 정규화 해시) 또는
+                       raw_digest()로 만든 요청 본문 해시 문자열
+            target_hedge_ratio: 목표 헤지비율
+            calculator_versions: {계산기 이름: 버전}
+            targets: 요청 계산기 목록 (선택)
+
+        Returns:
+            캐시 키
+        """
+        return canonical_hash({
+            'format': CACHE_FORMAT_VERSION,
+            'positions': positions if isinstance(positions, str) else canonical_hash(positions),
+            'targetHedgeRatio': float(target_hedge_ratio),
+            'calculators': calculator_versions,
+            'targets': sorted(targets) if targets else None
+        })
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        캐시 조회 (만료 항목은 없는 것으로 처리)
+
+        Returns:
+            저장된 결과 또는 None
+        """
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                'SELECT value, created_at FROM kpi_cache WHERE key = ?', (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+
+            conn.execute('UPDATE kpi_cache SET last_access = ? WHERE key = ?', (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+        except sqlite3.Error as e:
+            logger.warning(f"KPI 캐시 조회 실패 (계산으로 진행): {e}")
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any):
+        """
+        결과 저장 후 한도 초과분 제거
+
+        Args:
+            key: 캐시 키
+            value: JSON 직렬화 가능한 결과
+        """
+        encoded = json.dumps(value, ensure_ascii=False)
+        size = len(encoded.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        try:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO kpi_cache (key, value, size, created_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, encoded, size, now, now)
+            )
+            self._evict(conn, now)
+
+        except sqlite3.Error as e:
+            logger.warning(f"KPI 캐시 저장 실패: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """만료 항목 삭제 후 항목 수/크기 한도를 넘으면 LRU 순으로 삭제"""
+        conn.execute('DELETE FROM kpi_cache WHERE created_at < ?', (now - self.ttl_seconds,))
+
+        count, total = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kpi_cache'
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        excess_bytes = total - self.max_bytes
+        excess_count = count - self.max_entries
+        freed_bytes = 0
+        victims = []
+        for key, size in conn.execute('SELECT key, size FROM kpi_cache ORDER BY last_access'):
+            if len(victims) >= excess_count and freed_bytes >= excess_bytes:
+                break
+            victims.append((key,))
+            freed_bytes += size
+
+        conn.executemany('DELETE FROM kpi_cache WHERE key = ?', victims)
+        logger.info(f"KPI 캐시 LRU 제거: {len(victims)}건")
+
+    def clear(self):
+        """전체 삭제"""
+        self._connect().execute('DELETE FROM kpi_cache')
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        캐시 통계 (적중/미스는 현재 프로세스 기준)
+
+        Returns:
+            {'entries', 'bytes', 'hits', 'misses'}
+        """
+        try:
+            count, total = self._connect().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM kpi_cache'
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"KPI 캐시 통계 조회 실패: {e}")
+            count, total = None, None
+        return {
+            'entries': count,
+            'bytes': total,
+            'hits': self.hits,
+            'misses': self.misses
+        }
+
+
+def cache_from_env(default_path, prefix: str = 'HEDGEFREEDOM_KPI_CACHE',
+                   default_ttl: int = 3600) -> Optional[KPIResultCache]:
+    """
+    환경변수 설정으로 캐시 생성
+
+    - {prefix}: 'off'면 비활성화
+    - {prefix}_PATH: SQLite 파일 경로
+    - {prefix}_TTL: 유효 시간 (초)
+    - {prefix}_MAX_ENTRIES / {prefix}_MAX_MB: 크기 한도
+
+    Args:
+        default_path: 기본 SQLite 파일 경로
+        prefix: 환경변수 이름 접두어 (기본: HEDGEFREEDOM_KPI_CACHE)
+        default_ttl: 기본 유효 시간 (초)
+
+    Returns:
+        KPIResultCache 또는 None (비활성화/생성 실패 시)
+    """
+    if os.getenv(prefix, 'on').lower() in ('off', '0', 'false'):
+        return None
+
+    try:
+        return KPIResultCache(
+            os.getenv(f'{prefix}_PATH', str(default_path)),
+            ttl_seconds=int(os.getenv(f'{prefix}_TTL', default_ttl)),
+            max_entries=int(os.getenv(f'{prefix}_MAX_ENTRIES', 10000)),
+            max_bytes=int(os.getenv(f'{prefix}_MAX_MB', 256)) * 1024 * 1024
+        )
+    except (sqlite3.Error, OSError, ValueError) as e:
+        logger.warning(f"{prefix} 캐시 비활성화 (초기화 실패): {e}")
+        return None
@@ -0,0 +1,271 @@
+"""
+헤지 권장 규칙표
+고객별/통화별 헤지 비율 기준(정책 구간)을 한 번 컴파일해 두고
+여러 포트폴리오의 헤지 비율 벡터를 배열 연산으로 한 번에 판정
+"""
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple
+import hashlib
+import json
+import math
+
+from .position_batch import NUMPY_AVAILABLE, np
+
+# 판정 코드 (ACTION_ORDER 순으로 시급함)
+OK = 0
+UNDER = 1
+OVER = 2
+URGENT = 3
+
+LABELS = {
+    OK: '적정',
+    UNDER: '추가헤지필요',
+    OVER: '과도헤지',
+    URGENT: '긴급헤지필요',
+}
+
+# 조치 목록 정렬 순서 (앞일수록 시급)
+ACTION_ORDER = (URGENT, UNDER, OVER)
+
+# 규칙이 없을 때의 기본 정책 구간 (RecommendationCalculator 기존 임계값)
+DEFAULT_MIN = 70.0
+DEFAULT_MAX = 90.0
+
+# 고객/통화 미지정 규칙의 키
+ANY = None
+
+
+class RecommendationRules:
+    """
+    헤지 권장 규칙표 (컴파일된 정책 구간)
+
+    규칙 1건: {'customerId': 'C001', 'currency': 'USD', 'min': 60, 'max': 85, 'urgentBelow': 30}
+        - customerId / currency는 생략 가능 (생략 = 전체)
+        - hedgeRatio < urgentBelow → 긴급헤지필요 (urgentBelow 생략 시 없음)
+        - hedgeRatio < min → 추가헤지필요
+        - hedgeRatio > max → 과도헤지
+        - 그 외 → 적정
+
+    적용 우선순위: 고객+통화 > 고객 > 통화 > 기본값
+
+    사용법:
+        rules = RecommendationRules.from_dict({
+            'default': {'min': 70, 'max': 90},
+            'rules': [{'currency': 'JPY', 'min': 50, 'max': 80}]
+        })
+        rules.label(65.0, currency='JPY')                    # '적정'
+        outcome = rules.evaluate(ratios, customers, currencies, exposures)
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]] = (),
+                 default_min: float = DEFAULT_MIN, default_max: float = DEFAULT_MAX,
+                 default_urgent: Optional[float] = None):
+        """
+        Args:
+            rules: 규칙 리스트
+            default_min: 기본 최소 헤지 비율 (%)
+            default_max: 기본 최대 헤지 비율 (%)
+            default_urgent: 기본 긴급 기준 (%) (None이면 없음)
+
+        Raises:
+            ValueError: min > max 이거나 값이 숫자가 아닌 규칙이 있는 경우
+        """
+        default = {'min': default_min, 'max': default_max, 'urgentBelow': default_urgent}
+        entries = [(ANY, ANY, default)] + [
+            (rule.get('customerId', ANY), rule.get('currency', ANY), rule) for rule in rules
+        ]
+
+        # (고객, 통화) → 규칙 위치 (같은 키는 뒤의 규칙이 우선)
+        self._index: Dict[Tuple[Any, Any], int] = {}
+        mins, maxs, urgents = [], [], []
+        for customer, currency, rule in entries:
+            low = float(rule.get('min', default_min))
+            high = float(rule.get('max', default_max))
+            urgent = rule.get('urgentBelow', default_urgent)
+            urgent = float(urgent) if urgent is not None else -math.inf
+            if low > high:
+                raise ValueError(f"규칙 min({low})이 max({high})보다 큽니다: {rule}")
+            self._index[(customer, currency)] = len(mins)
+            mins.append(low)
+            maxs.append(high)
+            urgents.append(urgent)
+
+        self._mins = mins
+        self._maxs = maxs
+        self._urgents = urgents
+        if NUMPY_AVAILABLE:
+            self._min_array = np.array(mins)
+            self._max_array = np.array(maxs)
+            self._urgent_array = np.array(urgents)
+
+        canonical = json.dumps([
+            [customer, currency, mins[i], maxs[i], urgents[i] if math.isfinite(urgents[i]) else None]
+            for (customer, currency), i in sorted(self._index.items(), key=lambda item: item[1])
+        ], ensure_ascii=False)
+        # 결과 캐시 키 구성용 (규칙이 바뀌면 달라짐)
+        self.fingerprint = hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:12]
+        self._customers = {customer for customer, _ in self._index if customer is not ANY}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> 'RecommendationRules':
+        """
+        저장/요청 형식 → 규칙표
+
+        Args:
+            data: {'default': {'min', 'max', 'urgentBelow'}, 'rules': [...]} (None이면 기본값)
+
+        Returns:
+            RecommendationRules
+        """
+        data = data or {}
+        default = data.get('default') or {}
+        return cls(
+            data.get('rules') or [],
+            default_min=float(default.get('min', DEFAULT_MIN)),
+            default_max=float(default.get('max', DEFAULT_MAX)),
+            default_urgent=default.get('urgentBelow')
+        )
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def cache_token(self, customer: Any = ANY) -> str:
+        """
+        결과 캐시 키용 토큰 (규칙표 지문 + 고객 전용 규칙이 있으면 고객 ID)
+
+        같은 포지션이라도 고객 전용 규칙이 있는 고객은 결과가 달라지므로 키를 분리함
+        """
+        if customer in self._customers:
+            return f"{self.fingerprint}:{customer}"
+        return self.fingerprint
+
+    def rule_index(self, customer: Any = ANY, currency: Any = ANY) -> int:
+        """
+        (고객, 통화)에 적용할 규칙 위치 (고객+통화 > 고객 > 통화 > 전체 규칙 > 기본값)
+
+        고객/통화 없는 규칙은 (ANY, ANY) 위치의 기본값을 덮어쓰므로 마지막에 조회함
+        """
+        index = self._index
+        for key in ((customer, currency), (customer, ANY), (ANY, currency), (ANY, ANY)):
+            position = index.get(key)
+            if position is not None:
+                return position
+        return 0
+
+    def band(self, ratio: float, customer: Any = ANY, currency: Any = ANY) -> int:
+        """
+        헤지 비율 1건 판정 (numpy 없이 동작)
+
+        Returns:
+            판정 코드 (OK, UNDER, OVER, URGENT)
+        """
+        i = self.rule_index(customer, currency)
+        if ratio < self._urgents[i]:
+            return URGENT
+        if ratio < self._mins[i]:
+            return UNDER
+        if ratio > self._maxs[i]:
+            return OVER
+        return OK
+
+    def label(self, ratio: float, customer: Any = ANY, currency: Any = ANY) -> str:
+        """헤지 비율 1건의 권장사항 문자열"""
+        return LABELS[self.band(ratio, customer, currency)]
+
+    def evaluate(self, ratios: Sequence[float],
+                 customers: Optional[Sequence[Any]] = None,
+                 currencies: Optional[Sequence[Any]] = None,
+                 exposures: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+        """
+        여러 포트폴리오 일괄 판정 (배열 연산)
+
+        규칙 조회는 서로 다른 (고객, 통화) 조합마다 1회만 하고,
+        판정과 부족/초과 금액은 전체 벡터에 한 번에 계산함
+
+        Args:
+            ratios: 헤지 비율 (%) 배열
+            customers: 고객 ID 배열 (선택)
+            currencies: 통화 배열 (선택)
+            exposures: 총 노출액 배열 (선택, 있으면 목표 구간까지의 금액 계산)
+
+        Returns:
+            {'codes': 판정 코드 배열, 'min': 배열, 'max': 배열,
+             'shortfall': min까지 추가 헤지 금액 배열, 'excess': max 초과 헤지 금액 배열}
+        """
+        if not NUMPY_AVAILABLE:
+            raise ImportError("일괄 판정은 numpy가 필요합니다 (pip install numpy)")
+
+        ratios = np.nan_to_num(np.asarray(ratios, dtype=np.float64))
+        size = len(ratios)
+        customers = list(customers) if customers is not None else [ANY] * size
+        currencies = list(currencies) if currencies is not None else [ANY] * size
+
+        # (고객, 통화) 조합별 규칙 위치 → 행별 규칙 위치
+        lookup = {}
+        rule_rows = np.empty(size, dtype=np.intp)
+        for row, key in enumerate(zip(customers, currencies)):
+            position = lookup.get(key)
+            if position is None:
+                position = lookup[key] = self.rule_index(*key)
+            rule_rows[row] = position
+
+        low = self._min_array[rule_rows]
+        high = self._max_array[rule_rows]
+        urgent = self._urgent_array[rule_rows]
+
+        codes = np.select(
+            [ratios < urgent, ratios < low, ratios > high],
+            [URGENT, UNDER, OVER],
+            default=OK
+        )
+
+        if exposures is None:
+            exposures = np.zeros(size)
+        exposures = np.nan_to_num(np.asarray(exposures, dtype=np.float64))
+        shortfall = np.clip(low - ratios, 0.0, None) / 100.0 * exposures
+        excess = np.clip(ratios - high, 0.0, None) / 100.0 * exposures
+
+        return {'codes': codes, 'min': low, 'max': high,
+                'shortfall': shortfall, 'excess': excess}
+
+    def screen(self, portfolios: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        조치가 필요한 포트폴리오 목록 (긴급 → 추가헤지 → 과도헤지, 같은 판정은 금액 큰 순)
+
+        Args:
+            portfolios: [{'customerId', 'currency'(선택), 'hedgeRatio', 'exposure'(선택)}, ...]
+
+        Returns:
+            [{'customerId', 'currency', 'hedgeRatio', 'recommendation', 'min', 'max',
+              'shortfall', 'excess'}, ...] (적정인 포트폴리오 제외)
+        """
+        if not portfolios:
+            return []
+
+        outcome = self.evaluate(
+            [p.get('hedgeRatio') or 0.0 for p in portfolios],
+            [p.get('customerId', ANY) for p in portfolios],
+            [p.get('currency', ANY) for p in portfolios],
+            [p.get('exposure') or 0.0 for p in portfolios]
+        )
+        codes = outcome['codes']
+
+        # 시급도 → 금액(부족/초과 중 큰 쪽) 내림차순
+        severity = np.zeros(len(codes), dtype=np.intp)
+        for rank, code in enumerate(ACTION_ORDER):
+            severity[codes == code] = len(ACTION_ORDER) - rank
+        amount = np.maximum(outcome['shortfall'], outcome['excess'])
+        order = np.lexsort((-amount, -severity))
+
+        return [
+            {
+                'customerId': portfolios[i].get('customerId'),
+                'currency': portfolios[i].get('currency'),
+                'hedgeRatio': round(float(portfolios[i].get('hedgeRatio') or 0.0), 2),
+                'recommendation': LABELS[int(codes[i])],
+                'min': float(outcome['min'][i]),
+                'max': float(outcome['max'][i]),
+                'shortfall': round(float(outcome['shortfall'][i]), 2),
+                'excess': round(float(outcome['excess'][i]), 2)
+            }
+            for i in order if codes[i] != OK
+        ]
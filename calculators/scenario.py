@@ -0,0 +1,282 @@
+"""
+환율 충격 시나리오 계산
+통화별 환율 변동(%) 행렬을 받아 모든 시나리오의 원화 노출액, 헤지 금액,
+미헤지 금액, 미헤지 손익을 한 번의 행렬 연산으로 계산
+"""
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Union
+
+from .position_batch import PositionBatch, NUMPY_AVAILABLE, np
+from .validation import PositionSchema, ValidationReport
+
+# 거래 구분별 환율 상승 시 손익 부호 (수출: 외화 수취 → 이익, 수입: 외화 지급 → 손실)
+TRADE_TYPE_SIGNS = {
+    '수출': 1.0,
+    '수입': -1.0,
+}
+
+# 병렬 이동 시나리오(모든 통화 동시 충격)의 통화 라벨
+ALL_CURRENCIES = 'ALL'
+
+# 시나리오 계산에 필요한 포지션 필드 (ExcelParser 출력 형식)
+SCENARIO_SCHEMA = PositionSchema(required_fields=['currency', 'krwAmount'],
+                                 numeric_fields=['krwAmount'])
+
+
+class ShockSet:
+    """
+    환율 충격 시나리오 묶음
+
+    - names: 시나리오 이름 리스트
+    - currencies: 충격 행렬의 열 통화 리스트
+    - matrix: (시나리오 수 × 통화 수) 환율 변동률 배열 (0.05 = +5%, 원화 약세)
+
+    사용법:
+        shocks = ShockSet.grid(['USD', 'EUR'], max_pct=10, step_pct=1)
+        shocks = shocks + ShockSet.from_moves([
+            {'name': '2022-09', 'shocks': {'USD': 7.5, 'EUR': 4.2}}
+        ])
+    """
+
+    def __init__(self, names: List[str], currencies: List[str], matrix: Any):
+        if not NUMPY_AVAILABLE:
+            raise ImportError("시나리오 계산은 numpy가 필요합니다 (pip install numpy)")
+
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(len(names), len(currencies))
+        self.names = list(names)
+        self.currencies = list(currencies)
+        self.matrix = matrix
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def grid(cls, currencies: Sequence[str], max_pct: float = 10.0, step_pct: float = 1.0,
+             parallel: bool = True) -> 'ShockSet':
+        """
+        통화별 ±step..max% 격자 시나리오
+
+        통화마다 단독 충격 시나리오를 만들고, parallel이면 모든 통화가 같이
+        움직이는 시나리오(통화 라벨 'ALL')도 추가함.
+        예: 5개 통화, ±1..10% → (5 + 1) × 20 = 120개 시나리오
+
+        Args:
+            currencies: 통화 리스트
+            max_pct: 최대 변동률 (%)
+            step_pct: 변동률 간격 (%)
+            parallel: 전체 통화 동시 충격 시나리오 포함 여부
+
+        Returns:
+            ShockSet
+        """
+        if step_pct <= 0 or max_pct <= 0:
+            raise ValueError("max_pct와 step_pct는 0보다 커야 합니다")
+
+        currencies = list(dict.fromkeys(currencies))
+        if not currencies:
+            raise ValueError("충격을 줄 통화가 없습니다")
+        steps = np.arange(1, int(round(max_pct / step_pct)) + 1) * step_pct
+        levels = np.concatenate([-steps[::-1], steps]) / 100.0
+
+        targets = [[i] for i in range(len(currencies))]
+        labels = list(currencies)
+        if parallel and len(currencies) > 1:
+            targets.append(list(range(len(currencies))))
+            labels.append(ALL_CURRENCIES)
+
+        # (대상 수 × 충격 수) 블록을 한 번에 채움
+        matrix = np.zeros((len(targets), len(levels), len(currencies)))
+        for row, columns in enumerate(targets):
+            matrix[row][:, columns] = levels[:, None]
+
+        names = [f"{label} {level * 100:+g}%" for label in labels for level in levels]
+        return cls(names, currencies, matrix.reshape(-1, len(currencies)))
+
+    @classmethod
+    def from_moves(cls, moves: Iterable[Dict[str, Any]]) -> 'ShockSet':
+        """
+        이름 있는 시나리오 목록 (예: 과거 환율 변동)
+
+        Args:
+            moves: [{'name': '2022-09', 'shocks': {'USD': 7.5, 'EUR': -2.0}}, ...]
+                   변동률 단위는 %
+
+        Returns:
+            ShockSet
+        """
+        moves = list(moves)
+        currencies = list(dict.fromkeys(
+            currency for move in moves for currency in (move.get('shocks') or {})
+        ))
+        column = {currency: i for i, currency in enumerate(currencies)}
+
+        matrix = np.zeros((len(moves), len(currencies)))
+        names = []
+        for row, move in enumerate(moves):
+            names.append(str(move.get('name') or f"scenario {row + 1}"))
+            for currency, pct in (move.get('shocks') or {}).items():
+                matrix[row, column[currency]] = float(pct) / 100.0
+
+        return cls(names, currencies, matrix)
+
+    def __add__(self, other: 'ShockSet') -> 'ShockSet':
+        """두 시나리오 묶음 이어붙이기 (통화 열은 합집합)"""
+        currencies = list(dict.fromkeys(self.currencies + other.currencies))
+        return ShockSet(
+            self.names + other.names,
+            currencies,
+            np.vstack([self.aligned(currencies), other.aligned(currencies)])
+        )
+
+    def aligned(self, currencies: Sequence[str]) -> Any:
+        """
+        주어진 통화 순서로 열을 맞춘 충격 행렬 (없는 통화는 0% 변동)
+
+        Args:
+            currencies: 통화 리스트
+
+        Returns:
+            (시나리오 수 × len(currencies)) 배열
+        """
+        column = {currency: i for i, currency in enumerate(self.currencies)}
+        source = np.array([column.get(currency, -1) for currency in currencies], dtype=np.intp)
+        aligned = np.zeros((len(self), len(currencies)))
+        present = source >= 0
+        aligned[:, present] = self.matrix[:, source[present]]
+        return aligned
+
+
+def currency_totals(batch: PositionBatch) -> Dict[str, Any]:
+    """
+    통화별 원화 노출액 / 헤지 금액 / 부호 있는 미헤지 금액 (포지션 1회 집계)
+
+    Args:
+        batch: PositionBatch (krwAmount, hedge_weight, currency, type 컬럼 사용)
+
+    Returns:
+        {'currencies': [...], 'exposure': 배열, 'hedged': 배열, 'signedOpen': 배열}
+    """
+    currencies = batch.categories['currency']
+    codes = batch.codes['currency']
+
+    def lookup(field, table, default):
+        values = np.array([table.get(category, default) for category in batch.categories[field]],
+                          dtype=np.float64)
+        return values[batch.codes[field]] if len(values) else np.zeros(len(batch))
+
+    krw = np.nan_to_num(batch.krw_amount)
+    weight = batch.hedge_weight
+    sign = lookup('type', TRADE_TYPE_SIGNS, 1.0)
+
+    count = len(currencies)
+    return {
+        'currencies': list(currencies),
+        'exposure': np.bincount(codes, weights=krw, minlength=count),
+        'hedged': np.bincount(codes, weights=krw * weight, minlength=count),
+        'signedOpen': np.bincount(codes, weights=krw * (1.0 - weight) * sign, minlength=count)
+    }
+
+
+def run_fx_scenarios(positions: Union[List[Dict[str, Any]], PositionBatch],
+                     shocks: ShockSet) -> Dict[str, Any]:
+    """
+    모든 시나리오를 한 번의 행렬 연산으로 계산
+
+    포지션은 통화별 합계로 한 번만 줄이고, (시나리오 × 통화) 충격 행렬과
+    곱하여 시나리오별 값을 구함. 시나리오마다 calculate_all을 다시 돌리지 않음.
+
+    - totalExposure / hedgedAmount: 충격 환율로 환산한 원화 금액
+    - unhedgedGap: totalExposure - hedgedAmount
+    - hedgeRatio: hedgedAmount / totalExposure × 100
+    - pnl: 미헤지분의 환율 변동 손익 (수출 +, 수입 -)
+
+    Args:
+        positions: 포지션 리스트 (ExcelParser 형식) 또는 PositionBatch
+        shocks: ShockSet
+
+    Returns:
+        {'currencies': [...], 'base': {...}, 'scenarios': [{...}, ...], 'validation': {...}}
+    """
+    if isinstance(positions, PositionBatch):
+        report = ValidationReport(positions, [], len(positions))
+        batch = positions
+    else:
+        report = SCENARIO_SCHEMA.validate(positions)
+        batch = PositionBatch.from_positions(report.positions)
+
+    totals = currency_totals(batch)
+    currencies = totals['currencies']
+    shock_matrix = shocks.aligned(currencies)
+    factors = 1.0 + shock_matrix
+
+    exposure = factors @ totals['exposure']
+    hedged = factors @ totals['hedged']
+    pnl = shock_matrix @ totals['signedOpen']
+    gap = exposure - hedged
+    ratio = np.divide(hedged * 100.0, exposure, out=np.zeros_like(exposure), where=exposure > 0)
+
+    base_exposure = float(totals['exposure'].sum())
+    base_hedged = float(totals['hedged'].sum())
+
+    # 0이 아닌 충격만 표시
+    shock_rows = [
+        {currency: round(float(value) * 100, 4) for currency, value in zip(currencies, row) if value}
+        for row in shock_matrix
+    ]
+
+    return {
+        'currencies': currencies,
+        'base': {
+            'totalExposure': round(base_exposure, 2),
+            'hedgedAmount': round(base_hedged, 2),
+            'unhedgedGap': round(base_exposure - base_hedged, 2),
+            'hedgeRatio': round(base_hedged / base_exposure * 100, 2) if base_exposure > 0 else 0.0
+        },
+        'scenarios': [
+            {
+                'name': name,
+                'shocks': shock_row,
+                'totalExposure': round(float(e), 2),
+                'hedgedAmount': round(float(h), 2),
+                'unhedgedGap': round(float(g), 2),
+                'hedgeRatio': round(float(r), 2),
+                'pnl': round(float(p), 2)
+            }
+            for name, shock_row, e, h, g, r, p in zip(
+                shocks.names, shock_rows, exposure, hedged, gap, ratio, pnl)
+        ],
+        'validation': report.to_dict()
+    }
+
+
+def shock_set_from_request(request: Dict[str, Any],
+                           default_currencies: Optional[Sequence[str]] = None) -> ShockSet:
+    """
+    API 요청의 grid / scenarios 설정으로 ShockSet 생성
+
+    Args:
+        request: {
+            'grid': {'currencies': ['USD'], 'maxPct': 10, 'stepPct': 1, 'parallel': true},
+            'scenarios': [{'name': '2022-09', 'shocks': {'USD': 7.5}}]
+        }
+        default_currencies: grid에 통화가 없을 때 사용할 통화 (보통 포트폴리오 통화)
+
+    Returns:
+        ShockSet (둘 다 없으면 포트폴리오 통화 ±1..10% 격자)
+    """
+    grid = request.get('grid')
+    moves = request.get('scenarios')
+    if grid is None and not moves:
+        grid = {}
+
+    shock_set = None
+    if grid is not None:
+        shock_set = ShockSet.grid(
+            grid.get('currencies') or list(default_currencies or []),
+            max_pct=float(grid.get('maxPct', 10)),
+            step_pct=float(grid.get('stepPct', 1)),
+            parallel=bool(grid.get('parallel', True))
+        )
+    if moves:
+        named = ShockSet.from_moves(moves)
+        shock_set = named if shock_set is None else shock_set + named
+    return shock_set
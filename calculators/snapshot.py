@@ -0,0 +1,178 @@
+"""
+계산기 레지스트리 스냅샷
+등록된 계산기 구성과 미리 계산한 실행 계획을 담는 불변 객체.
+등록/해제 시 새 스냅샷을 만들어 통째로 교체하므로 요청 처리 중인 스레드는
+시작할 때 잡은 스냅샷을 끝까지 그대로 사용함.
+"""
+from typing import Dict, List, Any, Optional, Tuple
+from types import MappingProxyType
+import heapq
+
+from .validation import PositionSchema
+
+
+def _build_plan(calculators: Dict[str, Any]) -> Tuple[List[str], List[List[str]]]:
+    """
+    dependencies로 DAG를 구성하여 실행 계획 계산
+
+    - plan: 위상 정렬 순서 (같은 조건이면 priority 낮은 순)
+    - levels: 서로 의존하지 않아 동시에 실행 가능한 계산기 묶음
+
+    등록되지 않은 의존성은 외부 context로 주어진다고 보고 무시함.
+
+    Raises:
+        ValueError: 순환 의존성이 있는 경우
+    """
+    indegree = {}
+    dependents = {name: [] for name in calculators}
+    for name, calculator in calculators.items():
+        deps = [d for d in calculator.dependencies if d in calculators]
+        indegree[name] = len(deps)
+        for dep in deps:
+            dependents[dep].append(name)
+
+    # Kahn 알고리즘 (준비된 계산기 중 priority가 낮은 것부터)
+    ready = [(c.priority, name) for name, c in calculators.items() if indegree[name] == 0]
+    heapq.heapify(ready)
+
+    plan = []
+    depth = {name: 0 for name in calculators}
+    while ready:
+        _, name = heapq.heappop(ready)
+        plan.append(name)
+        for child in dependents[name]:
+            depth[child] = max(depth[child], depth[name] + 1)
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                heapq.heappush(ready, (calculators[child].priority, child))
+
+    if len(plan) != len(calculators):
+        cycle = sorted(name for name, d in indegree.items() if d > 0)
+        raise ValueError(f"계산기 순환 의존성 감지: {cycle}")
+
+    levels = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+    for name in plan:
+        levels[depth[name]].append(name)
+
+    return plan, levels
+
+
+class RegistrySnapshot:
+    """
+    불변 레지스트리 스냅샷
+
+    - calculators: {이름: 계산기} (읽기 전용)
+    - plan: 위상 정렬된 실행 순서 (tuple)
+    - levels: 단계별 계산기 tuple (같은 단계는 동시 실행 가능)
+
+    targets별 실행 단계와 입력 검증기는 처음 요청될 때 만들어 스냅샷 안에
+    캐시하므로 calculate_all 호출마다 정렬/필터링을 반복하지 않음.
+    """
+
+    __slots__ = ('calculators', 'plan', 'levels', '_selections', '_schemas')
+
+    def __init__(self, calculators: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            calculators: {이름: 계산기}
+
+        Raises:
+            ValueError: 순환 의존성이 있는 경우
+        """
+        calculators = dict(calculators or {})
+        plan, levels = _build_plan(calculators)
+
+        self.calculators = MappingProxyType(calculators)
+        self.plan = tuple(plan)
+        self.levels = tuple(tuple(calculators[name] for name in level) for level in levels)
+        self._selections = {}
+        self._schemas = {}
+
+    def with_calculator(self, calculator) -> 'RegistrySnapshot':
+        """계산기를 추가(같은 이름이면 교체)한 새 스냅샷"""
+        return RegistrySnapshot({**self.calculators, calculator.name: calculator})
+
+    def without(self, name: str) -> 'RegistrySnapshot':
+        """계산기를 뺀 새 스냅샷"""
+        return RegistrySnapshot({key: c for key, c in self.calculators.items() if key != name})
+
+    @property
+    def level_names(self) -> List[List[str]]:
+        """단계별 계산기 이름"""
+        return [[calculator.name for calculator in level] for level in self.levels]
+
+    def get(self, name: str):
+        return self.calculators.get(name)
+
+    def names(self, include_on_demand: bool = True) -> List[str]:
+        if include_on_demand:
+            return list(self.calculators)
+        return [name for name, c in self.calculators.items() if not c.on_demand]
+
+    def resolve_targets(self, targets: Optional[List[str]]) -> frozenset:
+        """
+        요청한 계산기와 그 조상(의존성)만 모은 이름 집합
+
+        Args:
+            targets: 계산기 이름 리스트 (None이면 on_demand가 아닌 전체)
+
+        Returns:
+            실행할 계산기 이름 집합
+
+        Raises:
+            ValueError: 등록되지 않은 계산기를 요청한 경우
+        """
+        if targets is None:
+            return frozenset(self.names(include_on_demand=False))
+
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            calculator = self.calculators.get(name)
+            if calculator is None:
+                if name in targets:
+                    raise ValueError(f"계산기를 찾을 수 없음: {name}")
+                continue
+            needed.add(name)
+            stack.extend(calculator.dependencies)
+
+        return frozenset(needed)
+
+    def select_levels(self, targets: Optional[List[str]]) -> Tuple[Tuple[Any, ...], ...]:
+        """
+        실행 단계 중 targets에 필요한 계산기만 남긴 단계 (targets별 캐시)
+
+        Returns:
+            ((계산기, ...), ...) (빈 단계 제외)
+        """
+        key = None if targets is None else tuple(sorted(set(targets)))
+        levels = self._selections.get(key)
+        if levels is None:
+            needed = self.resolve_targets(targets)
+            levels = tuple(
+                level for level in (
+                    tuple(c for c in full_level if c.name in needed) for full_level in self.levels
+                ) if level
+            )
+            self._selections[key] = levels
+        return levels
+
+    def execution_plan(self, targets: Optional[List[str]] = None) -> List[Any]:
+        """DAG 실행 순서대로 정렬된 계산기 리스트"""
+        return [calculator for level in self.select_levels(targets) for calculator in level]
+
+    def position_schema(self, targets: Optional[List[str]] = None) -> PositionSchema:
+        """실행 대상 계산기들의 선언 필드로 만든 검증기 (targets별 캐시)"""
+        key = None if targets is None else tuple(sorted(set(targets)))
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = PositionSchema.from_calculators(self.execution_plan(targets))
+            self._schemas[key] = schema
+        return schema
+
+    def calculator_versions(self, targets: Optional[List[str]] = None) -> Dict[str, str]:
+        """실행 대상 계산기별 버전"""
+        return {calculator.name: calculator.version for calculator in self.execution_plan(targets)}
@@ -0,0 +1,198 @@
+"""
+헤지 거래 제안
+통화별·만기별 미헤지 금액과 목표 헤지 비율로 목표를 허용 오차 안에서 달성하는
+최소 개수의 선물환/옵션 거래를 계산
+"""
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+from datetime import date
+
+from .maturity import _as_date, _settlement_ordinal
+from .normalize import parse_amount, hedge_weight
+
+# 제안 로직 버전 (결과가 바뀌는 수정 시 올려서 캐시된 제안을 무효화)
+SUGGESTION_VERSION = '1'
+
+# 이 일수 이내 만기는 선물환, 초과는 옵션
+FORWARD_MAX_DAYS = 90
+
+# 목표 헤지 비율 허용 오차 (%p) - 이 범위 안이면 거래를 제안하지 않음
+DEFAULT_TOLERANCE = 2.0
+
+FORWARD = 'forward'
+OPTION = 'option'
+
+PRODUCTS = {
+    FORWARD: {'type': '선물환', 'product': 'FX Forward (선물환)'},
+    OPTION: {'type': '옵션', 'product': 'FX Option (옵션)'},
+}
+
+
+def _priority(days: Optional[int]) -> str:
+    """만기까지 남은 일수 → 우선순위 (만기 미상은 low)"""
+    if days is None:
+        return 'low'
+    if days <= 30:
+        return 'high'
+    if days <= FORWARD_MAX_DAYS:
+        return 'medium'
+    return 'low'
+
+
+def maturity_buckets(positions: Iterable[Dict[str, Any]],
+                     reference_date: Any = None) -> List[Dict[str, Any]]:
+    """
+    통화 × 결제월 × 상품(선물환/옵션) 구간별 노출/헤지 금액
+
+    Args:
+        positions: 포지션 리스트 (currency, amount, krwAmount, hedgeStatus,
+                   settlementDate 또는 daysUntil)
+        reference_date: 기준일 (기본: 오늘)
+
+    Returns:
+        [{'currency', 'month', 'instrument', 'firstDate', 'days', 'exposure', 'hedged',
+          'gap', 'foreignGap', 'count'}, ...] (금액은 원화, foreignGap은 외화,
+          firstDate/days는 구간의 첫 미헤지 결제일 기준)
+    """
+    reference = _as_date(reference_date)
+    today = reference.toordinal()
+
+    buckets: Dict[Tuple[str, Optional[str], str], Dict[str, Any]] = {}
+    for position in positions:
+        if not isinstance(position, dict):
+            continue
+        krw = parse_amount(position.get('krwAmount', 0))
+        if krw <= 0:
+            continue
+        weight = hedge_weight(position)
+        foreign = parse_amount(position.get('amount', 0))
+
+        ordinal = _settlement_ordinal(position, reference)
+        days = ordinal - today if ordinal is not None else None
+        instrument = OPTION if days is not None and days > FORWARD_MAX_DAYS else FORWARD
+        month = date.fromordinal(ordinal).strftime('%Y-%m') if ordinal is not None else None
+
+        key = (position.get('currency') or 'USD', month, instrument)
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = {
+                'currency': key[0], 'month': month, 'instrument': instrument,
+                'first': None, 'exposure': 0.0, 'hedged': 0.0,
+                'foreignExposure': 0.0, 'foreignHedged': 0.0, 'count': 0
+            }
+        # 구간의 첫 미헤지 결제일 (헤지 거래 만기 기준)
+        if weight < 1.0 and ordinal is not None and (bucket['first'] is None or ordinal < bucket['first']):
+            bucket['first'] = ordinal
+
+        bucket['exposure'] += krw
+        bucket['hedged'] += krw * weight
+        bucket['foreignExposure'] += foreign
+        bucket['foreignHedged'] += foreign * weight
+        bucket['count'] += 1
+
+    result = []
+    for bucket in buckets.values():
+        first = bucket.pop('first')
+        foreign_exposure = bucket.pop('foreignExposure')
+        foreign_hedged = bucket.pop('foreignHedged')
+        bucket['firstDate'] = date.fromordinal(first).isoformat() if first is not None else None
+        bucket['days'] = first - today if first is not None else None
+        bucket['gap'] = bucket['exposure'] - bucket['hedged']
+        bucket['foreignGap'] = foreign_exposure - foreign_hedged
+        result.append(bucket)
+    return result
+
+
+def suggest_hedges(positions: Iterable[Dict[str, Any]],
+                   target_ratio: float = 70.0,
+                   tolerance: float = DEFAULT_TOLERANCE,
+                   min_trade_krw: float = 0.0,
+                   reference_date: Any = None) -> Dict[str, Any]:
+    """
+    목표 헤지 비율 달성용 최소 거래 제안 (통화별)
+
+    통화마다 부족분 = 목표% × 노출액 - 헤지액을 구하고, 미헤지 금액이 큰
+    만기 구간부터 채움 (각 거래 크기의 상한이 구간 미헤지 금액이므로 큰 구간부터
+    채우는 것이 거래 수를 최소화함). 남은 부족분이 허용 오차(tolerance %p × 노출액)
+    이하가 되면 멈춤. 만기 FORWARD_MAX_DAYS일 이내 구간은 선물환, 그 외는 옵션.
+
+    Args:
+        positions: 포지션 리스트 (ExcelParser 형식)
+        target_ratio: 목표 헤지 비율 (%)
+        tolerance: 허용 오차 (%p)
+        min_trade_krw: 이보다 작은 거래는 제안하지 않음 (원화)
+        reference_date: 기준일 (기본: 오늘)
+
+    Returns:
+        {'suggestions': [...], 'currencies': {통화: {...}}, 'targetRatio', 'tolerance'}
+    """
+    target = float(target_ratio) / 100.0
+    slack = float(tolerance) / 100.0
+
+    by_currency: Dict[str, List[Dict[str, Any]]] = {}
+    for bucket in maturity_buckets(positions, reference_date):
+        by_currency.setdefault(bucket['currency'], []).append(bucket)
+
+    suggestions = []
+    currencies = {}
+    for currency, buckets in by_currency.items():
+        exposure = sum(b['exposure'] for b in buckets)
+        hedged = sum(b['hedged'] for b in buckets)
+        need = target * exposure - hedged
+        allowance = slack * exposure
+        added = 0.0
+
+        if need > allowance:
+            # 미헤지 금액 큰 구간부터 (같으면 만기 빠른 순)
+            candidates = sorted(
+                (b for b in buckets if b['gap'] > 0),
+                key=lambda b: (-b['gap'], b['days'] if b['days'] is not None else float('inf'))
+            )
+            remaining = need
+            for bucket in candidates:
+                if remaining <= allowance:
+                    break
+                amount_krw = min(bucket['gap'], remaining)
+                if amount_krw < min_trade_krw:
+                    continue
+                share = amount_krw / bucket['gap']
+                product = PRODUCTS[bucket['instrument']]
+                foreign_gap = bucket['foreignGap']
+                suggestions.append({
+                    'type': product['type'],
+                    'product': product['product'],
+                    'instrument': bucket['instrument'],
+                    'currency': currency,
+                    'amount': round(foreign_gap * share, 2),
+                    'krwAmount': round(amount_krw, 2),
+                    'rate': round(bucket['gap'] / foreign_gap, 4) if foreign_gap else None,
+                    'maturityMonth': bucket['month'],
+                    'targetDate': bucket['firstDate'],
+                    'daysUntil': bucket['days'],
+                    'priority': _priority(bucket['days']),
+                    'reason': f"{currency} 헤지 비율 {target_ratio:g}% 달성 "
+                              f"({bucket['month'] or '만기 미상'} 미헤지 {bucket['gap']:,.0f}원)"
+                })
+                remaining -= amount_krw
+                added += amount_krw
+
+        currencies[currency] = {
+            'exposure': round(exposure, 2),
+            'hedged': round(hedged, 2),
+            'ratio': round(hedged / exposure * 100, 2) if exposure else 0.0,
+            'afterRatio': round((hedged + added) / exposure * 100, 2) if exposure else 0.0,
+            'shortfall': round(max(need, 0.0), 2),
+            'buckets': len(buckets)
+        }
+
+    # 화면 표시 순서: 우선순위 → 금액 큰 순
+    rank = {'high': 0, 'medium': 1, 'low': 2}
+    suggestions.sort(key=lambda s: (rank[s['priority']], -s['krwAmount']))
+    for i, suggestion in enumerate(suggestions, 1):
+        suggestion['id'] = i
+
+    return {
+        'suggestions': suggestions,
+        'currencies': currencies,
+        'targetRatio': float(target_ratio),
+        'tolerance': float(tolerance)
+    }
@@ -3,6 +3,8 @@
 """
 from typing import Dict, List, Any
 from .base_calculator import BaseCalculator
+from .normalize import NormalizedPosition
+from .position_batch import PositionBatch
 
 class TotalExposureCalculator(BaseCalculator):
     """
@@ -25,22 +27,25 @@ class TotalExposureCalculator(BaseCalculator):
         Returns:
             총 노출액 (float)
         """
-        total = 0.0
-        
-        for pos in positions:
-            amount = pos.get('amount', 0)
-            
-            # 문자열인 경우 숫자로 변환
-            if isinstance(amount, str):
-                amount = amount.replace(',', '').replace('$', '').strip()
-                try:
-                    amount = float(amount)
-                except (ValueError, AttributeError):
-                    amount = 0
-            
-            total += float(amount)
-        
-        return total
+        return self.fold(positions, context)
+    
+    def create_state(self) -> float:
+        return 0.0
+    
+    def accumulate(self, state: float, row: NormalizedPosition) -> float:
+        return state + row.amount
+    
+    def retract(self, state: float, row: NormalizedPosition) -> float:
+        return state - row.amount
+    
+    def merge(self, state: float, other: float) -> float:
+        return state + other
+    
+    def finalize(self, state: float, context: Dict[str, Any]) -> float:
+        return state
+    
+    def calculate_batch(self, batch: PositionBatch, context: Dict[str, Any]) -> float:
+        return float(batch.amount.sum())
     
     def format_result(self, result: float) -> float:
         """결과를 소수점 2자리로 포맷"""
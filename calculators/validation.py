@@ -0,0 +1,212 @@
+"""
+포지션 입력 검증
+계산기들이 선언한 필드(required_fields, numeric_fields)로 검증기를 한 번 만들어
+요청당 포지션을 한 번만 검사하고, 통과한 포지션을 모든 계산기가 공유함
+"""
+from typing import Dict, List, Any, Iterable, Optional
+import math
+
+# 응답에 포함할 최대 오류 건수 (전체 건수는 errorCount로 제공)
+MAX_REPORTED_ERRORS = 100
+
+
+def _is_number(value: Any) -> bool:
+    """parse_amount/parse_rate와 같은 규칙(쉼표, 달러 기호 제거)으로 숫자 변환 가능한지"""
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, str):
+        value = value.replace(',', '').replace('$', '').strip()
+    try:
+        return math.isfinite(float(value))
+    except (ValueError, TypeError):
+        return False
+
+
+class ValidationReport:
+    """
+    검증 결과
+
+    - positions: 검증을 통과한 포지션 리스트 (원본 딕셔너리, 순서 유지)
+    - errors: [{'index': 원본 순번, 'field': 필드명, 'error': 메시지}, ...]
+    - total: 입력 포지션 수
+    """
+
+    __slots__ = ('positions', 'errors', 'total')
+
+    def __init__(self, positions: List[Dict[str, Any]], errors: List[Dict[str, Any]], total: int):
+        self.positions = positions
+        self.errors = errors
+        self.total = total
+
+    @property
+    def invalid_rows(self) -> int:
+        """오류가 있는 포지션 수"""
+        return len({error['index'] for error in self.errors})
+
+    def to_dict(self, max_errors: int = MAX_REPORTED_ERRORS) -> Dict[str, Any]:
+        """
+        API 응답용 딕셔너리
+
+        Returns:
+            {'totalRows', 'validRows', 'invalidRows', 'errorCount', 'errors'}
+        """
+        return {
+            'totalRows': self.total,
+            'validRows': len(self.positions),
+            'invalidRows': self.invalid_rows,
+            'errorCount': len(self.errors),
+            'errors': self.errors[:max_errors]
+        }
+
+
+class StreamValidationReport:
+    """
+    스트리밍 검증 결과 (통과 포지션은 보관하지 않음)
+
+    - total / valid_rows / invalid_rows: 행 수
+    - error_count: 전체 오류 건수
+    - errors: 앞쪽 max_errors건만 보관하여 메모리를 입력 크기와 무관하게 유지
+    """
+
+    __slots__ = ('total', 'valid_rows', 'invalid_rows', 'error_count', 'errors', 'max_errors')
+
+    def __init__(self, max_errors: int = MAX_REPORTED_ERRORS):
+        self.total = 0
+        self.valid_rows = 0
+        self.invalid_rows = 0
+        self.error_count = 0
+        self.errors = []
+        self.max_errors = max_errors
+
+    def reject(self, index: int, problems: List[Dict[str, Any]]):
+        """
+        오류 행 기록
+
+        Args:
+            index: 원본 순번
+            problems: PositionSchema.check() 결과
+        """
+        self.invalid_rows += 1
+        self.error_count += len(problems)
+        room = self.max_errors - len(self.errors)
+        if room > 0:
+            self.errors.extend({'index': index, **problem} for problem in problems[:room])
+
+    def to_dict(self, max_errors: int = MAX_REPORTED_ERRORS) -> Dict[str, Any]:
+        """
+        API 응답용 딕셔너리 (ValidationReport.to_dict()와 같은 형태)
+
+        Returns:
+            {'totalRows', 'validRows', 'invalidRows', 'errorCount', 'errors'}
+        """
+        return {
+            'totalRows': self.total,
+            'validRows': self.valid_rows,
+            'invalidRows': self.invalid_rows,
+            'errorCount': self.error_count,
+            'errors': self.errors[:max_errors]
+        }
+
+
+class PositionSchema:
+    """
+    계산기 선언 필드로 만든 포지션 검증기
+
+    실행 계획이 바뀔 때만 다시 만들고(레지스트리가 캐시), 요청마다 validate()로
+    포지션을 한 번만 순회함.
+
+    사용법:
+        schema = PositionSchema.from_calculators(registry.execution_plan())
+        report = schema.validate(positions)
+        report.positions  # 검증 통과 포지션
+        report.errors     # 행별 오류
+    """
+
+    def __init__(self, required_fields: Iterable[str] = (), numeric_fields: Iterable[str] = ()):
+        """
+        Args:
+            required_fields: 반드시 있어야 하는 필드
+            numeric_fields: 값이 있으면 숫자여야 하는 필드 (필수 필드면 값도 필수)
+        """
+        self.required_fields = tuple(dict.fromkeys(required_fields))
+        self.numeric_fields = tuple(dict.fromkeys(numeric_fields))
+
+        # 필드별 검사 목록 (필드 순서대로 1회 구성)
+        required = set(self.required_fields)
+        checks = []
+        for field in dict.fromkeys(self.required_fields + self.numeric_fields):
+            checks.append((field, field in required, field in self.numeric_fields))
+        self._checks = tuple(checks)
+
+    @classmethod
+    def from_calculators(cls, calculators: Iterable[Any]) -> 'PositionSchema':
+        """
+        포지션을 읽는 계산기들의 선언 필드를 합쳐 검증기 생성
+
+        Args:
+            calculators: 계산기 인스턴스 리스트
+
+        Returns:
+            PositionSchema
+        """
+        required_fields = []
+        numeric_fields = []
+        for calculator in calculators:
+            if not calculator.uses_positions:
+                continue
+            required_fields.extend(calculator.required_fields)
+            numeric_fields.extend(calculator.numeric_fields)
+        return cls(required_fields, numeric_fields)
+
+    def check(self, position: Any) -> List[Dict[str, Any]]:
+        """
+        포지션 1건 검사
+
+        Returns:
+            [{'field', 'error'}, ...] (문제 없으면 빈 리스트)
+        """
+        if not isinstance(position, dict):
+            return [{'field': None, 'error': '포지션이 객체가 아닙니다'}]
+
+        problems = []
+        for field, required, numeric in self._checks:
+            if field not in position:
+                if required:
+                    problems.append({'field': field, 'error': f'{field} 필드가 없습니다'})
+                continue
+
+            value = position[field]
+            if numeric:
+                if value is None or value == '':
+                    if required:
+                        problems.append({'field': field, 'error': f'{field} 값이 비어 있습니다'})
+                elif not _is_number(value):
+                    problems.append({'field': field, 'error': f'{field} 값이 숫자가 아닙니다: {value!r}'})
+
+        return problems
+
+    def validate(self, positions: Optional[Iterable[Any]]) -> ValidationReport:
+        """
+        포지션 전체 검사 (1회 순회)
+
+        Args:
+            positions: 포지션 리스트
+
+        Returns:
+            ValidationReport (오류가 있는 행은 positions에서 제외됨)
+        """
+        cleaned = []
+        errors = []
+        total = 0
+        check = self.check
+
+        for index, position in enumerate(positions or []):
+            total += 1
+            problems = check(position)
+            if problems:
+                for problem in problems:
+                    errors.append({'index': index, **problem})
+            else:
+                cleaned.append(position)
+
+        return ValidationReport(cleaned, errors, total)
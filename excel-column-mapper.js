@@ -122,6 +122,58 @@ function autoDetectColumns(headers) {
     return mapping;
 }
 
+/**
+ * 저장된 컬럼 매핑 템플릿 조회 (헤더 지문이 같은 이전 업로드의 매핑)
+ * 서버에 없거나 요청이 실패하면 null (자동 인식으로 진행)
+ */
+async function fetchColumnTemplate(headers) {
+    try {
+        const response = await fetch(`${window.location.origin}/api/column-mapping/match`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                customerId: 'default',  // 나중에 로그인 시스템으로 교체
+                headers: headers
+            })
+        });
+        if (!response.ok) return null;
+        
+        const result = await response.json();
+        if (result.data && result.data.mapping) {
+            console.log('🧩 저장된 컬럼 매핑 사용:', result.data.signature, result.data.mapping);
+            return result.data.mapping;
+        }
+    } catch (error) {
+        console.warn('⚠️ 컬럼 매핑 템플릿 조회 실패 (자동 인식으로 진행):', error.message);
+    }
+    return null;
+}
+
+/**
+ * 사용자가 확인한 컬럼 매핑을 템플릿으로 저장 (다음 업로드부터 자동 적용)
+ */
+async function saveColumnTemplate(headers, mapping) {
+    try {
+        const response = await fetch(`${window.location.origin}/api/column-mapping/templates`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                customerId: 'default',  // 나중에 로그인 시스템으로 교체
+                headers: headers,
+                mapping: mapping
+            })
+        });
+        if (response.ok) {
+            const result = await response.json();
+            console.log('🧩 컬럼 매핑 템플릿 저장:', result.signature);
+        } else {
+            console.warn('⚠️ 컬럼 매핑 템플릿 저장 실패:', response.status);
+        }
+    } catch (error) {
+        console.warn('⚠️ 컬럼 매핑 템플릿 저장 실패:', error.message);
+    }
+}
+
 /**
  * 데이터 마스킹 (개인정보 보호)
  */
@@ -266,6 +318,9 @@ async function processExcelWithMapping() {
         return;
     }
     
+    // 확인한 매핑을 템플릿으로 저장 (백그라운드 - 실패해도 처리 계속)
+    saveColumnTemplate(excelHeaders, mapping);
+    
     try {
         // 기존 컬럼 매핑 모달 닫기
         document.getElementById('columnMappingModal').classList.remove('active');
@@ -638,8 +693,8 @@ async function uploadExcelFile() {
         
         uploadBtn.textContent = '자동 분석 중...';
         
-        // 2단계: 컬럼 자동 인식
-        const mapping = autoDetectColumns(excelHeaders);
+        // 2단계: 저장된 컬럼 매핑 템플릿 → 없으면 컬럼 자동 인식
+        const mapping = await fetchColumnTemplate(excelHeaders) || autoDetectColumns(excelHeaders);
         
         // 필수 항목 체크
         const requiredFields = ['id', 'counterparty', 'currency', 'amount', 'settlementDate'];
@@ -4,89 +4,680 @@ HedgeFreedom - powered by hedgeOn Engine
 """
 
 import openpyxl
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from itertools import chain, islice
+import codecs
+import csv
+import io
+import multiprocessing
+import os
+import queue
 import re
 import hashlib
 import random
+import threading
+
+# 파서 버전 (파싱/익명화 결과가 바뀌는 수정 시 올려서 업로드 파싱 캐시를 무효화)
+PARSER_VERSION = '2'
+
+# 파일 시그니처 (앞부분 바이트)
+XLSX_SIGNATURE = b'PK\x03\x04'                      # ZIP (xlsx)
+XLS_SIGNATURE = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'    # OLE2 (구형 xls)
+
+# CSV 인코딩/구분자 감지에 사용할 앞부분 크기
+CSV_SNIFF_BYTES = 64 * 1024
+CSV_DELIMITERS = ',\t;|'
+
+
+def detect_file_format(head):
+    """
+    파일 앞부분 바이트로 형식 판별 (확장자는 보지 않음)
+    
+    Args:
+        head: 파일 앞부분 바이트 (8바이트 이상)
+    
+    Returns:
+        str: 'xlsx', 'xls', 'csv' (ZIP/OLE2가 아니면 텍스트로 간주)
+    """
+    if head.startswith(XLSX_SIGNATURE):
+        return 'xlsx'
+    if head.startswith(XLS_SIGNATURE):
+        return 'xls'
+    return 'csv'
+
+
+def sniff_encoding(sample):
+    """
+    텍스트 인코딩 감지 (BOM → UTF-8 → CP949 순)
+    
+    Args:
+        sample: 파일 앞부분 바이트
+    
+    Returns:
+        str: 인코딩 이름
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'  # 엑셀 '유니코드 텍스트' 저장 형식
+    try:
+        # 샘플 끝에서 잘린 멀티바이트 문자는 오류로 보지 않음
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'cp949'  # 국내 ERP(더존 등) 기본 내보내기 인코딩
+
+
+def sniff_delimiter(text):
+    """
+    CSV 구분자 감지 (쉼표, 탭, 세미콜론, 파이프)
+    
+    Args:
+        text: 파일 앞부분 텍스트
+    
+    Returns:
+        str: 구분자
+    """
+    try:
+        return csv.Sniffer().sniff(text, delimiters=CSV_DELIMITERS).delimiter
+    except csv.Error:
+        # 판별 실패 시 첫 줄에 가장 많이 나온 구분자 (없으면 쉼표)
+        first_line = text.split('\n', 1)[0]
+        counts = {d: first_line.count(d) for d in CSV_DELIMITERS}
+        best = max(counts, key=counts.get)
+        return best if counts[best] else ','
+
+
+class OpenpyxlReader:
+    """xlsx 리더 (openpyxl)"""
+    
+    format = 'xlsx'
+    
+    def __init__(self, source, read_only=True):
+        """
+        Args:
+            source: 파일 경로 또는 바이너리 스트림
+            read_only: True면 읽기 전용(스트리밍) 모드로 열기
+        """
+        self.workbook = openpyxl.load_workbook(source, read_only=read_only, data_only=True)
+    
+    @property
+    def active_sheet(self):
+        return self.workbook.active.title
+    
+    def sheet_names(self):
+        return [worksheet.title for worksheet in self.workbook.worksheets]
+    
+    def iter_rows(self, sheet=None, max_row=None):
+        """행별 값 튜플 이터레이터 (1행부터)"""
+        worksheet = self.workbook[sheet] if sheet else self.workbook.active
+        return worksheet.iter_rows(max_row=max_row, values_only=True)
+    
+    def close(self):
+        self.workbook.close()
+
+
+class CsvReader:
+    """
+    CSV/TSV 리더 (스트리밍)
+    
+    인코딩(UTF-8/CP949/UTF-16)과 구분자(쉼표/탭 등)를 앞부분 샘플로 감지하고
+    한 줄씩 읽음. 시트는 하나('CSV')로 취급하며 빈 칸은 None으로 돌려줌
+    (엑셀 빈 셀과 동일).
+    """
+    
+    format = 'csv'
+    active_sheet = 'CSV'
+    
+    def __init__(self, source, encoding=None, delimiter=None):
+        """
+        Args:
+            source: 파일 경로 또는 바이너리 스트림 (seek 가능해야 함)
+            encoding: 인코딩 (기본: 자동 감지)
+            delimiter: 구분자 (기본: 자동 감지)
+        """
+        self._owns_stream = isinstance(source, (str, os.PathLike))
+        self._stream = open(source, 'rb') if self._owns_stream else source
+        
+        self._stream.seek(0)
+        sample = self._stream.read(CSV_SNIFF_BYTES)
+        self.encoding = encoding or sniff_encoding(sample)
+        self.delimiter = delimiter or sniff_delimiter(
+            sample.decode(self.encoding, errors='ignore'))
+    
+    def sheet_names(self):
+        return [self.active_sheet]
+    
+    def iter_rows(self, sheet=None, max_row=None):
+        """행별 값 튜플 제너레이터 (1행부터)"""
+        if sheet not in (None, self.active_sheet):
+            raise KeyError(f"시트를 찾을 수 없음: {sheet}")
+        
+        self._stream.seek(0)
+        text = io.TextIOWrapper(self._stream, encoding=self.encoding, newline='')
+        try:
+            for row_idx, row in enumerate(csv.reader(text, delimiter=self.delimiter), start=1):
+                if max_row is not None and row_idx > max_row:
+                    break
+                yield tuple(value if value != '' else None for value in row)
+        finally:
+            # 래퍼가 원본 스트림을 닫지 않도록 분리
+            text.detach()
+    
+    def close(self):
+        if self._owns_stream:
+            self._stream.close()
+
+
+def open_reader(source, read_only=True):
+    """
+    파일 시그니처로 리더 선택
+    
+    Args:
+        source: 파일 경로 또는 바이너리 스트림
+        read_only: xlsx 읽기 전용 모드 여부
+    
+    Returns:
+        OpenpyxlReader 또는 CsvReader
+    
+    Raises:
+        ValueError: 구형 xls 파일인 경우 (openpyxl 미지원)
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            head = f.read(8)
+    else:
+        source.seek(0)
+        head = source.read(8)
+        source.seek(0)
+    
+    file_format = detect_file_format(head)
+    if file_format == 'xls':
+        raise ValueError("구형 엑셀(.xls) 형식은 지원하지 않습니다. .xlsx 또는 CSV로 저장 후 업로드해주세요.")
+    if file_format == 'xlsx':
+        return OpenpyxlReader(source, read_only=read_only)
+    return CsvReader(source)
+
+
+# 지원 날짜 형식 (우선순위 순) → (빠른 파싱용 정규식, 연/월/일 그룹 번호)
+DATE_FORMATS = {
+    '%Y-%m-%d': (re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})'), (1, 2, 3)),
+    '%Y/%m/%d': (re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})'), (1, 2, 3)),
+    '%Y.%m.%d': (re.compile(r'(\d{4})\.(\d{1,2})\.(\d{1,2})'), (1, 2, 3)),
+    '%m/%d/%Y': (re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})'), (3, 1, 2)),
+    '%d/%m/%Y': (re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})'), (3, 2, 1)),
+}
+
+# 결제일 컬럼 날짜 형식 추정에 사용할 표본 행 수
+DATE_SAMPLE_ROWS = 200
+
+
+def _match_date(value, date_format):
+    """정규식으로 날짜 문자열 파싱 (형식이 다르거나 없는 날짜면 None, 예외 없음)"""
+    pattern, (year, month, day) = DATE_FORMATS[date_format]
+    match = pattern.fullmatch(value)
+    if match is None:
+        return None
+    try:
+        return datetime(int(match.group(year)), int(match.group(month)), int(match.group(day)))
+    except ValueError:
+        return None
+
+
+def infer_date_format(values):
+    """
+    날짜 컬럼 표본으로 문자열 날짜 형식 추정
+    
+    표본을 가장 많이 파싱하는 형식을 고름 (같으면 DATE_FORMATS 우선순위).
+    예: '03/04/2026'만 있으면 %m/%d/%Y, '25/04/2026'이 섞여 있으면 %d/%m/%Y
+    
+    Args:
+        values: 날짜 컬럼 값 이터러블 (문자열이 아닌 값은 무시)
+    
+    Returns:
+        str: DATE_FORMATS 형식 문자열 (문자열 날짜가 없으면 None)
+    """
+    counts = dict.fromkeys(DATE_FORMATS, 0)
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        for date_format in DATE_FORMATS:
+            if _match_date(value, date_format) is not None:
+                counts[date_format] += 1
+    
+    best = max(counts, key=counts.get)
+    return best if counts[best] else None
+
+
+# 파서 컬럼 매핑 필드
+MAPPING_FIELDS = ('trade_id', 'counterparty', 'currency', 'amount',
+                  'settlement_date', 'trade_type', 'hedge_status')
+
+# 브라우저 컬럼 매퍼(excel-column-mapper.js) 필드 이름 → 파서 필드 이름
+BROWSER_FIELD_NAMES = {
+    'id': 'trade_id',
+    'counterparty': 'counterparty',
+    'currency': 'currency',
+    'amount': 'amount',
+    'settlementDate': 'settlement_date',
+    'type': 'trade_type',
+    'hedgeStatus': 'hedge_status'
+}
+
+
+def normalize_headers(values):
+    """
+    헤더 셀 정규화 (공백 제거, 소문자, 뒤쪽 빈 셀 제거)
+    
+    Args:
+        values: 헤더 행 값 시퀀스
+    
+    Returns:
+        list: 정규화된 헤더 문자열 리스트
+    """
+    headers = [re.sub(r'\s+', '', str(value)).lower() if value is not None else ''
+               for value in values]
+    while headers and not headers[-1]:
+        headers.pop()
+    return headers
+
+
+def header_signature(values):
+    """
+    헤더 행 지문 (정규화된 헤더 셀 텍스트의 해시, 컬럼 매핑 템플릿 키)
+    
+    Args:
+        values: 헤더 행 값 시퀀스
+    
+    Returns:
+        str: 16자리 16진수 문자열
+    """
+    joined = '\x1f'.join(normalize_headers(values))
+    return hashlib.sha1(joined.encode('utf-8')).hexdigest()[:16]
+
+
+def mapping_from_browser(mapping):
+    """
+    브라우저 매핑(필드 → 0부터 시작하는 컬럼 번호) → 파서 매핑(1부터)
+    
+    Raises:
+        ValueError: 컬럼 번호가 0 이상의 정수가 아닌 경우
+    """
+    result = dict.fromkeys(MAPPING_FIELDS)
+    for field, column in (mapping or {}).items():
+        if field not in BROWSER_FIELD_NAMES or column is None or column == '':
+            continue
+        column = int(column)
+        if column < 0:
+            raise ValueError(f"잘못된 컬럼 번호: {field}={column}")
+        result[BROWSER_FIELD_NAMES[field]] = column + 1
+    return result
+
+
+def mapping_to_browser(mapping):
+    """파서 매핑(1부터) → 브라우저 매핑(0부터, 없으면 None)"""
+    return {
+        browser_field: (mapping.get(field) - 1 if mapping.get(field) else None)
+        for browser_field, field in BROWSER_FIELD_NAMES.items()
+    }
+
+
+def _sheet_worker(source, sheet, options, batch_size, outbox):
+    """
+    시트 워커 프로세스: 시트 1개를 batch_size건씩 파싱해 outbox로 보냄
+    
+    outbox는 길이가 SHEET_QUEUE_DEPTH인 큐라서 부모가 아직 앞 시트를 읽는 중이면
+    배치를 쌓아 두지 않고 기다림. 보내는 항목: ('batch', 거래 배치) ...
+    → ('end', 시트 컬럼 매핑 정보) 또는 ('error', 메시지)
+    """
+    try:
+        if isinstance(source, bytes):
+            parser = ExcelParser(file_stream=io.BytesIO(source), **options)
+        else:
+            parser = ExcelParser(file_path=source, **options)
+        
+        with parser:
+            batch = []
+            for trade in parser.iter_trade_data(sheet):
+                trade['sheet'] = sheet
+                batch.append(trade)
+                if len(batch) >= batch_size:
+                    outbox.put(('batch', batch))
+                    batch = []
+            if batch:
+                outbox.put(('batch', batch))
+            outbox.put(('end', parser.sheet_mappings[sheet]))
+    except Exception as e:
+        outbox.put(('error', f'{type(e).__name__}: {e}'))
 
 
 class ExcelParser:
-    """엑셀 파일 파싱 클래스"""
+    """
+    엑셀 파일 파싱 클래스
+    
+    헤더 탐색/컬럼 매핑/행 파싱은 리더(OpenpyxlReader, CsvReader)가 돌려주는
+    행 값 튜플 위에서 동작하므로 xlsx와 CSV/TSV를 같은 방식으로 처리함
+    """
     
-    def __init__(self, file_path=None, file_stream=None):
+    # 헤더 행 탐색 범위 (최대 행 수)
+    HEADER_SEARCH_ROWS = 10
+    
+    def __init__(self, file_path=None, file_stream=None, read_only=True, reader=None,
+                 column_templates=None, reference_date=None):
         """
         Args:
             file_path: 파일 경로
             file_stream: 파일 스트림 (BytesIO 객체)
+            read_only: True면 읽기 전용(스트리밍) 모드로 열기 - 행을 순서대로 읽으며
+                       셀 객체를 만들지 않아 대용량 파일도 메모리가 일정함
+            reader: 사용할 리더 (기본: 파일 시그니처로 xlsx/CSV 리더 자동 선택)
+            column_templates: {헤더 지문: 컬럼 매핑} - 지문이 같은 헤더 행은 키워드
+                              탐색 없이 저장된 매핑을 그대로 사용
+            reference_date: daysUntil 기준일 (date/datetime, 기본: 오늘) - 파일 전체에 같은 기준일 적용
+        
+        Raises:
+            ValueError: 파일이 없거나 지원하지 않는 형식(구형 xls)인 경우
         """
-        if file_path:
-            self.workbook = openpyxl.load_workbook(file_path, data_only=True)
-        elif file_stream:
-            self.workbook = openpyxl.load_workbook(file_stream, data_only=True)
-        else:
+        source = file_path or file_stream
+        if not source:
             raise ValueError("파일 경로 또는 파일 스트림이 필요합니다.")
         
-        self.sheet = self.workbook.active
+        self._source = source
+        self.reader = reader or open_reader(source, read_only=read_only)
+        self.column_templates = dict(column_templates or {})
+        
+        reference = reference_date or date.today()
+        self.reference_date = datetime(reference.year, reference.month, reference.day)
+        self._reference_ordinal = self.reference_date.toordinal()
+        
+        # 시트별 헤더/컬럼 매핑 결과 (iter_trade_data 시작 시 기록)
+        self.sheet_mappings = {}
+        
+        # iter_trade_batches가 다 읽은 시트 요약 (parse_workbook의 'sheets'와 같은 형식)
+        self.sheet_summaries = []
+    
+    @property
+    def file_format(self):
+        """원본 형식 ('xlsx' 또는 'csv')"""
+        return self.reader.format
+    
+    def __enter__(self):
+        return self
     
-    def parse_trade_data(self):
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def close(self):
+        """파일 닫기 (읽기 전용 모드는 파일 핸들을 계속 잡고 있으므로 사용 후 호출)"""
+        self.reader.close()
+    
+    def parse_trade_data(self, sheet=None):
         """
         거래 데이터 파싱
         
         예상 엑셀 구조:
         | 거래ID | 거래처명 | 통화 | 외화금액 | 결제예정일 | 수출/수입 | 헤지상태 |
         
+        Args:
+            sheet: 시트 이름 (기본: 활성 시트)
+        
         Returns:
             list: 거래 데이터 리스트
         """
-        trades = []
+        return list(self.iter_trade_data(sheet))
+    
+    def parse_workbook(self, max_workers=None):
+        """
+        거래 데이터가 있는 모든 시트 파싱 (전체 거래 리스트)
+        
+        iter_trade_batches의 배치를 모두 모은 결과로, 시트 순서대로 합치고 각 거래에
+        출처 시트 이름('sheet')을 추가함. 대용량 파일은 iter_trade_batches나
+        stream_upload로 배치 단위로 처리할 것.
+        
+        Args:
+            max_workers: 시트 워커 프로세스 수 (기본: SHEET_WORKERS, 1이면 순차 파싱)
+        
+        Returns:
+            dict: {'trades': [...], 'sheets': [{'name': 시트 이름, 'trades': 거래 건수,
+                   'headerRow', 'signature', 'headers', 'mapping', 'mappingSource'}, ...]}
+        """
+        trades = [trade for batch in self.iter_trade_batches(max_workers=max_workers)
+                  for trade in batch]
+        return {'trades': trades, 'sheets': self.sheet_summaries}
+    
+    def iter_trade_batches(self, batch_size=None, max_workers=None):
+        """
+        거래가 있는 모든 시트를 순서대로 읽어 batch_size건씩 묶어 반환하는 제너레이터
+        
+        parse_workbook과 같은 거래(출처 시트 'sheet' 포함)를 같은 순서로 내며
+        메모리는 파일 크기가 아니라 배치 크기에 비례함. 시트를 다 읽을 때마다
+        요약을 self.sheet_summaries에 추가함.
+        
+        거래 시트가 여러 개면 시트마다 워커 프로세스(최대 max_workers개 동시)가
+        배치 단위로 파싱하고, 여기서는 시트 순서대로 받아서 내보냄. 따라서 전체 시간은
+        시트 시간의 합이 아니라 가장 큰 시트 정도가 되고, 뒤 시트의 워커는 큐가
+        차면 기다리므로 메모리는 배치 크기 × 워커 수 × (SHEET_QUEUE_DEPTH + 1)건 이내.
+        배치 경계와 결과는 순차 파싱과 같음.
+        
+        Args:
+            batch_size: 배치당 거래 수 (기본: UPLOAD_BATCH_SIZE)
+            max_workers: 시트 워커 프로세스 수 (기본: SHEET_WORKERS, 1이면 순차 파싱)
+        
+        Yields:
+            list: 거래 데이터 배치 (마지막 배치는 batch_size보다 작을 수 있음)
+        """
+        batch_size = batch_size or UPLOAD_BATCH_SIZE
+        max_workers = max_workers or SHEET_WORKERS
+        self.sheet_summaries = []
+        names = self.trade_sheets()
+        if len(names) > 1 and max_workers > 1:
+            yield from self._iter_parallel_batches(names, batch_size, max_workers)
+            return
+        
+        batch = []
+        for name in names:
+            count = 0
+            for trade in self.iter_trade_data(name):
+                trade['sheet'] = name
+                batch.append(trade)
+                count += 1
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            self.sheet_summaries.append({'name': name, 'trades': count, **self.sheet_mappings[name]})
+        
+        if batch:
+            yield batch
+    
+    def _iter_parallel_batches(self, names, batch_size, max_workers):
+        """
+        시트별 워커 프로세스의 배치를 시트 순서대로 다시 batch_size건씩 묶어 반환
+        
+        앞 시트를 다 받으면 그 워커를 정리하고 다음 시트의 워커를 시작함.
+        제너레이터가 중간에 닫히거나 실패하면 남은 워커를 종료함.
+        """
+        source = self._source_for_worker()
+        options = {'column_templates': self.column_templates, 'reference_date': self.reference_date}
+        workers = {}
+        
+        def start(index):
+            outbox = multiprocessing.Queue(maxsize=SHEET_QUEUE_DEPTH)
+            worker = multiprocessing.Process(
+                target=_sheet_worker, args=(source, names[index], options, batch_size, outbox),
+                name=f'sheet-worker-{index + 1}', daemon=True)
+            worker.start()
+            workers[index] = (worker, outbox)
+        
+        try:
+            for index in range(min(max_workers, len(names))):
+                start(index)
+            
+            batch = []
+            for index, name in enumerate(names):
+                worker, outbox = workers[index]
+                count = 0
+                while True:
+                    try:
+                        kind, payload = outbox.get(timeout=1)
+                    except queue.Empty:
+                        if not worker.is_alive() and outbox.empty():
+                            raise RuntimeError(f"시트 '{name}' 워커가 비정상 종료됨 "
+                                               f"(exitcode={worker.exitcode})")
+                        continue
+                    if kind == 'end':
+                        self.sheet_mappings[name] = payload
+                        break
+                    if kind == 'error':
+                        raise ValueError(f"시트 '{name}' 파싱 실패: {payload}")
+                    count += len(payload)
+                    batch.extend(payload)
+                    while len(batch) >= batch_size:
+                        yield batch[:batch_size]
+                        batch = batch[batch_size:]
+                
+                worker.join()
+                del workers[index]
+                self.sheet_summaries.append({'name': name, 'trades': count, **self.sheet_mappings[name]})
+                if index + max_workers < len(names):
+                    start(index + max_workers)
+            
+            if batch:
+                yield batch
+        finally:
+            for worker, _ in workers.values():
+                worker.terminate()
+                worker.join()
+    
+    def trade_sheets(self):
+        """
+        거래 데이터가 있는 시트 이름 목록 (앞쪽 HEADER_SEARCH_ROWS행 안에 헤더가 있는 시트)
+        
+        헤더가 있는 시트가 하나도 없으면 활성 시트만 반환
+        (헤더 없는 파일은 1행을 헤더로 간주하는 parse_trade_data 동작과 동일)
+        """
+        names = []
+        for name in self.reader.sheet_names():
+            head = self.reader.iter_rows(name, max_row=self.HEADER_SEARCH_ROWS)
+            _, header_row, _ = self._find_header_row(enumerate(head, start=1))
+            head.close()
+            if header_row is not None:
+                names.append(name)
+        
+        return names or [self.reader.active_sheet]
+    
+    def iter_trade_data(self, sheet=None):
+        """
+        거래 데이터를 한 행씩 파싱하여 반환하는 제너레이터
+        
+        시트를 위에서부터 한 번만 순회함 (헤더 탐색용으로 앞쪽 최대
+        HEADER_SEARCH_ROWS행만 버퍼에 보관). 전체 거래 리스트를 만들지 않으므로
+        대용량 파일은 이 메서드로 받아서 배치 단위로 처리하면 됨.
+        
+        Args:
+            sheet: 시트 이름 (기본: 활성 시트)
+        
+        Yields:
+            dict: 거래 데이터 (parse_trade_data 항목과 같은 형식)
+        """
+        rows = enumerate(self.reader.iter_rows(sheet), start=1)
         
-        # 헤더 찾기 (첫 번째 행 또는 'ID', '거래처', '통화' 등 포함된 행)
-        header_row = self._find_header_row()
+        # 헤더 찾기 (저장된 템플릿과 지문이 같은 행 또는 'ID', '거래처', '통화' 등 포함된 행)
+        head, header_row, template = self._find_header_row(rows)
         
         if header_row is None:
             # 헤더를 못 찾으면 1행을 헤더로 간주
             header_row = 1
         
-        # 컬럼 매핑
-        column_mapping = self._map_columns(header_row)
+        header_values = head[header_row - 1][1] if len(head) >= header_row else ()
+        
+        # 컬럼 매핑 (템플릿이 있으면 탐색 생략)
+        if template is not None:
+            column_mapping = {**dict.fromkeys(MAPPING_FIELDS), **template}
+        else:
+            column_mapping = self._map_columns(header_values)
+        
+        # 데이터 행 (헤더 다음 행부터: 버퍼에 남은 행 → 나머지 행)
+        data_rows = chain(head[header_row:], rows)
+        
+        # 결제일 컬럼의 날짜 형식을 앞쪽 표본으로 한 번만 추정
+        sample = list(islice(data_rows, DATE_SAMPLE_ROWS))
+        date_column = column_mapping['settlement_date']
+        date_format = infer_date_format(self._get_cell_value(values, date_column) for _, values in sample)
+        
+        self.sheet_mappings[sheet or self.reader.active_sheet] = {
+            'headerRow': header_row,
+            'signature': header_signature(header_values),
+            'headers': normalize_headers(header_values),
+            'mapping': column_mapping,
+            'mappingSource': 'template' if template is not None else 'detected',
+            'dateFormat': date_format
+        }
         
-        # 데이터 행 파싱 (헤더 다음 행부터)
-        for row_idx in range(header_row + 1, self.sheet.max_row + 1):
-            row_data = self._parse_row(row_idx, column_mapping)
+        # 데이터 행 파싱
+        for row_idx, values in chain(sample, data_rows):
+            row_data = self._parse_row(row_idx, values, column_mapping, date_format)
             
             if row_data and row_data.get('amount'):  # 금액이 있는 행만
-                trades.append(row_data)
+                yield row_data
+    
+    def _find_header_row(self, rows):
+        """
+        헤더 행 찾기 (최대 HEADER_SEARCH_ROWS행까지만 읽음)
+        
+        Args:
+            rows: (행 번호, 값 튜플) 이터레이터 - 읽은 만큼 소비됨
+        
+        Returns:
+            tuple: (읽은 행 리스트, 헤더 행 번호 또는 None, 지문이 일치한 템플릿 매핑 또는 None)
+        """
+        templates = self.column_templates
+        head = []
+        for row_idx, values in rows:
+            head.append((row_idx, values))
+            if templates:
+                template = templates.get(header_signature(values))
+                if template is not None:
+                    return head, row_idx, template
+            if self._is_header(values):
+                return head, row_idx, None
+            if len(head) >= self.HEADER_SEARCH_ROWS:
+                break
         
-        return trades
+        return head, None, None
     
-    def _find_header_row(self):
-        """헤더 행 찾기"""
-        header_keywords = ['거래', 'ID', '통화', '금액', '날짜', 'trade', 'currency', 'amount']
+    def _source_for_worker(self):
+        """워커 프로세스에 넘길 원본 (파일 경로 또는 스트림의 바이트)"""
+        source = self._source
+        if isinstance(source, (str, os.PathLike)):
+            return os.fspath(source)
+        if hasattr(source, 'getvalue'):
+            return source.getvalue()
+        source.seek(0)
+        return source.read()
+    
+    def _is_header(self, values):
+        """헤더 행 여부 (키워드가 2개 이상 포함되면 헤더로 간주)"""
+        header_keywords = ['거래', 'id', '통화', '금액', '날짜', 'trade', 'currency', 'amount']
         
-        for row_idx in range(1, min(10, self.sheet.max_row + 1)):  # 최대 10행까지만 검색
-            row_values = [str(cell.value).lower() if cell.value else '' 
-                         for cell in self.sheet[row_idx]]
-            
-            # 키워드가 2개 이상 포함되면 헤더로 간주
-            keyword_count = sum(1 for keyword in header_keywords 
-                              if any(keyword.lower() in val for val in row_values))
-            
-            if keyword_count >= 2:
-                return row_idx
+        row_values = [str(value).lower() for value in values if value]
         
-        return None
+        keyword_count = sum(1 for keyword in header_keywords 
+                          if any(keyword in val for val in row_values))
+        
+        return keyword_count >= 2
     
-    def _map_columns(self, header_row):
-        """컬럼 매핑 생성"""
-        mapping = {
-            'trade_id': None,
-            'counterparty': None,
-            'currency': None,
-            'amount': None,
-            'settlement_date': None,
-            'trade_type': None,
-            'hedge_status': None
-        }
+    def _map_columns(self, header_values):
+        """
+        컬럼 매핑 생성
+        
+        Args:
+            header_values: 헤더 행의 값 튜플
+        
+        Returns:
+            dict: 필드 → 컬럼 번호 (1부터, 없으면 None)
+        """
+        mapping = dict.fromkeys(MAPPING_FIELDS)
         
         header_patterns = {
             'trade_id': ['거래id', 'tradeid', 'id', '번호'],
@@ -98,8 +689,8 @@ class ExcelParser:
             'hedge_status': ['헤지', 'hedge', '상태', 'status']
         }
         
-        for col_idx in range(1, self.sheet.max_column + 1):
-            cell_value = str(self.sheet.cell(header_row, col_idx).value or '').lower()
+        for col_idx, value in enumerate(header_values, start=1):
+            cell_value = str(value or '').lower()
             
             for field, patterns in header_patterns.items():
                 if any(pattern in cell_value for pattern in patterns):
@@ -108,23 +699,23 @@ class ExcelParser:
         
         return mapping
     
-    def _parse_row(self, row_idx, column_mapping):
-        """행 데이터 파싱"""
+    def _parse_row(self, row_idx, values, column_mapping, date_format=None):
+        """행 데이터 파싱 (values: 행의 값 튜플, date_format: 결제일 컬럼 추정 형식)"""
         try:
             # 거래 ID
-            trade_id = self._get_cell_value(row_idx, column_mapping['trade_id'])
+            trade_id = self._get_cell_value(values, column_mapping['trade_id'])
             if not trade_id:
                 trade_id = f"T{row_idx - 1}"
             
             # 거래처명
-            counterparty = self._get_cell_value(row_idx, column_mapping['counterparty']) or '거래처'
+            counterparty = self._get_cell_value(values, column_mapping['counterparty']) or '거래처'
             
             # 통화
-            currency = self._get_cell_value(row_idx, column_mapping['currency']) or 'USD'
+            currency = self._get_cell_value(values, column_mapping['currency']) or 'USD'
             currency = self._normalize_currency(currency)
             
             # 금액
-            amount = self._get_cell_value(row_idx, column_mapping['amount'])
+            amount = self._get_cell_value(values, column_mapping['amount'])
             if amount is None:
                 return None
             amount = self._parse_number(amount)
@@ -132,24 +723,24 @@ class ExcelParser:
                 return None
             
             # 결제예정일
-            settlement_date = self._get_cell_value(row_idx, column_mapping['settlement_date'])
-            settlement_date = self._parse_date(settlement_date)
+            settlement_date = self._get_cell_value(values, column_mapping['settlement_date'])
+            settlement_date = self._parse_date(settlement_date, date_format)
             
             # 거래 구분
-            trade_type = self._get_cell_value(row_idx, column_mapping['trade_type']) or '수출'
+            trade_type = self._get_cell_value(values, column_mapping['trade_type']) or '수출'
             trade_type = self._normalize_trade_type(trade_type)
             
             # 헤지 상태
-            hedge_status = self._get_cell_value(row_idx, column_mapping['hedge_status']) or '미헤지'
+            hedge_status = self._get_cell_value(values, column_mapping['hedge_status']) or '미헤지'
             hedge_status = self._normalize_hedge_status(hedge_status)
             
             # 원화환산액 계산
             exchange_rate = self._get_exchange_rate(currency)
             krw_amount = int(amount * exchange_rate)
             
-            # D-Day 계산
+            # D-Day 계산 (업로드 기준일 대비 달력 일수)
             if settlement_date:
-                days_until = (settlement_date - datetime.now()).days
+                days_until = settlement_date.toordinal() - self._reference_ordinal
             else:
                 days_until = 30
             
@@ -169,13 +760,12 @@ class ExcelParser:
             print(f"행 {row_idx} 파싱 오류: {e}")
             return None
     
-    def _get_cell_value(self, row_idx, col_idx):
-        """셀 값 가져오기"""
-        if col_idx is None:
+    def _get_cell_value(self, values, col_idx):
+        """셀 값 가져오기 (행 길이보다 큰 컬럼은 빈 셀)"""
+        if col_idx is None or col_idx > len(values):
             return None
         
-        cell = self.sheet.cell(row_idx, col_idx)
-        return cell.value
+        return values[col_idx - 1]
     
     def _parse_number(self, value):
         """숫자 파싱"""
@@ -192,23 +782,39 @@ class ExcelParser:
         
         return 0
     
-    def _parse_date(self, value):
-        """날짜 파싱"""
+    def _parse_date(self, value, date_format=None):
+        """
+        날짜 파싱
+        
+        Args:
+            value: 셀 값 (datetime, date, 문자열)
+            date_format: 컬럼에서 추정한 형식 - 있으면 정규식 한 번으로 파싱하고
+                         형식이 다른 셀만 전체 형식을 시도함
+        
+        Returns:
+            datetime (파싱 실패 시 기준일 + 30일)
+        """
         if isinstance(value, datetime):
             return value
         
+        if isinstance(value, date):
+            return datetime(value.year, value.month, value.day)
+        
         if isinstance(value, str):
-            # 다양한 날짜 형식 지원
-            date_formats = ['%Y-%m-%d', '%Y/%m/%d', '%Y.%m.%d', '%m/%d/%Y', '%d/%m/%Y']
+            if date_format is not None:
+                parsed = _match_date(value, date_format)
+                if parsed is not None:
+                    return parsed
             
-            for fmt in date_formats:
+            # 다양한 날짜 형식 지원
+            for fmt in DATE_FORMATS:
                 try:
                     return datetime.strptime(value, fmt)
-                except:
+                except ValueError:
                     continue
         
         # 파싱 실패 시 30일 후로 설정
-        return datetime.now() + timedelta(days=30)
+        return self.reference_date + timedelta(days=30)
     
     def _normalize_currency(self, value):
         """통화 정규화"""
@@ -344,6 +950,72 @@ class DataAnonymizer:
         return hash_value[:16]  # 16자리만 사용
 
 
+class KPIAccumulator:
+    """
+    배치 단위로 누적하는 KPI 계산기 (calculate_kpi와 같은 결과)
+    
+    사용법:
+        accumulator = KPIAccumulator()
+        for batch in batches:
+            accumulator.add(batch)
+        kpi = accumulator.result()
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.total_exposure = 0
+        self.full_hedge = 0
+        self.partial_hedge = 0
+    
+    def add(self, positions):
+        """
+        포지션 배치 누적
+        
+        Args:
+            positions: 포지션 데이터 리스트
+        """
+        for p in positions:
+            amount = p['krwAmount']
+            self.total_exposure += amount
+            if p['hedgeStatus'] == '전액헤지':
+                self.full_hedge += amount
+            elif p['hedgeStatus'] == '부분헤지':
+                # 부분헤지는 50%만 계산 (간단한 가정)
+                self.partial_hedge += amount * 0.5
+        self.count += len(positions)
+    
+    def result(self):
+        """
+        지금까지 누적한 포지션의 KPI
+        
+        Returns:
+            dict: KPI 데이터
+        """
+        total_exposure = self.total_exposure
+        actual_hedged = self.full_hedge + self.partial_hedge
+        
+        # 헤지 비율
+        current_ratio = (actual_hedged / total_exposure * 100) if total_exposure > 0 else 0
+        
+        # 목표 비율 (기본값 70%)
+        target_ratio = 70
+        
+        # 갭
+        gap = current_ratio - target_ratio
+        
+        # 미헤지 금액
+        unhedged_amount = total_exposure - actual_hedged
+        
+        return {
+            'totalExposure': int(total_exposure),
+            'hedgedAmount': int(actual_hedged),
+            'currentHedgeRatio': round(current_ratio, 1),
+            'targetHedgeRatio': target_ratio,
+            'gap': round(gap, 1),
+            'unhedgedAmount': int(unhedged_amount)
+        }
+
+
 def calculate_kpi(positions):
     """
     KPI 계산
@@ -354,55 +1026,147 @@ def calculate_kpi(positions):
     Returns:
         dict: KPI 데이터
     """
-    if not positions:
-        return {
-            'totalExposure': 0,
-            'hedgedAmount': 0,
-            'currentHedgeRatio': 0,
-            'targetHedgeRatio': 70,
-            'gap': -70,
-            'unhedgedAmount': 0
-        }
+    accumulator = KPIAccumulator()
+    accumulator.add(positions or [])
+    return accumulator.result()
+
+
+# 업로드 파이프라인 배치 크기 (거래 수) 및 단계 사이 큐 길이 (배치 수)
+# 동시에 메모리에 있는 거래는 대략 배치 크기 × (단계 수 × (큐 길이 + 1))건
+UPLOAD_BATCH_SIZE = 2000
+PIPELINE_QUEUE_DEPTH = 2
+
+# 다중 시트 병렬 파싱: 동시에 돌릴 시트 워커 프로세스 수 (HEDGEFREEDOM_SHEET_WORKERS,
+# 1이면 순차 파싱)와 워커별 배치 큐 길이 (배치 수)
+try:
+    SHEET_WORKERS = int(os.getenv('HEDGEFREEDOM_SHEET_WORKERS', os.cpu_count() or 1))
+except ValueError:
+    print("⚠️ HEDGEFREEDOM_SHEET_WORKERS 값이 숫자가 아닙니다. 시트를 순차 파싱합니다.")
+    SHEET_WORKERS = 1
+SHEET_QUEUE_DEPTH = 2
+
+# 파이프라인 단계 사이 종료 표시
+_PIPELINE_END = object()
+
+
+class _PipelineFailure:
+    """앞 단계에서 난 예외 (다음 단계로 전달되어 호출자에게 다시 발생)"""
+    
+    def __init__(self, error):
+        self.error = error
+
+
+def _pipeline_source(batches, outbox, stop):
+    """첫 단계: 배치 제너레이터를 끝까지(또는 중단 요청까지) 읽어 큐에 넣음"""
+    try:
+        for batch in batches:
+            if stop.is_set():
+                break
+            outbox.put(batch)
+        outbox.put(_PIPELINE_END)
+    except Exception as e:
+        stop.set()
+        outbox.put(_PipelineFailure(e))
+    finally:
+        close = getattr(batches, 'close', None)
+        if close is not None:
+            close()
+
+
+def _pipeline_stage(func, inbox, outbox, stop):
+    """중간 단계: 배치마다 func를 적용해 다음 큐로 전달 (실패 시 앞 단계가 막히지 않게 입력을 비움)"""
+    while True:
+        item = inbox.get()
+        if item is _PIPELINE_END or isinstance(item, _PipelineFailure):
+            outbox.put(item)
+            return
+        try:
+            outbox.put(func(item))
+        except Exception as e:
+            stop.set()
+            outbox.put(_PipelineFailure(e))
+            while not (item is _PIPELINE_END or isinstance(item, _PipelineFailure)):
+                item = inbox.get()
+            return
+
+
+def run_batch_pipeline(batches, stages, queue_depth=PIPELINE_QUEUE_DEPTH):
+    """
+    배치 제너레이터 → 단계 함수들을 단계마다 스레드 하나로 겹쳐 실행
     
-    # 총 노출액
-    total_exposure = sum(p['krwAmount'] for p in positions)
+    단계 사이는 길이 queue_depth의 큐로 연결되므로 앞 단계가 뒤 단계보다 빨라도
+    큐가 차면 기다림 (메모리는 배치 크기에 비례). 어느 단계에서든 예외가 나면
+    배치 읽기를 멈추고 같은 예외를 호출자에게 다시 발생시킴.
+    
+    Args:
+        batches: 배치 이터러블 (예: ExcelParser.iter_trade_batches())
+        stages: [배치 → 배치 함수, ...] (순서대로 적용, 마지막 단계의 반환값은 버림)
+        queue_depth: 단계 사이 큐 길이
     
-    # 헤지된 금액
-    hedged_amount = sum(
-        p['krwAmount'] for p in positions 
-        if p['hedgeStatus'] in ['전액헤지', '부분헤지']
-    )
+    Returns:
+        int: 처리한 배치 수
+    """
+    stop = threading.Event()
+    queues = [queue.Queue(maxsize=queue_depth) for _ in range(len(stages) + 1)]
+    threads = [threading.Thread(target=_pipeline_source, args=(batches, queues[0], stop),
+                                name='pipeline-source', daemon=True)]
+    for i, func in enumerate(stages):
+        threads.append(threading.Thread(target=_pipeline_stage, args=(func, queues[i], queues[i + 1], stop),
+                                        name=f'pipeline-stage-{i + 1}', daemon=True))
+    for thread in threads:
+        thread.start()
     
-    # 부분헤지는 50%만 계산 (간단한 가정)
-    partial_hedge = sum(
-        p['krwAmount'] * 0.5 for p in positions 
-        if p['hedgeStatus'] == '부분헤지'
-    )
+    processed = 0
+    failure = None
+    while True:
+        item = queues[-1].get()
+        if item is _PIPELINE_END:
+            break
+        if isinstance(item, _PipelineFailure):
+            failure = item.error
+            break
+        processed += 1
     
-    full_hedge = sum(
-        p['krwAmount'] for p in positions 
-        if p['hedgeStatus'] == '전액헤지'
-    )
+    for thread in threads:
+        thread.join()
+    if failure is not None:
+        raise failure
+    return processed
+
+
+def stream_upload(parser, anonymizer, write_batch, batch_size=None, preview_size=0):
+    """
+    업로드 파일 스트리밍 처리: 파싱 → 익명화 → KPI 누적 → 저장
     
-    actual_hedged = full_hedge + partial_hedge
+    각 단계가 별도 스레드에서 배치 단위로 겹쳐 실행되므로 전체 거래 리스트를
+    만들지 않음. 결과(거래 순서, 익명화 이름, KPI)는 parse_workbook →
+    anonymize_trades → calculate_kpi를 차례로 실행한 것과 같음.
     
-    # 헤지 비율
-    current_ratio = (actual_hedged / total_exposure * 100) if total_exposure > 0 else 0
+    Args:
+        parser: ExcelParser
+        anonymizer: DataAnonymizer
+        write_batch: 익명화된 배치를 저장하는 함수 (배치 순서대로 호출됨)
+        batch_size: 배치당 거래 수 (기본: UPLOAD_BATCH_SIZE)
+        preview_size: 결과에 담을 앞쪽 거래 수
     
-    # 목표 비율 (기본값 70%)
-    target_ratio = 70
+    Returns:
+        dict: {'tradeCount', 'kpi', 'sheets', 'preview': 앞쪽 preview_size건}
+    """
+    accumulator = KPIAccumulator()
+    preview = []
     
-    # 갭
-    gap = current_ratio - target_ratio
+    def accumulate(batch):
+        accumulator.add(batch)
+        if len(preview) < preview_size:
+            preview.extend(batch[:preview_size - len(preview)])
+        return batch
     
-    # 미헤지 금액
-    unhedged_amount = total_exposure - actual_hedged
+    run_batch_pipeline(parser.iter_trade_batches(batch_size),
+                       [anonymizer.anonymize_trades, accumulate, write_batch])
     
     return {
-        'totalExposure': int(total_exposure),
-        'hedgedAmount': int(actual_hedged),
-        'currentHedgeRatio': round(current_ratio, 1),
-        'targetHedgeRatio': target_ratio,
-        'gap': round(gap, 1),
-        'unhedgedAmount': int(unhedged_amount)
+        'tradeCount': accumulator.count,
+        'kpi': accumulator.result(),
+        'sheets': parser.sheet_summaries,
+        'preview': preview
     }
@@ -8,17 +8,25 @@ pip install cryptography  # 암호화용
 """
 
 import json
+import hashlib
 import random
 import os
 import mimetypes
 import base64
 import io
 import tempfile
+import threading
+import uuid
 from datetime import datetime, timedelta
 from urllib.parse import unquote, parse_qs
 from pathlib import Path
 import cgi
 
+try:
+    import fcntl  # 워커 프로세스 간 파일 잠금 (Windows에는 없음 - 단일 프로세스로 실행)
+except ImportError:
+    fcntl = None
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 암호화 모듈
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -35,7 +43,9 @@ except ImportError:
 
 # 엑셀 파서 및 익명화 모듈 import
 try:
-    from excel_parser import ExcelParser, DataAnonymizer, calculate_kpi
+    from excel_parser import (ExcelParser, DataAnonymizer, PARSER_VERSION,
+                              stream_upload, header_signature, normalize_headers,
+                              mapping_from_browser, mapping_to_browser)
     EXCEL_PARSER_AVAILABLE = True
 except ImportError:
     print("⚠️ excel_parser 모듈을 찾을 수 없습니다. Mock 데이터를 사용합니다.")
@@ -43,21 +53,28 @@ except ImportError:
 
 # 계산기 모듈 import
 from calculators.registry import CalculatorRegistry
-from calculators.total_exposure import TotalExposureCalculator
-from calculators.hedged_amount import HedgedAmountCalculator
-from calculators.hedge_ratio import HedgeRatioCalculator
-from calculators.unhedged_gap import UnhedgedGapCalculator
-from calculators.avg_hedge_rate import AvgHedgeRateCalculator
-from calculators.recommendation import RecommendationCalculator
+from calculators.incremental import IncrementalKPI
+from calculators.builtin import register_builtin_calculators
+from calculators.portfolio_batch import calculate_portfolio, iter_portfolio_results
+from calculators.result_cache import cache_from_env, canonical_hash, raw_digest
+from calculators.metrics import CalculatorMetrics
+from calculators.partials import build_partial, rollup_partials
+from calculators.rules import RecommendationRules
 
 # 계산기 레지스트리 초기화 (서버 시작 시 1회)
 calculator_registry = CalculatorRegistry()
-calculator_registry.register(TotalExposureCalculator())
-calculator_registry.register(HedgedAmountCalculator())
-calculator_registry.register(HedgeRatioCalculator())
-calculator_registry.register(UnhedgedGapCalculator())
-calculator_registry.register(AvgHedgeRateCalculator())
-calculator_registry.register(RecommendationCalculator())
+register_builtin_calculators(calculator_registry)
+
+# 같은 DAG 단계의 독립 계산기(VaR, 시나리오 등)를 동시에 실행할 스레드 수
+# (HEDGEFREEDOM_CALCULATOR_THREADS, 0 또는 1이면 순차 실행)
+try:
+    calculator_registry.set_max_workers(int(os.getenv('HEDGEFREEDOM_CALCULATOR_THREADS', 4)))
+except ValueError:
+    print("⚠️ HEDGEFREEDOM_CALCULATOR_THREADS 값이 숫자가 아닙니다. 계산기를 순차 실행합니다.")
+
+# 계산기별 소요 시간/입력 크기/결과 지표 (GET /api/metrics)
+calculator_metrics = CalculatorMetrics(include_pid=True)
+calculator_registry.add_observer(calculator_metrics)
 
 print(f"✅ 계산기 레지스트리 초기화 완료: {calculator_registry.list_calculators()}")
 
@@ -310,6 +327,9 @@ class DataEncryption:
     - Base64 인코딩 (텍스트 저장 가능)
     """
     
+    # 배치 단위 암호화 파일의 첫 줄 (다음 줄부터 한 줄에 JSON 배열 배치 하나씩 Base64 토큰)
+    STREAM_HEADER = 'HFSTREAM1'
+    
     def __init__(self, master_key=None):
         """
         Args:
@@ -412,6 +432,38 @@ class DataEncryption:
             except:
                 return {"error": "복호화 실패"}
 
+    def chunk_encryptor(self, customer_id):
+        """
+        배치 단위 암호화 함수 (키 유도는 한 번만 수행)
+        
+        Args:
+            customer_id: 고객 ID
+            
+        Returns:
+            JSON 문자열 → 암호화된 한 줄(Base64) 함수
+        """
+        fernet = self._derive_key(customer_id)
+        return lambda text: base64.b64encode(fernet.encrypt(text.encode('utf-8'))).decode('utf-8')
+    
+    def decrypt_stream(self, lines, customer_id):
+        """
+        배치 단위 암호화 데이터 복호화 (STREAM_HEADER 다음 줄들)
+        
+        Args:
+            lines: 암호화된 줄 이터러블 (파일 객체 가능)
+            customer_id: 고객 ID
+            
+        Returns:
+            모든 배치를 순서대로 이어 붙인 리스트
+        """
+        fernet = self._derive_key(customer_id)
+        items = []
+        for line in lines:
+            line = line.strip()
+            if line:
+                items.extend(json.loads(fernet.decrypt(base64.b64decode(line)).decode('utf-8')))
+        return items
+
 # 전역 암호화 인스턴스
 data_encryption = DataEncryption()
 
@@ -425,9 +477,64 @@ USER_SETTINGS = {
 }
 STORED_POSITIONS = []
 
+# 고객별 증분 KPI 상태 (워커 프로세스 메모리, /api/hedge/calculate/delta용)
+# {'state': IncrementalKPI, 'baselineVersion': 기준 적재마다 새로 발급, 'seq': 적용한 델타 요청 수,
+#  'lock': 확인~적용~seq 증가~결과 조회를 한 번에 묶는 잠금 (gthread 워커의 동시 요청 대비)}
+# 워커마다 따로 보관되므로 클라이언트가 가진 (baselineVersion, seq)와 다르면 409로 재적재 요청
+INCREMENTAL_KPI = {}
+
+# 고객별 결제일 정렬 인덱스 (워커 프로세스 메모리, /api/hedge/maturity용)
+# {'index': MaturityIndex, 'version': 포지션 내용 해시} - 워커마다 따로 보관되므로
+# 조회 시 클라이언트가 가진 version과 다르면 409로 재적재 요청
+MATURITY_INDEX = {}
+
+# 저장된 포지션의 내용 해시 (포지션 리스트, 해시) - 헤지 제안 캐시 키용
+# 리스트 자체를 함께 보관하므로 STORED_POSITIONS가 바뀌면 다시 계산됨
+_stored_positions_version = (None, None)
+
 # 서버 데이터 루트 경로
 SERVER_DATA_ROOT = Path(__file__).parent / 'server_data'
 
+# KPI 결과 캐시 (모든 워커 프로세스가 SQLite 파일 하나를 공유, HEDGEFREEDOM_KPI_CACHE=off로 비활성화)
+KPI_RESULT_CACHE = cache_from_env(SERVER_DATA_ROOT / 'cache' / 'kpi_cache.sqlite3')
+
+# 업로드 파싱 결과 캐시 (같은 파일 재업로드 시 파싱/익명화/KPI 계산 생략,
+# HEDGEFREEDOM_PARSE_CACHE=off로 비활성화)
+PARSE_RESULT_CACHE = cache_from_env(SERVER_DATA_ROOT / 'cache' / 'parse_cache.sqlite3',
+                                    prefix='HEDGEFREEDOM_PARSE_CACHE', default_ttl=86400)
+
+# 업로드 응답에 담는 앞쪽 포지션 수 (전체 포지션은 고객 positions 폴더에 저장)
+UPLOAD_PREVIEW_POSITIONS = 100
+
+# 헤지 권장 규칙표 (고객별/통화별 정책 구간, 파일이 바뀌면 다시 컴파일)
+RECOMMENDATION_RULES_PATH = SERVER_DATA_ROOT / 'policy' / 'recommendation_rules.json'
+_recommendation_rules = {'mtime': None, 'rules': RecommendationRules()}
+
+
+def get_recommendation_rules():
+    """
+    현재 헤지 권장 규칙표 (파일 수정 시각이 같으면 컴파일된 규칙표 재사용)
+    
+    Returns:
+        RecommendationRules (파일이 없으면 기본 70~90% 구간)
+    """
+    try:
+        mtime = RECOMMENDATION_RULES_PATH.stat().st_mtime
+    except OSError:
+        mtime = None
+    
+    if mtime != _recommendation_rules['mtime']:
+        rules = RecommendationRules()
+        if mtime is not None:
+            try:
+                with open(RECOMMENDATION_RULES_PATH, 'r', encoding='utf-8') as f:
+                    rules = RecommendationRules.from_dict(json.load(f))
+            except (OSError, ValueError, TypeError) as e:
+                print(f"⚠️ 헤지 권장 규칙 로드 실패 (기본값 사용): {e}")
+        _recommendation_rules['mtime'] = mtime
+        _recommendation_rules['rules'] = rules
+    return _recommendation_rules['rules']
+
 def get_customer_folder(customer_id='default'):
     """
     고객별 폴더 구조 생성 (B-tree 스타일 다단계 해시 분할)
@@ -527,6 +634,95 @@ def save_customer_data(customer_id, data_type, data, filename_prefix, encrypt=Tr
     return str(file_path)
 
 
+class CustomerDataWriter:
+    """
+    리스트 데이터를 배치 단위로 이어 쓰는 고객 데이터 저장기 (save_customer_data의 스트리밍 버전)
+    
+    파일명은 save_customer_data와 같고 load_customer_data로 읽을 수 있음.
+    임시 파일에 이어 쓰다가 close()에서 최종 파일로 교체하므로 전체 리스트를
+    메모리에 두지 않음. 평문은 JSON 배열 하나, 암호화는 첫 줄 STREAM_HEADER 다음에
+    배치마다 암호화 토큰 한 줄씩 (배치가 도착할 때마다 암호화, 평문은 디스크에 남지 않음).
+    
+    사용법:
+        writer = CustomerDataWriter(customer_id, 'positions', 'positions')
+        writer.write(batch)   # 여러 번
+        path = writer.close() # 실패 시 writer.abort()
+    """
+    
+    def __init__(self, customer_id, data_type, filename_prefix, encrypt=True):
+        """
+        Args:
+            customer_id: 고객 ID
+            data_type: 데이터 타입 (positions, masked, kpi, etc.)
+            filename_prefix: 파일명 접두사
+            encrypt: 암호화 여부 (기본값: True)
+        """
+        folders = get_customer_folder(customer_id)
+        now = datetime.now()
+        
+        self.encrypt = encrypt and data_encryption.enabled
+        extension = 'enc' if self.encrypt else 'json'
+        
+        # 파일명: prefix_YYYY-MM-DD_HH-MM-SS.{enc|json}
+        self.file_path = folders[data_type] / f"{filename_prefix}_{now.strftime('%Y-%m-%d_%H-%M-%S')}.{extension}"
+        self.count = 0
+        
+        # 임시 파일 이름은 매번 고유 (같은 워커의 다른 스레드가 같은 초에 같은 고객을
+        # 저장해도 서로의 임시 파일을 덮어쓰지 않음)
+        fd, temp_path = tempfile.mkstemp(dir=self.file_path.parent,
+                                         prefix=f'{self.file_path.name}.', suffix='.tmp')
+        self.temp_path = Path(temp_path)
+        self._file = os.fdopen(fd, 'w', encoding='utf-8')
+        if self.encrypt:
+            self._encrypt_chunk = data_encryption.chunk_encryptor(customer_id)
+            self._file.write(DataEncryption.STREAM_HEADER + '\n')
+        else:
+            self._file.write('[')
+    
+    def write(self, items):
+        """
+        항목 배치를 이어 씀
+        
+        Args:
+            items: 저장할 항목 리스트
+        """
+        if not items:
+            return
+        if self.encrypt:
+            # ★ 배치 암호화 ★
+            self._file.write(self._encrypt_chunk(json.dumps(items, ensure_ascii=False)) + '\n')
+        else:
+            if self.count:
+                self._file.write(',\n')
+            self._file.write(',\n'.join(json.dumps(item, ensure_ascii=False) for item in items))
+        self.count += len(items)
+    
+    def close(self):
+        """
+        저장 완료 (임시 파일 → 최종 파일 교체)
+        
+        Returns:
+            저장된 파일 경로 (str)
+        """
+        if not self.encrypt:
+            self._file.write(']')
+        self._file.close()
+        os.replace(self.temp_path, self.file_path)
+        
+        if self.encrypt:
+            print(f"✅ 암호화 저장 완료: {self.file_path} ({self.count}건)")
+        else:
+            print(f"✅ 평문 저장 완료: {self.file_path} ({self.count}건)")
+        
+        return str(self.file_path)
+    
+    def abort(self):
+        """저장 취소 (임시 파일 삭제)"""
+        self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+
 def load_customer_data(customer_id, data_type, filename):
     """
     고객 데이터 로드 (복호화)
@@ -546,7 +742,13 @@ def load_customer_data(customer_id, data_type, filename):
         return None
     
     with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+        first_line = f.readline()
+        
+        # 배치 단위 암호화 파일 (CustomerDataWriter) → 줄 단위 복호화
+        if filename.endswith('.enc') and first_line.strip() == DataEncryption.STREAM_HEADER:
+            return data_encryption.decrypt_stream(f, customer_id)
+        
+        content = first_line + f.read()
     
     # 파일 확장자로 암호화 여부 판단
     if filename.endswith('.enc'):
@@ -581,6 +783,182 @@ def find_customer_data(customer_id):
     return None
 
 
+def write_json_atomic(file_path, data, **dump_options):
+    """
+    JSON 파일을 원자적으로 교체 (같은 폴더의 고유 임시 파일에 쓴 뒤 os.replace)
+    
+    임시 파일 이름이 매번 달라 같은 워커의 스레드끼리 동시에 저장해도 서로의
+    임시 파일을 덮어쓰지 않음 (마지막으로 교체한 쪽이 남음)
+    
+    Args:
+        file_path: 최종 파일 경로 (Path)
+        data: 저장할 데이터
+        dump_options: json.dump 추가 인자 (예: indent=2)
+    """
+    fd, temp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f'{file_path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, **dump_options)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+# 고객별 부분 집계 파일 (kpi 폴더, 전사/세그먼트 롤업용)
+PARTIAL_STATE_FILENAME = 'partial_state.json'
+
+
+def save_partial_state(customer_id, partial):
+    """
+    고객 부분 집계 저장 (kpi 폴더의 partial_state.json을 원자적으로 교체)
+    
+    포지션 없이 합계/가중합/건수만 담기므로 평문으로 저장하고,
+    롤업은 이 파일만 읽어 병합함
+    
+    Args:
+        customer_id: 고객 ID
+        partial: calculators.partials.build_partial() 결과
+    """
+    folders = get_customer_folder(customer_id)
+    file_path = folders['kpi'] / PARTIAL_STATE_FILENAME
+    write_json_atomic(file_path, partial)
+    
+    return str(file_path)
+
+
+def currency_exposures(positions):
+    """
+    통화별 노출/헤지 금액 (조치 목록의 통화별 판정용, 부분 집계에 함께 저장)
+    
+    Args:
+        positions: 포지션 리스트
+        
+    Returns:
+        [{'currency', 'exposure', 'hedged'}, ...] (통화 첫 등장 순서)
+    """
+    grouped = calculator_registry.calculate_grouped(
+        positions, ['currency'], targets=['totalExposure', 'hedgedAmount']
+    )
+    return [
+        {'currency': currency,
+         'exposure': float(results.get('totalExposure') or 0.0),
+         'hedged': float(results.get('hedgedAmount') or 0.0)}
+        for (currency,), results in grouped.items()
+    ]
+
+
+def iter_partial_states(customer_ids=None, segment=None):
+    """
+    저장된 고객 부분 집계 순회
+    
+    Args:
+        customer_ids: 고객 ID 리스트 (None이면 전체 고객)
+        segment: 지정 시 해당 세그먼트 고객만
+    
+    Yields:
+        부분 집계 딕셔너리
+    """
+    if customer_ids is None:
+        # customers/{L1}/{L2}/{L3}/{customer_id}/kpi/partial_state.json
+        paths = (SERVER_DATA_ROOT / 'customers').glob(f'*/*/*/*/kpi/{PARTIAL_STATE_FILENAME}')
+    else:
+        paths = []
+        for customer_id in customer_ids:
+            customer_path = find_customer_data(customer_id)
+            if customer_path is not None:
+                paths.append(customer_path / 'kpi' / PARTIAL_STATE_FILENAME)
+    
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                partial = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if segment is not None and partial.get('segment') != segment:
+            continue
+        yield partial
+
+
+# 고객별 컬럼 매핑 템플릿 파일 (고객 폴더, 헤더 지문 → 컬럼 매핑)
+COLUMN_TEMPLATES_FILENAME = 'column_templates.json'
+
+# 템플릿 읽기-병합-쓰기 잠금 (같은 워커의 스레드끼리, 워커 프로세스끼리는 옆의 .lock 파일을 fcntl로 잠금)
+COLUMN_TEMPLATES_LOCK = threading.Lock()
+
+
+def load_column_templates(customer_id):
+    """
+    고객 컬럼 매핑 템플릿 조회
+    
+    Returns:
+        {헤더 지문: {'headers', 'mapping', 'source', 'parserVersion', 'updatedAt'}}
+        (source: 'confirmed' = 사용자가 매퍼에서 확인, 'detected' = 자동 인식 결과)
+    """
+    customer_path = find_customer_data(customer_id)
+    if customer_path is None:
+        return {}
+    
+    try:
+        with open(customer_path / COLUMN_TEMPLATES_FILENAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_column_templates(customer_id, entries):
+    """
+    고객 컬럼 매핑 템플릿 저장 (기존 템플릿과 병합, 파일은 원자적으로 교체)
+    
+    자동 인식 결과('detected')는 사용자가 확인한 템플릿('confirmed')을 덮어쓰지 않음.
+    읽기부터 교체까지 잠금을 잡으므로 동시에 저장해도 한쪽 템플릿이 사라지지 않음
+    
+    Args:
+        customer_id: 고객 ID
+        entries: {헤더 지문: 템플릿}
+    
+    Returns:
+        실제로 저장한 템플릿 수
+    """
+    folders = get_customer_folder(customer_id)
+    file_path = folders['positions'].parent / COLUMN_TEMPLATES_FILENAME
+    
+    with COLUMN_TEMPLATES_LOCK, open(file_path.with_suffix('.lock'), 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        
+        templates = load_column_templates(customer_id)
+        changed = 0
+        for signature, entry in entries.items():
+            current = templates.get(signature)
+            if entry['source'] == 'detected' and current is not None and (
+                    current.get('source') == 'confirmed'
+                    or (current.get('mapping') == entry['mapping']
+                        and current.get('parserVersion') == entry['parserVersion'])):
+                continue
+            templates[signature] = entry
+            changed += 1
+        
+        if changed:
+            write_json_atomic(file_path, templates, indent=2)
+    
+    return changed
+
+
+def usable_column_templates(templates):
+    """
+    파서에 넘길 템플릿 {헤더 지문: 매핑}
+    
+    사용자가 확인한 템플릿은 항상, 자동 인식 템플릿은 같은 파서 버전에서 만든 것만 사용
+    """
+    return {
+        signature: entry['mapping']
+        for signature, entry in templates.items()
+        if entry.get('source') == 'confirmed' or entry.get('parserVersion') == PARSER_VERSION
+    }
+
+
 def get_all_customers():
     """
     모든 고객 목록 조회 (B-tree 구조 순회)
@@ -674,9 +1052,14 @@ def handle_api(environ, start_response, path, method):
     if path == '/api/health':
         return json_response(start_response, {
             'status': 'ok',
-            'timestamp': datetime.now().isoformat()
+            'timestamp': datetime.now().isoformat(),
+            'kpiCache': KPI_RESULT_CACHE.stats() if KPI_RESULT_CACHE is not None else None,
+            'parseCache': PARSE_RESULT_CACHE.stats() if PARSE_RESULT_CACHE is not None else None
         })
     
+    elif path == '/api/metrics':
+        return handle_metrics(start_response)
+    
     elif path == '/api/realtime-data':
         return handle_realtime_data(start_response)
     
@@ -714,17 +1097,57 @@ def handle_api(environ, start_response, path, method):
         return handle_hedge_kpi(start_response)
     
     elif path == '/api/hedge/suggestions':
-        return handle_hedge_suggestions(start_response)
+        return handle_hedge_suggestions(environ, start_response, method)
     
     elif path == '/api/hedge/calculate' and method == 'POST':
         return handle_hedge_calculate(environ, start_response)
     
+    elif path == '/api/hedge/calculate/delta' and method == 'POST':
+        return handle_hedge_calculate_delta(environ, start_response)
+    
+    elif path == '/api/hedge/scenarios' and method == 'POST':
+        return handle_hedge_scenarios(environ, start_response)
+    
+    elif path == '/api/hedge/maturity':
+        return handle_hedge_maturity(environ, start_response, method)
+    
+    elif path == '/api/admin/rollup' and method == 'GET':
+        return handle_admin_rollup(environ, start_response)
+    
+    elif path == '/api/admin/action-screen':
+        return handle_action_screen(environ, start_response, method)
+    
+    elif path == '/api/admin/recommendation-rules':
+        return handle_recommendation_rules(environ, start_response, method)
+    
+    elif path == '/api/column-mapping/templates':
+        return handle_column_templates(environ, start_response, method)
+    
+    elif path == '/api/column-mapping/match' and method == 'POST':
+        return handle_column_template_match(environ, start_response)
+    
     else:
         return json_response(start_response, {
             'error': 'Endpoint not found'
         }, status='404 Not Found')
 
 
+def handle_metrics(start_response):
+    """
+    계산기 실행 지표 (Prometheus 텍스트 형식)
+    GET /api/metrics
+    
+    지표는 워커 프로세스별로 집계되며 worker 라벨로 구분됨
+    """
+    body = calculator_metrics.render().encode('utf-8')
+    start_response('200 OK', [
+        ('Content-Type', CalculatorMetrics.CONTENT_TYPE),
+        ('Content-Length', str(len(body))),
+        ('Access-Control-Allow-Origin', '*')
+    ])
+    return [body]
+
+
 def handle_realtime_data(start_response):
     """실시간 데이터 Mock 응답"""
     mock_data = {
@@ -751,13 +1174,69 @@ def handle_realtime_data(start_response):
 
 
 def handle_batch_calculation(environ, start_response):
-    """배치 계산 Mock 응답"""
+    """
+    배치 계산
+    
+    1) 다중 포트폴리오 (야간 일괄 재계산 등)
+        POST /api/calculator/batch
+        {"portfolios": [{"portfolioId": "P1", "customerId": "C001", "positions": [...]}, ...],
+         "maxWorkers": 8, "saveResults": false}
+        
+        또는 Content-Type: application/x-ndjson 으로 포트폴리오를 한 줄에 하나씩 전송
+        
+        → 프로세스 풀에 분산 계산하고, 끝나는 순서대로 NDJSON 한 줄씩 스트리밍
+          마지막 줄은 {"type": "summary", ...}
+    
+    2) 단일 포트폴리오
+        {"positions": [...], "groupBy": [...], "options": {"targetHedgeRatio": 75},
+         "calculators": ["fxVaR"]}
+        → 포트폴리오 KPI + by_currency (+ groups) JSON 응답
+          (calculators에 fxVaR 지정 시 summary에 var_95 / var_99 포함)
+    
+    3) positions 없이 집계값만 오면 기존 Mock 응답
+    """
     try:
+        content_type = environ.get('CONTENT_TYPE', '')
+        
+        # NDJSON: 본문을 한 줄씩 읽으며 바로 계산 (전체를 메모리에 올리지 않음)
+        if content_type.startswith('application/x-ndjson'):
+            query = parse_qs(environ.get('QUERY_STRING', ''))
+            return stream_portfolio_batch(
+                start_response,
+                read_ndjson_portfolios(environ),
+                max_workers=int(query.get('maxWorkers', [0])[0]) or None,
+                save_results=query.get('saveResults', ['false'])[0] == 'true'
+            )
+        
         # 요청 본문 읽기
         content_length = int(environ.get('CONTENT_LENGTH', 0))
         request_body = environ['wsgi.input'].read(content_length)
         request_data = json.loads(request_body.decode('utf-8'))
         
+        if 'portfolios' in request_data:
+            return stream_portfolio_batch(
+                start_response,
+                request_data['portfolios'],
+                max_workers=request_data.get('maxWorkers'),
+                save_results=request_data.get('saveResults', False)
+            )
+        
+        positions = request_data.get('positions')
+        if positions:
+            options = request_data.get('options', {})
+            result = calculate_portfolio(calculator_registry, {
+                'positions': positions,
+                'customerId': request_data.get('customerId', 'default'),
+                'targetHedgeRatio': options.get('targetHedgeRatio', USER_SETTINGS.get('targetHedgeRatio', 70)),
+                'groupBy': request_data.get('groupBy'),
+                'calculators': request_data.get('calculators')
+            })
+            return json_response(start_response, {
+                'timestamp': datetime.now().isoformat(),
+                'status': 'success',
+                **result
+            })
+        
         # Mock 응답
         mock_result = {
             'timestamp': datetime.now().isoformat(),
@@ -771,6 +1250,11 @@ def handle_batch_calculation(environ, start_response):
         
         return json_response(start_response, mock_result)
         
+    except ValueError as e:
+        return json_response(start_response, {
+            'error': str(e),
+            'status': 'error'
+        }, status='400 Bad Request')
     except Exception as e:
         return json_response(start_response, {
             'error': str(e),
@@ -778,6 +1262,94 @@ def handle_batch_calculation(environ, start_response):
         }, status='500 Internal Server Error')
 
 
+def read_ndjson_portfolios(environ):
+    """
+    NDJSON 요청 본문에서 포트폴리오를 한 줄씩 읽는 제너레이터
+    
+    Yields:
+        포트폴리오 딕셔너리 (JSON 파싱 실패 줄은 오류 포트폴리오로 전달)
+    """
+    remaining = int(environ.get('CONTENT_LENGTH') or 0)
+    stream = environ['wsgi.input']
+    
+    while remaining > 0:
+        line = stream.readline(remaining)
+        if not line:
+            break
+        remaining -= len(line)
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line.decode('utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            yield {'portfolioId': None, 'positions': [], 'parseError': str(e)}
+
+
+def stream_portfolio_batch(start_response, portfolios, max_workers=None, save_results=False):
+    """
+    다중 포트폴리오 결과를 NDJSON으로 스트리밍
+    
+    Args:
+        start_response: WSGI 응답 시작 콜백
+        portfolios: 포트폴리오 이터러블
+        max_workers: 프로세스 수 (기본: CPU 코어 수)
+        save_results: True면 고객 kpi 폴더에 결과 저장
+    
+    Returns:
+        응답 본문 제너레이터
+    """
+    start_response('200 OK', [
+        ('Content-Type', 'application/x-ndjson; charset=utf-8'),
+        ('Access-Control-Allow-Origin', '*'),
+        ('Cache-Control', 'no-cache'),
+        ('X-Accel-Buffering', 'no')  # nginx 버퍼링 해제 (줄 단위 즉시 전달)
+    ])
+    
+    def generate():
+        started = datetime.now()
+        succeeded = failed = 0
+        
+        for result in iter_portfolio_results(portfolios, max_workers=max_workers):
+            if result.get('success'):
+                succeeded += 1
+                customer_id = result.get('customerId')
+                if save_results and customer_id:
+                    try:
+                        save_customer_data(
+                            customer_id=customer_id,
+                            data_type='kpi',
+                            data={
+                                'timestamp': datetime.now().isoformat(),
+                                'kpi': result['kpi'],
+                                'positionCount': result['positionCount'],
+                                'source': 'batch'
+                            },
+                            filename_prefix='calculated_kpi'
+                        )
+                    except Exception as save_error:
+                        result['saveError'] = str(save_error)
+            else:
+                failed += 1
+            
+            yield (json.dumps({'type': 'portfolio', **result}, ensure_ascii=False) + '\n').encode('utf-8')
+        
+        elapsed = (datetime.now() - started).total_seconds()
+        print(f"📦 배치 계산 완료: 성공 {succeeded}건, 실패 {failed}건, {elapsed:.2f}초")
+        
+        yield (json.dumps({
+            'type': 'summary',
+            'status': 'success',
+            'total': succeeded + failed,
+            'succeeded': succeeded,
+            'failed': failed,
+            'elapsedSeconds': round(elapsed, 3),
+            'timestamp': datetime.now().isoformat()
+        }, ensure_ascii=False) + '\n').encode('utf-8')
+    
+    return generate()
+
+
 def handle_excel_upload(environ, start_response):
     """엑셀 파일 업로드 및 처리 (실제 파싱)"""
     try:
@@ -813,12 +1385,12 @@ def handle_excel_upload(environ, start_response):
                 'error': '파일명이 없습니다.'
             }, status='400 Bad Request')
         
-        # 파일 확장자 확인
+        # 파일 확장자 확인 (실제 파싱 형식은 파일 시그니처로 판별)
         filename = file_item.filename.lower()
-        if not (filename.endswith('.xlsx') or filename.endswith('.xls')):
+        if not filename.endswith(('.xlsx', '.xls', '.csv', '.tsv', '.txt')):
             return json_response(start_response, {
                 'success': False,
-                'error': '엑셀 파일(.xlsx, .xls)만 업로드 가능합니다.'
+                'error': '엑셀(.xlsx, .xls) 또는 CSV(.csv, .tsv, .txt) 파일만 업로드 가능합니다.'
             }, status='400 Bad Request')
         
         # 고객 ID 가져오기
@@ -842,30 +1414,98 @@ def handle_excel_upload(environ, start_response):
                 'error': '파일 내용이 비어있습니다.'
             }, status='400 Bad Request')
         
+        # 업로드 기준일 (파일 전체의 daysUntil 계산에 같은 날짜 사용)
+        reference_date = datetime.now().date()
+        
+        # 파싱 결과 캐시 조회 (키: 파일 내용 SHA-256 + 파서 버전 + 고객 + 기준일)
+        # 기준일은 daysUntil이 날짜에 따라 달라지므로 포함
+        # 사용자가 확인한 컬럼 매핑은 결과를 바꿀 수 있으므로 키에 포함
+        # (자동 인식 템플릿은 같은 파서 버전의 인식 결과와 동일하므로 제외)
+        column_templates = load_column_templates(customer_id) if EXCEL_PARSER_AVAILABLE else {}
+        parse_cache_key = None
+        cached_upload = None
+        if EXCEL_PARSER_AVAILABLE and PARSE_RESULT_CACHE is not None:
+            parse_cache_key = canonical_hash({
+                'kind': 'upload',
+                'parser': PARSER_VERSION,
+                'file': hashlib.sha256(file_content).hexdigest(),
+                'customerId': customer_id,
+                'date': reference_date.isoformat(),
+                'templates': {signature: entry['mapping'] for signature, entry in column_templates.items()
+                              if entry.get('source') == 'confirmed'}
+            })
+            cached_upload = PARSE_RESULT_CACHE.get(parse_cache_key)
+            # 저장해 둔 포지션 파일이 없으면 (삭제됨/이전 형식 항목) 다시 처리
+            if cached_upload is not None and not os.path.exists(cached_upload.get('positionsPath') or ''):
+                cached_upload = None
+        
         # 실제 엑셀 파싱
         if EXCEL_PARSER_AVAILABLE:
             try:
-                # BytesIO로 변환
-                file_stream = io.BytesIO(file_content)
-                
-                # 엑셀 파서 생성
-                parser = ExcelParser(file_stream=file_stream)
-                
-                # 거래 데이터 파싱
-                raw_trades = parser.parse_trade_data()
-                
-                if not raw_trades:
-                    return json_response(start_response, {
-                        'success': False,
-                        'error': '엑셀 파일에서 거래 데이터를 찾을 수 없습니다. 파일 형식을 확인해주세요.'
-                    }, status='400 Bad Request')
+                if cached_upload is not None:
+                    # 같은 파일 재업로드: 파싱/익명화/KPI 계산/포지션 저장 생략
+                    kpi = cached_upload['kpi']
+                    sheets = cached_upload['sheets']
+                    file_format = cached_upload['fileFormat']
+                    trade_count = cached_upload['tradeCount']
+                    preview_positions = cached_upload['preview']
+                    positions_path = cached_upload['positionsPath']
+                    print(f"⚡ 파싱 캐시 적중: {trade_count}건 (파싱 생략)")
                 
-                # 데이터 익명화
-                anonymizer = DataAnonymizer(customer_id)
-                anonymized_trades = anonymizer.anonymize_trades(raw_trades)
+                else:
+                    # BytesIO로 변환
+                    file_stream = io.BytesIO(file_content)
+                    
+                    # 파싱 → 익명화 → KPI 누적 → 포지션 저장을 배치 단위 스레드 파이프라인으로 처리
+                    # (파일 시그니처로 xlsx/CSV 리더 선택, 읽기 전용 스트리밍, 전체 거래 리스트를 만들지 않음)
+                    # 헤더 지문이 저장된 템플릿과 같으면 컬럼 자동 인식 생략
+                    positions_writer = CustomerDataWriter(customer_id, 'positions', 'positions')
+                    try:
+                        with ExcelParser(file_stream=file_stream,
+                                         column_templates=usable_column_templates(column_templates),
+                                         reference_date=reference_date) as parser:
+                            file_format = parser.file_format
+                            upload = stream_upload(parser, DataAnonymizer(customer_id), positions_writer.write,
+                                                   preview_size=UPLOAD_PREVIEW_POSITIONS)
+                    except Exception:
+                        positions_writer.abort()
+                        raise
+                    sheets = upload['sheets']
+                    trade_count = upload['tradeCount']
+                    preview_positions = upload['preview']
+                    kpi = upload['kpi']
+                    print(f"📄 파일 형식: {file_format}")
+                    
+                    if len(sheets) > 1:
+                        print(f"📑 거래 시트 {len(sheets)}개: " +
+                              ", ".join(f"{sheet['name']}({sheet['trades']}건)" for sheet in sheets))
+                    
+                    # 거래를 읽어낸 자동 인식 매핑은 다음 업로드용 템플릿으로 저장
+                    learned = {
+                        sheet['signature']: {
+                            'headers': sheet['headers'],
+                            'mapping': sheet['mapping'],
+                            'source': 'detected',
+                            'parserVersion': PARSER_VERSION,
+                            'updatedAt': datetime.now().isoformat()
+                        }
+                        for sheet in sheets
+                        if sheet['trades'] and sheet['mappingSource'] == 'detected'
+                    }
+                    if learned and save_column_templates(customer_id, learned):
+                        print(f"🧩 컬럼 매핑 템플릿 학습: {len(learned)}건")
+                    
+                    if not trade_count:
+                        positions_writer.abort()
+                        return json_response(start_response, {
+                            'success': False,
+                            'error': '엑셀 파일에서 거래 데이터를 찾을 수 없습니다. 파일 형식을 확인해주세요.'
+                        }, status='400 Bad Request')
+                    
+                    # 2. 처리된 데이터를 positions 폴더에 저장 (배치 단위로 이어 쓴 파일 확정)
+                    positions_path = positions_writer.close()
                 
-                # KPI 계산 (targetHedgeRatio 사용)
-                kpi = calculate_kpi(anonymized_trades)
+                # 목표 헤지비율 반영 (캐시 적중 시에도 요청 값으로 다시 계산)
                 kpi['targetHedgeRatio'] = target_hedge_ratio  # 목표 헤지비율 추가
                 kpi['gap'] = round(kpi.get('currentHedgeRatio', 0) - target_hedge_ratio, 2)  # 걭 계산
                 
@@ -873,7 +1513,7 @@ def handle_excel_upload(environ, start_response):
                 USER_SETTINGS['targetHedgeRatio'] = target_hedge_ratio
                 USER_SETTINGS['lastUpdated'] = datetime.now().isoformat()
                 
-                print(f"✅ 엑셀 파싱 완료: {len(anonymized_trades)}건의 거래 데이터 (목표헤지: {target_hedge_ratio}%)")
+                print(f"✅ 엑셀 파싱 완료: {trade_count}건의 거래 데이터 (목표헤지: {target_hedge_ratio}%)")
                 
             except Exception as parse_error:
                 print(f"❌ 엑셀 파싱 오류: {parse_error}")
@@ -884,8 +1524,19 @@ def handle_excel_upload(environ, start_response):
         
         else:
             # excel_parser를 사용할 수 없는 경우 Mock 데이터
-            anonymized_trades = generate_mock_positions(10)
-            kpi = calculate_mock_kpi(anonymized_trades)
+            preview_positions = generate_mock_positions(10)
+            kpi = calculate_mock_kpi(preview_positions)
+            sheets = []
+            file_format = None
+            trade_count = len(preview_positions)
+            
+            # 2. 처리된 데이터를 positions 폴더에 저장
+            positions_path = save_customer_data(
+                customer_id=customer_id,
+                data_type='positions',
+                data=preview_positions,
+                filename_prefix='positions'
+            )
             print("⚠️ Mock 데이터 사용 (excel_parser 미사용)")
         
         # ★ 고객별 폴더 자동 생성 및 저장 ★
@@ -894,22 +1545,40 @@ def handle_excel_upload(environ, start_response):
         # 타임스탬프 생성
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
-        # 1. 원본 파일을 고객 uploads 폴더에 저장
-        saved_filename = f"{timestamp}_{file_item.filename}"
-        saved_path = folders['uploads'] / saved_filename
-        
-        with open(saved_path, 'wb') as f:
-            f.write(file_content)
-        
-        print(f"✅ 원본 파일 저장: {saved_path}")
+        # 같은 파일의 원본/백업/레거시 사본이 이미 있으면 다시 쓰지 않음
+        saved_paths = cached_upload.get('savedPaths') if cached_upload else None
+        if saved_paths and os.path.exists(saved_paths['original']):
+            saved_path = Path(saved_paths['original'])
+            backup_path = Path(saved_paths['backup'])
+            legacy_path = saved_paths['legacy']
+            print(f"♻️ 동일 파일 사본 재사용: {saved_path}")
         
-        # 2. 처리된 데이터를 positions 폴더에 저장
-        save_customer_data(
-            customer_id=customer_id,
-            data_type='positions',
-            data=anonymized_trades,
-            filename_prefix='positions'
-        )
+        else:
+            saved_filename = f"{timestamp}_{file_item.filename}"
+            
+            # 1. 원본 파일을 고객 uploads 폴더에 저장
+            saved_path = folders['uploads'] / saved_filename
+            with open(saved_path, 'wb') as f:
+                f.write(file_content)
+            
+            print(f"✅ 원본 파일 저장: {saved_path}")
+            
+            # 백업 폴더에도 사본 저장 (일일 백업)
+            backup_path = folders['backup'] / saved_filename
+            with open(backup_path, 'wb') as f:
+                f.write(file_content)
+            
+            print(f"📦 백업 파일 저장: {backup_path}")
+            
+            # 레거시 uploads 폴더에도 저장 (호환성)
+            legacy_uploads_dir = 'uploads'
+            if not os.path.exists(legacy_uploads_dir):
+                os.makedirs(legacy_uploads_dir)
+            legacy_path = os.path.join(legacy_uploads_dir, f"{customer_id}_{saved_filename}")
+            with open(legacy_path, 'wb') as f:
+                f.write(file_content)
+            
+            print(f"📁 레거시 경로에도 저장: {legacy_path}")
         
         # 3. KPI 데이터를 kpi 폴더에 저장
         save_customer_data(
@@ -919,41 +1588,46 @@ def handle_excel_upload(environ, start_response):
             filename_prefix='kpi'
         )
         
-        # 4. 백업 폴더에도 사본 저장 (일일 백업)
-        backup_path = folders['backup'] / saved_filename
-        with open(backup_path, 'wb') as f:
-            f.write(file_content)
-        
-        print(f"📦 백업 파일 저장: {backup_path}")
-        print(f"📊 처리 완료: {len(anonymized_trades)}건의 거래 데이터")
+        print(f"📊 처리 완료: {trade_count}건의 거래 데이터")
         print(f"📁 고객 폴더: server_data/customers/{customer_id}/")
         
-        # 레거시 uploads 폴더에도 저장 (호환성)
-        legacy_uploads_dir = 'uploads'
-        if not os.path.exists(legacy_uploads_dir):
-            os.makedirs(legacy_uploads_dir)
-        legacy_path = os.path.join(legacy_uploads_dir, f"{customer_id}_{saved_filename}")
-        with open(legacy_path, 'wb') as f:
-            f.write(file_content)
-        
-        print(f"📁 레거시 경로에도 저장: {legacy_path}")
+        # 파싱 결과 캐시 저장 (저장 경로 포함, 다음 재업로드 시 사본 재사용)
+        if parse_cache_key is not None and cached_upload is None:
+            PARSE_RESULT_CACHE.put(parse_cache_key, {
+                'kpi': kpi,
+                'sheets': sheets,
+                'fileFormat': file_format,
+                'tradeCount': trade_count,
+                'preview': preview_positions,
+                'positionsPath': positions_path,
+                'savedPaths': {
+                    'original': str(saved_path),
+                    'backup': str(backup_path),
+                    'legacy': legacy_path
+                }
+            })
         
         # 응답 생성
         result = {
             'success': True,
             'message': '파일 업로드 및 처리 완료',
             'data': {
-                'positions': anonymized_trades,
+                'positions': preview_positions,
+                'positionsTruncated': trade_count > len(preview_positions),
                 'kpi': kpi,
                 'uploadId': f'upload_{timestamp}',
                 'processedAt': datetime.now().isoformat(),
                 'fileName': file_item.filename,
-                'tradeCount': len(anonymized_trades),
+                'fileFormat': file_format,
+                'parseCached': cached_upload is not None,
+                'tradeCount': trade_count,
+                'sheets': sheets,
                 'customerId': customer_id,
                 'savedPaths': {
                     'original': str(saved_path),
                     'backup': str(backup_path),
-                    'legacy': legacy_path
+                    'legacy': legacy_path,
+                    'positions': positions_path
                 }
             }
         }
@@ -1145,10 +1819,17 @@ def handle_hedge_positions_save(environ, start_response):
         remote_addr = environ.get('REMOTE_ADDR', 'unknown')
         print(f"📥 데이터 수신 - 고객: {customer_id}, IP: {remote_addr}")
         
+        # 만기 조회(GET /api/hedge/maturity)에 전달할 포지션 버전
+        portfolio_version = None
+        
         # 포지션 데이터 저장
         if 'positions' in data:
             STORED_POSITIONS = data['positions']
             
+            # 만기 조회용 결제일 인덱스 갱신 (조회 시 재정렬하지 않도록 저장 시점에 1회)
+            MATURITY_INDEX[customer_id] = build_maturity_entry(STORED_POSITIONS)
+            portfolio_version = MATURITY_INDEX[customer_id]['version']
+            
             # 1. 원본 포지션 데이터 저장 (positions 폴더)
             positions_path = save_customer_data(
                 customer_id=customer_id,
@@ -1214,6 +1895,7 @@ def handle_hedge_positions_save(environ, start_response):
             'success': True,
             'message': '포지션 데이터가 서버에 누적 저장되었습니다',
             'count': len(STORED_POSITIONS),
+            'portfolioVersion': portfolio_version,
             'timestamp': datetime.now().isoformat(),
             'customerId': customer_id
         })
@@ -1246,38 +1928,128 @@ def handle_hedge_kpi(start_response):
     })
 
 
-def handle_hedge_suggestions(start_response):
-    """헤지 제안 조회"""
-    suggestions = [
-        {
-            'id': 1,
-            'type': '선물환',
-            'currency': 'USD',
-            'amount': 50000,
-            'rate': 1345.50,
-            'maturityDate': (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d'),
-            'reason': '목표 헤지 비율 달성',
-            'priority': 'high',
-            'expectedCost': 150000
-        },
-        {
-            'id': 2,
-            'type': '옵션',
-            'currency': 'EUR',
-            'amount': 30000,
-            'rate': 1450.20,
-            'maturityDate': (datetime.now() + timedelta(days=60)).strftime('%Y-%m-%d'),
-            'reason': '환율 변동성 대비',
-            'priority': 'medium',
-            'expectedCost': 80000
-        }
-    ]
+def stored_positions_version(positions):
+    """
+    저장된 포지션 리스트의 내용 해시 (같은 리스트면 다시 해시하지 않음)
     
-    return json_response(start_response, {
-        'success': True,
-        'data': suggestions,
-        'timestamp': datetime.now().isoformat()
-    })
+    Args:
+        positions: STORED_POSITIONS
+        
+    Returns:
+        16진수 해시 문자열
+    """
+    global _stored_positions_version
+    
+    stored, version = _stored_positions_version
+    if stored is not positions:
+        version = canonical_hash(positions)
+        _stored_positions_version = (positions, version)
+    return version
+
+
+def handle_hedge_suggestions(environ, start_response, method='GET'):
+    """
+    헤지 거래 제안 (목표 헤지 비율을 허용 오차 안에서 달성하는 최소 거래)
+    
+    요청:
+        GET /api/hedge/suggestions?targetHedgeRatio=70&tolerance=2
+            → 저장된 포지션(STORED_POSITIONS) 기준, 없으면 Mock 포지션 (캐시하지 않음)
+        
+        POST /api/hedge/suggestions
+        {"positions": [...], "targetHedgeRatio": 70, "tolerance": 2, "minTradeKrw": 10000000}
+    
+    응답:
+        {
+            "success": true,
+            "data": [{"id", "type", "product", "currency", "amount", "krwAmount", "rate",
+                      "targetDate", "priority", "reason", ...}],
+            "currencies": {"USD": {"exposure", "hedged", "ratio", "afterRatio", ...}},
+            "portfolioVersion": "ab12...",   # Mock 포지션이면 null
+            "cached": false
+        }
+    
+    통화·만기 구간별 미헤지 금액이 큰 구간부터 채우며, 90일 이내 만기는 선물환,
+    그 외는 옵션으로 제안함. 결과는 포트폴리오 버전(포지션 내용 해시)·목표·허용 오차·
+    날짜별로 KPI 결과 캐시에 저장됨.
+    """
+    # 제안 모듈은 이 엔드포인트를 처음 쓸 때 불러옴
+    from calculators.suggestions import suggest_hedges, SUGGESTION_VERSION, DEFAULT_TOLERANCE
+    
+    try:
+        if method == 'POST':
+            content_length = int(environ.get('CONTENT_LENGTH', 0))
+            request_body = environ['wsgi.input'].read(content_length) if content_length else b'{}'
+            params = json.loads(request_body.decode('utf-8'))
+        else:
+            query = parse_qs(environ.get('QUERY_STRING', ''))
+            params = {key: values[0] for key, values in query.items()}
+        
+        target_hedge_ratio = float(params.get('targetHedgeRatio',
+                                              USER_SETTINGS.get('targetHedgeRatio', 70)))
+        tolerance = float(params.get('tolerance', DEFAULT_TOLERANCE))
+        min_trade = float(params.get('minTradeKrw', 0))
+        
+        # 캐시 키의 포트폴리오 버전은 실제로 계산에 쓰는 포지션의 내용 해시
+        if isinstance(params.get('positions'), list):
+            positions = params['positions']
+            version = canonical_hash(positions)
+        elif STORED_POSITIONS:
+            positions = STORED_POSITIONS
+            version = stored_positions_version(positions)
+        else:
+            # Mock 포지션은 요청마다 달라 재사용될 수 없으므로 버전 없이 캐시하지 않음
+            positions = generate_mock_positions(8)
+            version = None
+        
+        # 같은 포트폴리오 버전·조건·날짜면 캐시된 제안 재사용 (만기 일수가 날짜에 따라 바뀜)
+        cache = KPI_RESULT_CACHE if version is not None else None
+        if cache is not None:
+            cache_key = canonical_hash({
+                'kind': 'hedgeSuggestions',
+                'version': SUGGESTION_VERSION,
+                'portfolio': version,
+                'targetHedgeRatio': target_hedge_ratio,
+                'tolerance': tolerance,
+                'minTradeKrw': min_trade,
+                'date': datetime.now().strftime('%Y-%m-%d')
+            })
+            plan = cache.get(cache_key)
+        else:
+            plan = None
+        cached = plan is not None
+        
+        if not cached:
+            plan = suggest_hedges(positions, target_hedge_ratio, tolerance, min_trade)
+            if cache is not None:
+                cache.put(cache_key, plan)
+        
+        print(f"💡 헤지 제안{' (캐시)' if cached else ''} - {len(plan['suggestions'])}건, "
+              f"목표 {target_hedge_ratio}% ±{tolerance}%p")
+        
+        return json_response(start_response, {
+            'success': True,
+            'data': plan['suggestions'],
+            'currencies': plan['currencies'],
+            'targetHedgeRatio': plan['targetRatio'],
+            'tolerance': plan['tolerance'],
+            'portfolioVersion': version,
+            'cached': cached,
+            'timestamp': datetime.now().isoformat()
+        })
+    
+    except (ValueError, TypeError) as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': f'요청 오류: {str(e)}'
+        }, status='400 Bad Request')
+    except Exception as e:
+        print(f"❌ 헤지 제안 오류: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return json_response(start_response, {
+            'success': False,
+            'error': f'헤지 제안 오류: {str(e)}'
+        }, status='500 Internal Server Error')
 
 
 def handle_hedge_calculate(environ, start_response):
@@ -1289,7 +2061,9 @@ def handle_hedge_calculate(environ, start_response):
         {
             "positions": [...],  # 헤지 포지션 리스트
             "customerId": "C001",  # 선택적
-            "saveResults": true    # 결과 저장 여부
+            "saveResults": true,   # 결과 저장 여부 (부분 집계도 함께 저장)
+            "segment": "대기업",    # 선택적 (롤업 세그먼트)
+            "calculators": ["hedgeRatio"]  # 선택적 (지정 시 해당 계산기와 의존성만 실행)
         }
     
     응답:
@@ -1306,7 +2080,15 @@ def handle_hedge_calculate(environ, start_response):
             },
             "calculatorInfo": {
                 "version": "1.0",
-                "calculators": ["totalExposure", "hedgedAmount", ...]
+                "calculators": ["totalExposure", "hedgedAmount", ...],
+                "cached": false  # KPI 결과 캐시 적중 여부
+            },
+            "validation": {      # 검증 오류 행은 제외하고 계산
+                "totalRows": 120,
+                "validRows": 119,
+                "invalidRows": 1,
+                "errorCount": 1,
+                "errors": [{"index": 7, "field": "amount", "error": "amount 값이 숫자가 아닙니다: 'abc'"}]
             }
         }
     """
@@ -1342,22 +2124,60 @@ def handle_hedge_calculate(environ, start_response):
         
         print(f"🧮 계산 시작 - 포지션 {len(positions)}건, 고객: {customer_id}, 목표헤지: {target_hedge_ratio}%")
         
-        # 계산기 레지스트리를 통해 모든 KPI 계산
-        kpi_results = calculator_registry.calculate_all(
-            positions=positions,
-            context={'customerId': customer_id}
-        )
+        # 요청한 계산기만 실행 (없으면 전체)
+        targets = request_data.get('calculators')
+        unknown = [name for name in (targets or []) if calculator_registry.get(name) is None]
+        if unknown:
+            return json_response(start_response, {
+                'success': False,
+                'error': f'알 수 없는 계산기: {unknown}'
+            }, status='400 Bad Request')
         
-        # 목표헤지비율 및 gap 추가
-        kpi_results['targetHedgeRatio'] = target_hedge_ratio
-        current_hedge_ratio = kpi_results.get('hedgeRatio', 0)
-        kpi_results['gap'] = round(current_hedge_ratio - target_hedge_ratio, 2)
+        # 같은 포지션·목표·계산기 버전이면 캐시된 결과 재사용
+        # 고객별/통화별 권장 규칙 (규칙이 바뀌면 캐시 키도 바뀜)
+        recommendation_rules = get_recommendation_rules()
+        
+        cache_key = None
+        cached_entry = None
+        if KPI_RESULT_CACHE is not None:
+            versions = calculator_registry.calculator_versions(targets)
+            versions['recommendationRules'] = recommendation_rules.cache_token(customer_id)
+            # 클라이언트가 보낸 포지션은 정규화 대신 본문 바이트를 해시 (대용량에서 계산보다 느려지지 않게)
+            cache_key = KPI_RESULT_CACHE.make_key(
+                raw_digest(request_body), target_hedge_ratio, versions, targets
+            )
+            cached_entry = KPI_RESULT_CACHE.get(cache_key)
+        cached = cached_entry is not None
+        
+        if cached:
+            kpi_results = cached_entry['kpi']
+            validation = cached_entry['validation']
+        else:
+            # 포지션 1회 검증 후 계산기 레지스트리로 KPI 계산 (의존성 DAG 순서)
+            kpi_results, report = calculator_registry.calculate_with_report(
+                positions=positions,
+                context={'customerId': customer_id, 'recommendationRules': recommendation_rules},
+                targets=targets
+            )
+            validation = report.to_dict()
+            
+            # 목표헤지비율 및 gap 추가
+            kpi_results['targetHedgeRatio'] = target_hedge_ratio
+            current_hedge_ratio = kpi_results.get('hedgeRatio') or 0
+            kpi_results['gap'] = round(current_hedge_ratio - target_hedge_ratio, 2)
+            
+            if cache_key is not None:
+                KPI_RESULT_CACHE.put(cache_key, {'kpi': kpi_results, 'validation': validation})
+        
+        if validation['errorCount']:
+            print(f"⚠️ 검증 오류 {validation['invalidRows']}건 제외 "
+                  f"({validation['validRows']}/{validation['totalRows']}건으로 계산)")
         
         # 사용자 설정 업데이트
         USER_SETTINGS['targetHedgeRatio'] = target_hedge_ratio
         USER_SETTINGS['lastUpdated'] = datetime.now().isoformat()
         
-        print(f"✅ 계산 완료: {kpi_results}")
+        print(f"✅ 계산 완료{' (캐시)' if cached else ''}: {kpi_results}")
         
         # 결과 저장 (선택적)
         if save_results:
@@ -1372,6 +2192,11 @@ def handle_hedge_calculate(environ, start_response):
                     },
                     filename_prefix='calculated_kpi'
                 )
+                save_partial_state(customer_id, build_partial(
+                    calculator_registry, positions,
+                    customerId=customer_id, segment=request_data.get('segment'),
+                    currencies=currency_exposures(positions)
+                ))
                 print(f"💾 KPI 결과 저장 완료")
             except Exception as save_error:
                 print(f"⚠️ KPI 저장 실패 (계산은 성공): {save_error}")
@@ -1381,10 +2206,12 @@ def handle_hedge_calculate(environ, start_response):
             'success': True,
             'timestamp': datetime.now().isoformat(),
             'kpi': kpi_results,
+            'validation': validation,
             'calculatorInfo': {
                 'version': '1.0',
                 'calculators': calculator_registry.list_calculators(),
-                'totalCalculators': len(calculator_registry.list_calculators())
+                'totalCalculators': len(calculator_registry.list_calculators()),
+                'cached': cached
             }
         }
         
@@ -1405,6 +2232,669 @@ def handle_hedge_calculate(environ, start_response):
         }, status='500 Internal Server Error')
 
 
+def baseline_conflict_response(start_response, reason):
+    """증분 기준 상태가 없거나 다를 때 409 응답 (클라이언트는 positions를 포함해 재요청)"""
+    return json_response(start_response, {
+        'success': False,
+        'error': f'{reason} positions를 포함해 다시 요청하세요.',
+        'requiresBaseline': True
+    }, status='409 Conflict')
+
+
+def handle_hedge_calculate_delta(environ, start_response):
+    """
+    헤지 KPI 증분 계산 (포지션 변경분만 전송)
+    
+    요청:
+        POST /api/hedge/calculate/delta
+        {
+            "customerId": "C001",
+            "positions": [...],     # 선택적 - 기준 포지션 전체 (최초 1회 또는 재동기화 시)
+            "deltas": [             # 변경분
+                {"op": "add", "position": {"id": "T9", ...}},
+                {"op": "update", "position": {"id": "T3", ...}},
+                {"op": "remove", "id": "T1"}
+            ],
+            "baselineVersion": "...",   # positions 없이 보낼 때 필수 - 직전 응답의 값
+            "seq": 4,                   # positions 없이 보낼 때 필수 - 직전 응답의 값
+            "targetHedgeRatio": 70
+        }
+    
+    응답:
+        {
+            "success": true,
+            "kpi": {...},            # /api/hedge/calculate와 동일한 형태
+            "applied": 3,
+            "errors": [],
+            "positionCount": 120,
+            "baselineVersion": "...", # 다음 요청에 그대로 전달
+            "seq": 5
+        }
+    
+    기준 상태는 워커 프로세스 메모리에 보관됨. 요청을 받은 워커에 상태가 없거나
+    (다른 워커가 기준을 받음) 버전/순번이 다르면 (다른 워커가 중간 델타를 적용함)
+    409를 반환하며 클라이언트는 positions를 포함해 다시 요청해야 함
+    """
+    try:
+        content_length = int(environ.get('CONTENT_LENGTH', 0))
+        if content_length == 0:
+            return json_response(start_response, {
+                'success': False,
+                'error': '요청 본문이 비어있습니다'
+            }, status='400 Bad Request')
+        
+        request_body = environ['wsgi.input'].read(content_length)
+        request_data = json.loads(request_body.decode('utf-8'))
+        
+        customer_id = request_data.get('customerId', 'default')
+        deltas = request_data.get('deltas', [])
+        
+        target_hedge_ratio = request_data.get('targetHedgeRatio', USER_SETTINGS.get('targetHedgeRatio', 70))
+        try:
+            target_hedge_ratio = float(target_hedge_ratio)
+        except (ValueError, TypeError):
+            target_hedge_ratio = 70.0
+        
+        # 기준 포지션이 오면 상태 재적재 (새 기준 버전 발급)
+        if 'positions' in request_data:
+            try:
+                baseline = INCREMENTAL_KPI[customer_id] = {
+                    'state': IncrementalKPI(calculator_registry, request_data['positions']),
+                    'baselineVersion': uuid.uuid4().hex,
+                    'seq': 0,
+                    'lock': threading.Lock()
+                }
+            except ValueError as e:
+                return json_response(start_response, {
+                    'success': False,
+                    'error': f'기준 포지션 오류: {str(e)}'
+                }, status='400 Bad Request')
+        else:
+            baseline = INCREMENTAL_KPI.get(customer_id)
+            if baseline is None:
+                return baseline_conflict_response(start_response, '기준 포지션이 없습니다.')
+        
+        incremental = baseline['state']
+        
+        # 같은 (baselineVersion, seq)로 동시에 온 요청이 둘 다 적용되지 않도록
+        # 확인, 적용, seq 증가, 결과 조회를 잠금 하나로 묶음
+        with baseline['lock']:
+            # 이 워커의 상태가 클라이언트가 마지막으로 받은 상태와 같아야 델타 적용
+            if 'positions' not in request_data and (
+                    INCREMENTAL_KPI.get(customer_id) is not baseline
+                    or request_data.get('baselineVersion') != baseline['baselineVersion']
+                    or request_data.get('seq') != baseline['seq']):
+                return baseline_conflict_response(start_response, '기준 포지션 버전이 다릅니다.')
+            
+            outcome = incremental.apply(deltas)
+            if outcome['applied']:
+                baseline['seq'] += 1
+            seq = baseline['seq']
+            
+            # /api/hedge/calculate와 같은 권장 규칙 컨텍스트 (같은 포트폴리오면 같은 권장사항)
+            kpi_results = incremental.results(context={
+                'customerId': customer_id,
+                'recommendationRules': get_recommendation_rules()
+            })
+        kpi_results['targetHedgeRatio'] = target_hedge_ratio
+        current_hedge_ratio = kpi_results.get('hedgeRatio') or 0
+        kpi_results['gap'] = round(current_hedge_ratio - target_hedge_ratio, 2)
+        
+        print(f"🧮 증분 계산 - 고객: {customer_id}, 델타 {outcome['applied']}건 적용, "
+              f"오류 {len(outcome['errors'])}건, 포지션 {len(incremental)}건")
+        
+        return json_response(start_response, {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'kpi': kpi_results,
+            'applied': outcome['applied'],
+            'errors': outcome['errors'],
+            'positionCount': len(incremental),
+            'baselineVersion': baseline['baselineVersion'],
+            'seq': seq
+        })
+        
+    except json.JSONDecodeError as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': f'JSON 파싱 오류: {str(e)}'
+        }, status='400 Bad Request')
+    except Exception as e:
+        print(f"❌ 증분 계산 오류: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return json_response(start_response, {
+            'success': False,
+            'error': f'계산 오류: {str(e)}'
+        }, status='500 Internal Server Error')
+
+
+def handle_admin_rollup(environ, start_response):
+    """
+    전사/세그먼트 KPI 롤업 (저장된 고객별 부분 집계 병합)
+    
+    요청:
+        GET /api/admin/rollup
+        GET /api/admin/rollup?segment=대기업
+        GET /api/admin/rollup?customers=C001,C002
+    
+    응답:
+        {
+            "success": true,
+            "kpi": {...},              # /api/hedge/calculate와 동일한 계산기 결과
+            "customerCount": 12000,    # 병합한 고객 수
+            "positionCount": 3400000,
+            "staleCount": 3,           # 계산기 버전이 바뀌어 다시 저장이 필요한 고객 수
+            "staleCustomers": ["C017", ...]
+        }
+    
+    고객 포지션은 읽지 않고 /api/hedge/calculate (saveResults)가 저장한
+    partial_state.json만 병합함
+    """
+    try:
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        segment = query.get('segment', [None])[0]
+        customers = query.get('customers', [None])[0]
+        customer_ids = [c.strip() for c in customers.split(',') if c.strip()] if customers else None
+        
+        rollup = rollup_partials(
+            calculator_registry,
+            iter_partial_states(customer_ids, segment),
+            context={'customerId': 'rollup', 'segment': segment}
+        )
+        
+        print(f"🏢 롤업 - 고객 {rollup['merged']}명, 포지션 {rollup['rows']}건"
+              f"{f', 세그먼트: {segment}' if segment else ''}")
+        
+        return json_response(start_response, {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'segment': segment,
+            'kpi': rollup['kpi'],
+            'customerCount': rollup['merged'],
+            'positionCount': rollup['rows'],
+            'staleCount': len(rollup['stale']),
+            'staleCustomers': rollup['stale'][:100]
+        })
+        
+    except Exception as e:
+        print(f"❌ 롤업 오류: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return json_response(start_response, {
+            'success': False,
+            'error': f'롤업 오류: {str(e)}'
+        }, status='500 Internal Server Error')
+
+
+def handle_action_screen(environ, start_response, method):
+    """
+    조치 필요 고객 목록 ("오늘 조치가 필요한 고객")
+    
+    요청:
+        GET /api/admin/action-screen?segment=대기업&limit=200
+            → 저장된 고객별 부분 집계(partial_state.json)의 통화별 헤지 비율로 판정
+              (통화별 금액이 없는 이전 부분 집계는 고객 전체 헤지 비율 1건)
+        
+        POST /api/admin/action-screen
+        {
+            "portfolios": [{"customerId": "C001", "currency": "USD",
+                            "hedgeRatio": 42.5, "exposure": 1200000}, ...],
+            "rules": {...},     # 선택 - 없으면 저장된 규칙표
+            "limit": 200
+        }
+    
+    응답:
+        {
+            "success": true,
+            "screened": 12000,
+            "actionCount": 340,
+            "actions": [{"customerId", "currency", "hedgeRatio", "recommendation",
+                         "min", "max", "shortfall", "excess"}, ...]  # 긴급 → 추가헤지 → 과도헤지
+        }
+    
+    규칙표는 한 번 컴파일되어 모든 포트폴리오의 헤지 비율 벡터에 배열 연산으로 적용됨
+    """
+    try:
+        if method == 'POST':
+            content_length = int(environ.get('CONTENT_LENGTH', 0))
+            request_body = environ['wsgi.input'].read(content_length) if content_length else b'{}'
+            params = json.loads(request_body.decode('utf-8'))
+            portfolios = params.get('portfolios') or []
+            rules = (RecommendationRules.from_dict(params['rules'])
+                     if params.get('rules') else get_recommendation_rules())
+        else:
+            query = parse_qs(environ.get('QUERY_STRING', ''))
+            params = {key: values[0] for key, values in query.items()}
+            rules = get_recommendation_rules()
+            portfolios = []
+            for partial in iter_partial_states(segment=params.get('segment')):
+                rows = partial.get('currencies')
+                if rows is None:
+                    states = partial.get('calculators') or {}
+                    rows = [{
+                        'currency': None,
+                        'exposure': float((states.get('totalExposure') or {}).get('state') or 0.0),
+                        'hedged': float((states.get('hedgedAmount') or {}).get('state') or 0.0)
+                    }]
+                for row in rows:
+                    exposure = row['exposure']
+                    portfolios.append({
+                        'customerId': partial.get('customerId'),
+                        'currency': row['currency'],
+                        'hedgeRatio': row['hedged'] / exposure * 100 if exposure else 0.0,
+                        'exposure': exposure
+                    })
+        
+        limit = int(params.get('limit', 200))
+        actions = rules.screen(portfolios)
+        
+        print(f"🚨 조치 필요 - {len(actions)}/{len(portfolios)}건")
+        
+        return json_response(start_response, {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'rulesVersion': rules.fingerprint,
+            'screened': len(portfolios),
+            'actionCount': len(actions),
+            'actions': actions[:limit]
+        })
+    
+    except (ValueError, TypeError) as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': f'요청 오류: {str(e)}'
+        }, status='400 Bad Request')
+    except ImportError as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': str(e)
+        }, status='501 Not Implemented')
+    except Exception as e:
+        print(f"❌ 조치 목록 오류: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return json_response(start_response, {
+            'success': False,
+            'error': f'조치 목록 오류: {str(e)}'
+        }, status='500 Internal Server Error')
+
+
+def handle_recommendation_rules(environ, start_response, method):
+    """
+    헤지 권장 규칙표 조회/저장
+    
+    요청:
+        GET /api/admin/recommendation-rules
+        POST /api/admin/recommendation-rules
+        {
+            "default": {"min": 70, "max": 90, "urgentBelow": 30},
+            "rules": [
+                {"currency": "JPY", "min": 50, "max": 80},
+                {"customerId": "C001", "currency": "USD", "min": 80, "max": 95}
+            ]
+        }
+    """
+    try:
+        if method != 'POST':
+            stored = {}
+            if RECOMMENDATION_RULES_PATH.exists():
+                with open(RECOMMENDATION_RULES_PATH, 'r', encoding='utf-8') as f:
+                    stored = json.load(f)
+            return json_response(start_response, {
+                'success': True,
+                'rules': stored,
+                'rulesVersion': get_recommendation_rules().fingerprint
+            })
+        
+        content_length = int(environ.get('CONTENT_LENGTH', 0))
+        request_body = environ['wsgi.input'].read(content_length) if content_length else b'{}'
+        data = json.loads(request_body.decode('utf-8'))
+        
+        # 저장 전에 컴파일하여 잘못된 규칙 거부
+        rules = RecommendationRules.from_dict(data)
+        
+        RECOMMENDATION_RULES_PATH.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomic(RECOMMENDATION_RULES_PATH, data, indent=2)
+        
+        rule_count = len(data.get('rules') or [])
+        print(f"✅ 헤지 권장 규칙 저장 - 규칙 {rule_count}건")
+        
+        return json_response(start_response, {
+            'success': True,
+            'rulesVersion': rules.fingerprint,
+            'ruleCount': rule_count
+        })
+    
+    except (ValueError, TypeError, AttributeError) as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': f'규칙 오류: {str(e)}'
+        }, status='400 Bad Request')
+
+
+def handle_column_templates(environ, start_response, method):
+    """
+    고객 컬럼 매핑 템플릿 조회/저장 (브라우저 컬럼 매퍼에서 확인한 매핑)
+    
+    요청:
+        GET /api/column-mapping/templates?customerId=C001
+        POST /api/column-mapping/templates
+        {
+            "customerId": "C001",
+            "headers": ["거래번호", "거래처", "통화", "금액", "결제일"],
+            "mapping": {"id": 0, "counterparty": 1, "currency": 2, "amount": 3, "settlementDate": 4}
+        }
+        (mapping은 excel-column-mapper.js 형식: 필드 → 0부터 시작하는 컬럼 번호)
+    """
+    if not EXCEL_PARSER_AVAILABLE:
+        return json_response(start_response, {
+            'success': False,
+            'error': 'excel_parser 모듈을 사용할 수 없습니다'
+        }, status='501 Not Implemented')
+    
+    try:
+        if method != 'POST':
+            query = parse_qs(environ.get('QUERY_STRING', ''))
+            customer_id = query.get('customerId', ['default'])[0]
+            templates = load_column_templates(customer_id)
+            return json_response(start_response, {
+                'success': True,
+                'customerId': customer_id,
+                'data': [
+                    {
+                        'signature': signature,
+                        'headers': entry.get('headers', []),
+                        'mapping': mapping_to_browser(entry['mapping']),
+                        'source': entry.get('source'),
+                        'updatedAt': entry.get('updatedAt')
+                    }
+                    for signature, entry in templates.items()
+                ]
+            })
+        
+        content_length = int(environ.get('CONTENT_LENGTH', 0))
+        request_body = environ['wsgi.input'].read(content_length) if content_length else b'{}'
+        data = json.loads(request_body.decode('utf-8'))
+        
+        customer_id = data.get('customerId') or 'default'
+        headers = data.get('headers')
+        if not isinstance(headers, list) or not headers:
+            raise ValueError('headers(헤더 행 값 리스트)가 필요합니다')
+        
+        mapping = mapping_from_browser(data.get('mapping'))
+        if mapping['amount'] is None:
+            raise ValueError('금액(amount) 컬럼 매핑이 필요합니다')
+        
+        signature = header_signature(headers)
+        save_column_templates(customer_id, {
+            signature: {
+                'headers': normalize_headers(headers),
+                'mapping': mapping,
+                'source': 'confirmed',
+                'parserVersion': PARSER_VERSION,
+                'updatedAt': datetime.now().isoformat()
+            }
+        })
+        print(f"🧩 컬럼 매핑 템플릿 저장 - 고객: {customer_id}, 지문: {signature}")
+        
+        return json_response(start_response, {
+            'success': True,
+            'customerId': customer_id,
+            'signature': signature
+        })
+    
+    except (ValueError, TypeError, AttributeError) as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': f'매핑 오류: {str(e)}'
+        }, status='400 Bad Request')
+
+
+def handle_column_template_match(environ, start_response):
+    """
+    헤더 행에 맞는 저장된 컬럼 매핑 조회 (브라우저 매퍼가 자동 인식 전에 호출)
+    
+    요청:
+        POST /api/column-mapping/match
+        {"customerId": "C001", "headers": ["거래번호", "거래처", ...]}
+    
+    응답:
+        {"success": true, "data": {"signature", "mapping": {...} 또는 null, "source"}}
+    """
+    if not EXCEL_PARSER_AVAILABLE:
+        return json_response(start_response, {
+            'success': False,
+            'error': 'excel_parser 모듈을 사용할 수 없습니다'
+        }, status='501 Not Implemented')
+    
+    try:
+        content_length = int(environ.get('CONTENT_LENGTH', 0))
+        request_body = environ['wsgi.input'].read(content_length) if content_length else b'{}'
+        data = json.loads(request_body.decode('utf-8'))
+        
+        headers = data.get('headers')
+        if not isinstance(headers, list):
+            raise ValueError('headers(헤더 행 값 리스트)가 필요합니다')
+        
+        signature = header_signature(headers)
+        templates = load_column_templates(data.get('customerId') or 'default')
+        entry = templates.get(signature)
+        if entry is not None and signature not in usable_column_templates({signature: entry}):
+            entry = None
+        
+        return json_response(start_response, {
+            'success': True,
+            'data': {
+                'signature': signature,
+                'mapping': mapping_to_browser(entry['mapping']) if entry else None,
+                'source': entry.get('source') if entry else None
+            }
+        })
+    
+    except (ValueError, TypeError, AttributeError) as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': f'요청 오류: {str(e)}'
+        }, status='400 Bad Request')
+
+
+def handle_hedge_scenarios(environ, start_response):
+    """
+    환율 충격 시나리오 계산 (원화 환산액 기준)
+    
+    요청:
+        POST /api/hedge/scenarios
+        {
+            "positions": [...],   # ExcelParser 형식 (currency, krwAmount, hedgeStatus, type)
+            "grid": {"currencies": ["USD", "EUR"], "maxPct": 10, "stepPct": 1, "parallel": true},
+            "scenarios": [{"name": "2022-09", "shocks": {"USD": 7.5, "EUR": 4.2}}]
+        }
+        grid/scenarios 둘 다 없으면 포트폴리오 통화별 ±1..10% 격자
+    
+    응답:
+        {
+            "success": true,
+            "currencies": ["USD", "EUR"],
+            "base": {"totalExposure": ..., "hedgedAmount": ..., "unhedgedGap": ..., "hedgeRatio": ...},
+            "scenarios": [
+                {"name": "USD -10%", "shocks": {"USD": -10.0}, "totalExposure": ...,
+                 "hedgedAmount": ..., "unhedgedGap": ..., "hedgeRatio": ..., "pnl": ...},
+                ...
+            ],
+            "scenarioCount": 60,
+            "validation": {...}
+        }
+    """
+    try:
+        content_length = int(environ.get('CONTENT_LENGTH', 0))
+        if content_length == 0:
+            return json_response(start_response, {
+                'success': False,
+                'error': '요청 본문이 비어있습니다'
+            }, status='400 Bad Request')
+        
+        request_body = environ['wsgi.input'].read(content_length)
+        request_data = json.loads(request_body.decode('utf-8'))
+        
+        positions = request_data.get('positions', [])
+        if not positions:
+            return json_response(start_response, {
+                'success': False,
+                'error': '포지션 데이터가 없습니다'
+            }, status='400 Bad Request')
+        
+        # 시나리오 모듈은 이 엔드포인트를 처음 쓸 때 불러옴
+        from calculators.scenario import run_fx_scenarios, shock_set_from_request
+        
+        portfolio_currencies = list(dict.fromkeys(
+            p.get('currency') for p in positions if isinstance(p, dict) and p.get('currency')
+        ))
+        
+        try:
+            shocks = shock_set_from_request(request_data, portfolio_currencies)
+        except (ValueError, TypeError, AttributeError) as e:
+            return json_response(start_response, {
+                'success': False,
+                'error': f'시나리오 설정 오류: {str(e)}'
+            }, status='400 Bad Request')
+        
+        result = run_fx_scenarios(positions, shocks)
+        
+        print(f"📈 시나리오 계산 - 포지션 {len(positions)}건, 시나리오 {len(shocks)}개")
+        
+        return json_response(start_response, {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            **result,
+            'scenarioCount': len(shocks)
+        })
+        
+    except json.JSONDecodeError as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': f'JSON 파싱 오류: {str(e)}'
+        }, status='400 Bad Request')
+    except ImportError as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': str(e)
+        }, status='501 Not Implemented')
+    except Exception as e:
+        print(f"❌ 시나리오 계산 오류: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return json_response(start_response, {
+            'success': False,
+            'error': f'시나리오 계산 오류: {str(e)}'
+        }, status='500 Internal Server Error')
+
+
+def build_maturity_entry(positions):
+    """
+    만기 조회용 결제일 인덱스 + 버전 (포지션 내용 해시)
+    
+    Args:
+        positions: 포지션 리스트
+        
+    Returns:
+        {'index': MaturityIndex, 'version': 16진수 해시 문자열}
+    """
+    from calculators.maturity import MaturityIndex
+    
+    return {
+        'index': MaturityIndex([p for p in positions if isinstance(p, dict)]),
+        'version': canonical_hash(positions)
+    }
+
+
+def handle_hedge_maturity(environ, start_response, method):
+    """
+    만기 사다리 / N일 내 만기 조회
+    
+    요청:
+        GET /api/hedge/maturity?customerId=C001&version=ab12...&horizons=7,30,90&granularity=month
+            → 포지션 저장 시 만들어 둔 결제일 인덱스로 응답 (포지션 재순회 없음)
+              version은 포지션 저장/POST 응답의 portfolioVersion (필수)
+        
+        POST /api/hedge/maturity
+        {"customerId": "C001", "positions": [...], "horizons": [7, 30], "granularity": "week"}
+            → 인덱스를 새로 만들어 저장한 뒤 응답
+    
+    인덱스는 워커 프로세스 메모리에 보관되므로, GET을 받은 워커에 인덱스가 없거나
+    version이 다르면 (다른 워커가 최신 포지션을 받음) 409를 반환하며 클라이언트는
+    positions를 포함해 POST로 다시 요청해야 함
+    
+    응답:
+        {
+            "success": true,
+            "portfolioVersion": "ab12...",
+            "horizons": {"7": {"exposure": ..., "hedged": ..., "unhedged": ..., "count": 3}, ...},
+            "buckets": [{"period": "2026-03", "start": "2026-03-01", "end": "2026-03-31", ...}],
+            "overdue": {...},
+            "unknown": {...},
+            "positionCount": 120
+        }
+    """
+    # 만기 모듈은 이 엔드포인트를 처음 쓸 때 불러옴
+    from calculators.maturity import DEFAULT_HORIZONS
+    
+    try:
+        if method == 'POST':
+            content_length = int(environ.get('CONTENT_LENGTH', 0))
+            request_body = environ['wsgi.input'].read(content_length) if content_length else b'{}'
+            params = json.loads(request_body.decode('utf-8'))
+        else:
+            query = parse_qs(environ.get('QUERY_STRING', ''))
+            params = {key: values[0] for key, values in query.items()}
+            if 'horizons' in params:
+                params['horizons'] = [h for h in params['horizons'].split(',') if h.strip()]
+        
+        customer_id = params.get('customerId', 'default')
+        
+        if params.get('positions') is not None:
+            entry = MATURITY_INDEX[customer_id] = build_maturity_entry(params['positions'])
+        
+        else:
+            # 이 워커의 인덱스가 클라이언트가 마지막으로 받은 포지션과 같아야 응답
+            entry = MATURITY_INDEX.get(customer_id)
+            if entry is None:
+                conflict = '만기 인덱스가 없습니다.'
+            elif params.get('version') != entry['version']:
+                conflict = '만기 인덱스 버전이 다릅니다.'
+            else:
+                conflict = None
+            if conflict:
+                return json_response(start_response, {
+                    'success': False,
+                    'error': f'{conflict} positions를 포함해 POST로 요청하세요.',
+                    'requiresBaseline': True
+                }, status='409 Conflict')
+        
+        index = entry['index']
+        
+        horizons = [int(h) for h in (params.get('horizons') or DEFAULT_HORIZONS)]
+        granularity = params.get('granularity', 'month')
+        
+        return json_response(start_response, {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'customerId': customer_id,
+            'portfolioVersion': entry['version'],
+            'horizons': index.horizons(horizons),
+            'buckets': index.ladder(granularity),
+            'overdue': index.overdue(),
+            'unknown': index.unknown,
+            'positionCount': len(index) + index.unknown['count']
+        })
+        
+    except (ValueError, TypeError) as e:
+        return json_response(start_response, {
+            'success': False,
+            'error': f'요청 오류: {str(e)}'
+        }, status='400 Bad Request')
+
+
 def generate_mock_positions(count=10):
     """Mock 포지션 데이터 생성 (익명화됨)"""
     positions = []
@@ -0,0 +1,946 @@
+"""
+계산기 레지스트리 테스트
+"""
+
+from calculators.base_calculator import BaseCalculator
+from calculators.registry import CalculatorRegistry
+from calculators.total_exposure import TotalExposureCalculator
+from calculators.hedged_amount import HedgedAmountCalculator
+from calculators.hedge_ratio import HedgeRatioCalculator
+from calculators.unhedged_gap import UnhedgedGapCalculator
+from calculators.avg_hedge_rate import AvgHedgeRateCalculator
+from calculators.recommendation import RecommendationCalculator
+from calculators.position_batch import PositionBatch, NUMPY_AVAILABLE
+from calculators.incremental import IncrementalKPI
+from calculators.portfolio_batch import iter_portfolio_results
+from calculators.result_cache import KPIResultCache, raw_digest
+from calculators.metrics import CalculatorMetrics
+from calculators.scenario import ShockSet, run_fx_scenarios
+from calculators.fx_var import FXVaRCalculator
+from calculators.maturity import MaturityIndex, MaturityLadderCalculator
+from calculators.builtin import BUILTIN_MANIFEST
+from calculators.plugins import LazyCalculator, lazy_from_manifest
+from calculators.partials import build_partial, rollup_partials
+from calculators.rules import RecommendationRules
+from calculators.suggestions import suggest_hedges
+
+
+SAMPLE_POSITIONS = [
+    {'currency': 'USD', 'amount': '1,000,000', 'direction': 'exposure', 'rate': '1,350'},
+    {'currency': 'USD', 'amount': 400000, 'direction': 'hedge', 'rate': 1340.5},
+    {'currency': 'EUR', 'amount': '$300,000', 'direction': '헤지', 'rate': '1,450.2'},
+    {'currency': 'JPY', 'amount': 'abc', 'direction': 'Hedged', 'rate': 9.5},
+    {'currency': 'EUR', 'amount': 250000.5, 'direction': 'exposure', 'rate': 0},
+]
+
+
+def build_registry():
+    """기본 계산기 6종이 등록된 레지스트리"""
+    registry = CalculatorRegistry()
+    registry.register(TotalExposureCalculator())
+    registry.register(HedgedAmountCalculator())
+    registry.register(HedgeRatioCalculator())
+    registry.register(UnhedgedGapCalculator())
+    registry.register(AvgHedgeRateCalculator())
+    registry.register(RecommendationCalculator())
+    return registry
+
+
+def test_fused_matches_individual():
+    """단일 패스 실행 결과가 개별 실행 결과와 동일한지 확인"""
+
+    print("=" * 60)
+    print("단일 패스(fused) 계산 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+
+    fused = registry.calculate_all(SAMPLE_POSITIONS)
+    individual = registry.calculate_all(SAMPLE_POSITIONS, fused=False)
+
+    print(f"  - fused: {fused}")
+    print(f"  - individual: {individual}")
+
+    assert fused == individual
+    assert fused['totalExposure'] == 1950000.5
+    assert fused['hedgedAmount'] == 700000.0
+    assert fused['recommendation'] == "추가헤지필요"
+
+
+def test_invalid_input_returns_none():
+    """필수 필드가 빠진 포지션은 기존처럼 None 결과"""
+
+    registry = build_registry()
+    results = registry.calculate_all([{'currency': 'USD', 'amount': 100}])
+
+    assert all(value is None for value in results.values())
+
+
+def test_position_batch_matches_dicts():
+    """컬럼형 배치 입력 결과가 딕셔너리 입력 결과와 동일한지 확인"""
+
+    print("\n" + "=" * 60)
+    print("컬럼형 PositionBatch 계산 테스트")
+    print("=" * 60)
+
+    if not NUMPY_AVAILABLE:
+        print("⚠️ numpy 미설치 - 건너뜀")
+        return
+
+    registry = build_registry()
+
+    batch = PositionBatch.from_positions(SAMPLE_POSITIONS)
+    from_batch = registry.calculate_all(batch)
+    from_dicts = registry.calculate_all(SAMPLE_POSITIONS, fused=False)
+
+    print(f"  - batch: {from_batch}")
+
+    assert from_batch == from_dicts
+    assert batch.categories['direction'] == ['exposure', 'hedge', '헤지', 'hedged']
+    assert batch.is_hedge.tolist() == [False, True, True, True, False]
+
+    columns = PositionBatch.from_columns(
+        amount=[1000.0, 600.0],
+        direction=['exposure', 'HEDGE'],
+        rate=[0.0, 1300.0]
+    )
+    results = registry.calculate_all(columns)
+    assert results['hedgeRatio'] == 37.5
+    assert results['avgHedgeRate'] == 1300.0
+
+
+def test_dirty_rows_agree():
+    """None/숫자가 아닌 값이 섞인 행도 배치/단일 패스/개별 계산 결과가 같은지 확인"""
+
+    registry = build_registry()
+    dirty = [
+        {'currency': 'USD', 'amount': 100, 'direction': 'hedge', 'rate': None},
+        {'currency': 'USD', 'amount': 100, 'direction': 'hedge', 'rate': 1300},
+        {'currency': 'USD', 'amount': None, 'direction': 'exposure', 'rate': 'n/a'},
+        {'currency': 'USD', 'amount': '1,000', 'direction': 'exposure', 'rate': 1300},
+    ]
+
+    legacy = {}
+    for calculator in registry.execution_plan():
+        legacy[calculator.name] = registry.calculate_one(calculator.name, dirty, dict(legacy))
+    fused, _ = registry.calculate_stream(iter(dirty))
+    batched = registry.calculate_all(dirty)
+
+    print(f"  - legacy: {legacy}")
+    print(f"  - fused: {fused}")
+    print(f"  - batch: {batched}")
+
+    assert legacy['avgHedgeRate'] == 650.0
+    assert fused == legacy
+    assert batched == legacy
+
+
+class _CycleA(BaseCalculator):
+    name = "cycleA"
+    dependencies = ["cycleB"]
+
+    def calculate(self, positions, context):
+        return 0
+
+
+class _CycleB(BaseCalculator):
+    name = "cycleB"
+    dependencies = ["cycleA"]
+
+    def calculate(self, positions, context):
+        return 0
+
+
+def test_dependency_dag():
+    """DAG 실행 계획, 순환 감지, 부분 실행, 병렬 실행 확인"""
+
+    print("\n" + "=" * 60)
+    print("의존성 DAG 스케줄러 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+
+    snapshot = registry.snapshot()
+    print(f"  - 실행 단계: {snapshot.level_names}")
+    assert snapshot.plan == ('totalExposure', 'hedgedAmount', 'hedgeRatio',
+                             'unhedgedGap', 'avgHedgeRate', 'recommendation')
+    assert snapshot.level_names[-1] == ['recommendation']
+
+    # 필요한 조상만 실행
+    subset = registry.calculate_all(SAMPLE_POSITIONS, targets=['hedgeRatio'])
+    assert list(subset) == ['totalExposure', 'hedgedAmount', 'hedgeRatio']
+
+    # 순환 의존성은 등록 거부 (기존 계획 유지)
+    registry.register(_CycleA())
+    try:
+        registry.register(_CycleB())
+        assert False, "순환 의존성이 감지되지 않음"
+    except ValueError as e:
+        print(f"  - 순환 감지: {e}")
+    finally:
+        registry.unregister('cycleA')
+    assert registry.get('cycleB') is None
+
+    # 스레드 풀 동시 실행 결과는 순차 실행과 동일
+    sequential = registry.calculate_all(SAMPLE_POSITIONS)
+    registry.set_max_workers(4)
+    try:
+        parallel = registry.calculate_all(SAMPLE_POSITIONS)
+    finally:
+        registry.set_max_workers(0)
+    assert parallel == sequential
+
+
+class _Extra(BaseCalculator):
+    name = "extra"
+    dependencies = ["totalExposure"]
+    priority = 90
+
+    def calculate(self, positions, context):
+        return context['totalExposure']
+
+
+def test_registry_snapshot():
+    """등록/해제가 진행 중인 계산 요청의 계산기 구성을 바꾸지 않는지 확인"""
+    import threading
+
+    print("\n" + "=" * 60)
+    print("레지스트리 스냅샷 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+    before = registry.snapshot()
+    base = registry.calculate_all(SAMPLE_POSITIONS)
+
+    # 스냅샷은 불변이고 교체 후에도 이전 구성을 유지
+    registry.register(_Extra())
+    after = registry.snapshot()
+    registry.unregister('extra')
+    assert 'extra' not in before.calculators and 'extra' in after.calculators
+    assert after.plan.index('extra') > after.plan.index('totalExposure')
+    try:
+        before.calculators['extra'] = _Extra()
+        assert False, "스냅샷이 수정됨"
+    except TypeError:
+        pass
+
+    # 다른 스레드가 등록/해제를 반복해도 각 결과는 어느 한 구성과 정확히 일치
+    stop = threading.Event()
+
+    def churn():
+        while not stop.is_set():
+            registry.register(_Extra())
+            registry.unregister('extra')
+
+    worker = threading.Thread(target=churn)
+    worker.start()
+    try:
+        for _ in range(200):
+            results = registry.calculate_all(SAMPLE_POSITIONS)
+            if 'extra' in results:
+                assert results['extra'] == base['totalExposure']
+                results = {k: v for k, v in results.items() if k != 'extra'}
+            assert results == base
+    finally:
+        stop.set()
+        worker.join()
+        registry.unregister('extra')
+    print("  - 동시 등록/해제 중 계산 200회 일치")
+
+
+def test_calculate_stream():
+    """스트리밍 계산이 리스트 계산과 같고 메모리가 행 수에 비례하지 않는지 확인"""
+    import tracemalloc
+
+    print("\n" + "=" * 60)
+    print("스트리밍 계산 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+
+    expected, expected_report = registry.calculate_with_report(SAMPLE_POSITIONS)
+    results, report = registry.calculate_stream(iter(SAMPLE_POSITIONS))
+    assert results == expected
+    assert report.to_dict() == expected_report.to_dict()
+
+    def rows(count):
+        for i in range(count):
+            yield {'currency': 'USD', 'amount': 1000 + i % 7,
+                   'direction': 'hedge' if i % 3 == 0 else 'exposure', 'rate': 1300 + i % 11}
+
+    def peak(count):
+        tracemalloc.start()
+        try:
+            registry.calculate_stream(rows(count))
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    small, large = peak(1000), peak(50000)
+    print(f"  - 최대 메모리: 1,000행 {small:,}B / 50,000행 {large:,}B")
+    assert large < small * 2
+
+    # 빈 스트림은 calculate_all과 같이 모두 None
+    empty, empty_report = registry.calculate_stream(iter([]))
+    assert all(value is None for value in empty.values())
+    assert empty_report.total == 0
+
+
+def test_partial_rollup():
+    """고객별 부분 집계 병합 결과가 전체 포지션 계산과 같은지 확인"""
+    import json
+
+    print("\n" + "=" * 60)
+    print("부분 집계 롤업 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+    customers = {
+        'C1': SAMPLE_POSITIONS[:2],
+        'C2': SAMPLE_POSITIONS[2:4],
+        'C3': SAMPLE_POSITIONS[4:],
+    }
+
+    # 저장/로드를 거친 부분 집계 (JSON 왕복)
+    partials = [json.loads(json.dumps(build_partial(registry, positions, customerId=customer)))
+                for customer, positions in customers.items()]
+    assert partials[0]['rows'] == 2 and partials[1]['rows'] == 1
+
+    rollup = rollup_partials(registry, partials)
+    print(f"  - 롤업: {rollup['kpi']}")
+    assert rollup['kpi'] == registry.calculate_all(SAMPLE_POSITIONS)
+    assert rollup['merged'] == 3 and rollup['rows'] == 4 and rollup['stale'] == []
+
+    # 계산기 버전이 다른 부분 집계는 병합하지 않음
+    partials[2]['calculators']['totalExposure']['version'] = '0.9'
+    rollup = rollup_partials(registry, partials)
+    assert rollup['stale'] == ['C3']
+    assert rollup['kpi'] == registry.calculate_all(SAMPLE_POSITIONS[:4])
+
+    # 부분 집계가 없으면 calculate_all([])과 같이 모두 None
+    empty = rollup_partials(registry, [])
+    assert all(value is None for value in empty['kpi'].values())
+
+
+def test_recommendation_rules():
+    """규칙표 일괄 판정이 건별 판정과 같고 고객/통화별 구간이 적용되는지 확인"""
+    import random
+
+    print("\n" + "=" * 60)
+    print("헤지 권장 규칙표 테스트")
+    print("=" * 60)
+
+    # 기본 규칙표 = 기존 70~90% 임계값
+    default = RecommendationRules()
+    assert [default.label(r) for r in (69.9, 70.0, 90.0, 90.1)] == \
+        ['추가헤지필요', '적정', '적정', '과도헤지']
+
+    rules = RecommendationRules.from_dict({
+        'default': {'min': 70, 'max': 90, 'urgentBelow': 20},
+        'rules': [
+            {'currency': 'JPY', 'min': 50, 'max': 80},
+            {'customerId': 'C2', 'min': 60, 'max': 95},
+            {'customerId': 'C2', 'currency': 'JPY', 'min': 40, 'max': 60},
+        ]
+    })
+    assert rules.label(55, currency='JPY') == '적정'
+    assert rules.label(55, 'C2', 'USD') == '추가헤지필요'
+    assert rules.label(55, 'C2', 'JPY') == '적정'
+    assert rules.label(10, 'C9', 'USD') == '긴급헤지필요'
+
+    # 일괄 판정 = 건별 판정
+    rng = random.Random(7)
+    size = 5000
+    ratios = [rng.uniform(0, 120) for _ in range(size)]
+    customers = [rng.choice(['C1', 'C2', 'C3']) for _ in range(size)]
+    currencies = [rng.choice(['USD', 'JPY', 'EUR']) for _ in range(size)]
+    if NUMPY_AVAILABLE:
+        codes = rules.evaluate(ratios, customers, currencies)['codes']
+        assert list(codes) == [rules.band(r, c, k) for r, c, k in zip(ratios, customers, currencies)]
+
+        actions = rules.screen([
+            {'customerId': 'A', 'hedgeRatio': 95, 'exposure': 1000},
+            {'customerId': 'B', 'hedgeRatio': 50, 'exposure': 1000},
+            {'customerId': 'C', 'hedgeRatio': 80, 'exposure': 1000},
+            {'customerId': 'D', 'hedgeRatio': 10, 'exposure': 100},
+            {'customerId': 'E', 'hedgeRatio': 60, 'exposure': 5000},
+        ])
+        print(f"  - 조치 목록: {[(a['customerId'], a['recommendation']) for a in actions]}")
+        assert [a['customerId'] for a in actions] == ['D', 'E', 'B', 'A']
+        assert actions[1]['shortfall'] == 500.0
+
+    # 계산기는 context의 규칙표와 그룹 통화를 사용
+    registry = build_registry()
+    grouped = registry.calculate_grouped(SAMPLE_POSITIONS, ['currency'],
+                                         context={'recommendationRules': rules})
+    eur_ratio = grouped[('EUR',)]['hedgeRatio']
+    assert grouped[('EUR',)]['recommendation'] == rules.label(eur_ratio, currency='EUR')
+
+    # 고객/통화 없는 규칙은 모든 고객/통화에 적용됨
+    catch_all = RecommendationRules([{'min': 30, 'max': 50}])
+    assert catch_all.label(40.0) == '적정'
+    assert catch_all.label(40.0, customer='c1', currency='USD') == '적정'
+    assert catch_all.label(20.0, customer='c1') == '추가헤지필요'
+
+
+def test_hedge_suggestions():
+    """헤지 제안이 미헤지 금액 큰 구간부터 목표 비율을 허용 오차 안에서 채우는지 확인"""
+    import random
+    import time
+
+    print("\n" + "=" * 60)
+    print("헤지 제안 테스트")
+    print("=" * 60)
+
+    positions = [
+        {'currency': 'USD', 'amount': 1000, 'krwAmount': 1_300_000, 'hedgeStatus': '미헤지',
+         'settlementDate': '2026-03-20'},
+        {'currency': 'USD', 'amount': 500, 'krwAmount': 650_000, 'hedgeStatus': '미헤지',
+         'settlementDate': '2026-07-10'},
+        {'currency': 'USD', 'amount': 200, 'krwAmount': 260_000, 'hedgeStatus': '전액헤지',
+         'settlementDate': '2026-03-05'},
+        {'currency': 'EUR', 'amount': 100, 'krwAmount': 145_000, 'hedgeStatus': '전액헤지',
+         'daysUntil': 10},
+    ]
+    plan = suggest_hedges(positions, target_ratio=70, tolerance=2, reference_date='2026-03-01')
+    suggestions = plan['suggestions']
+    print(f"  - 제안: {[(s['currency'], s['type'], s['krwAmount']) for s in suggestions]}")
+
+    # USD 부족분 = 70% × 2,210,000 - 260,000 = 1,287,000 → 3월 구간 1건으로 충족
+    assert len(suggestions) == 1
+    assert suggestions[0]['type'] == '선물환' and suggestions[0]['targetDate'] == '2026-03-20'
+    assert suggestions[0]['krwAmount'] == 1_287_000
+    assert suggestions[0]['amount'] == 990.0
+    assert plan['currencies']['USD']['afterRatio'] == 70.0
+    assert 'EUR' in plan['currencies']  # 이미 목표 이상 → 제안 없음
+
+    # 90일 초과 구간만 남으면 옵션
+    plan = suggest_hedges(positions[1:], target_ratio=90, reference_date='2026-03-01')
+    assert [s['type'] for s in plan['suggestions']] == ['옵션']
+
+    # 허용 오차 안이면 거래 없음
+    assert suggest_hedges(positions, target_ratio=12, tolerance=2,
+                          reference_date='2026-03-01')['suggestions'] == []
+
+    # 수백 개 구간: 목표 도달, 구간 상한을 넘는 거래 없음
+    rng = random.Random(3)
+    many = [{'currency': rng.choice(['USD', 'EUR', 'JPY', 'CNY']),
+             'amount': rng.randint(1000, 90000), 'krwAmount': rng.randint(1, 100) * 1_000_000,
+             'hedgeStatus': rng.choice(['미헤지', '부분헤지', '전액헤지']),
+             'daysUntil': rng.randint(0, 720)} for _ in range(5000)]
+    started = time.perf_counter()
+    plan = suggest_hedges(many, target_ratio=75, tolerance=1, reference_date='2026-03-01')
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"  - 5,000건: 제안 {len(plan['suggestions'])}건, {elapsed:.1f}ms")
+    for summary in plan['currencies'].values():
+        assert 74.0 <= summary['afterRatio'] <= 75.0 + 1e-9
+
+
+def test_incremental_kpi():
+    """증분 델타 적용 결과가 전체 재계산과 동일한지 확인"""
+
+    print("\n" + "=" * 60)
+    print("증분 KPI 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+    # 금액이 숫자가 아닌 JPY 행(T3)은 검증 단계에서 거부되므로 제외
+    positions = [dict(pos, id=f"T{i}") for i, pos in enumerate(SAMPLE_POSITIONS) if i != 3]
+
+    kpi = IncrementalKPI(registry, positions)
+    assert kpi.results() == registry.calculate_all(positions)
+
+    outcome = kpi.apply([
+        {'op': 'remove', 'id': 'T0'},
+        {'op': 'update', 'position': {'id': 'T1', 'currency': 'USD', 'amount': 900000,
+                                      'direction': 'hedge', 'rate': 1330}},
+        {'op': 'add', 'position': {'id': 'T9', 'currency': 'USD', 'amount': 500000,
+                                   'direction': 'exposure'}},
+        {'op': 'add', 'position': {'id': 'T9', 'currency': 'USD', 'amount': 1,
+                                   'direction': 'exposure'}},
+        {'op': 'remove', 'id': 'missing'},
+    ])
+    print(f"  - 적용 결과: {outcome}")
+    assert outcome['applied'] == 3
+    assert [e['index'] for e in outcome['errors']] == [3, 4]
+
+    expected_positions = [
+        {'id': 'T1', 'currency': 'USD', 'amount': 900000, 'direction': 'hedge', 'rate': 1330},
+        positions[2], positions[3],
+        {'id': 'T9', 'currency': 'USD', 'amount': 500000, 'direction': 'exposure'},
+    ]
+    incremental = kpi.results()
+    print(f"  - 증분 결과: {incremental}")
+    assert incremental == registry.calculate_all(expected_positions)
+
+
+def test_grouped_breakdown():
+    """그룹별 단일 패스 결과가 그룹마다 따로 계산한 결과와 동일한지 확인"""
+
+    print("\n" + "=" * 60)
+    print("그룹별 KPI 분해 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+    positions = [
+        dict(pos, type='수출' if i % 2 else '수입', daysUntil=[5, 45, 400, -2, None][i])
+        for i, pos in enumerate(SAMPLE_POSITIONS)
+    ]
+
+    by_currency = registry.calculate_grouped(positions, ['currency'])
+    print(f"  - 통화별: {list(by_currency)}")
+    assert list(by_currency) == [('USD',), ('EUR',)]
+    for (currency,), results in by_currency.items():
+        subset = [p for p in positions if p['currency'] == currency]
+        assert results == registry.calculate_all(subset, fused=False)
+
+    combined = registry.calculate_grouped(positions, ['currency', 'maturityBucket'])
+    print(f"  - 통화 × 만기: {list(combined)}")
+    assert ('USD', '1M') in combined
+    assert ('EUR', '1Y+') in combined
+    assert ('EUR', 'unknown') in combined
+
+
+def test_portfolio_batch():
+    """다중 포트폴리오 프로세스 풀 계산 결과 확인"""
+
+    print("\n" + "=" * 60)
+    print("다중 포트폴리오 배치 테스트")
+    print("=" * 60)
+
+    build_registry()
+    portfolios = [
+        {'portfolioId': 'P1', 'positions': SAMPLE_POSITIONS},
+        {'portfolioId': 'P2', 'positions': SAMPLE_POSITIONS[:2], 'targetHedgeRatio': 30},
+        {'portfolioId': 'P3', 'positions': []},
+    ]
+
+    for max_workers in (1, 2):
+        results = sorted(iter_portfolio_results(portfolios, max_workers=max_workers),
+                         key=lambda r: r['index'])
+        print(f"  - max_workers={max_workers}: {[(r['portfolioId'], r['success']) for r in results]}")
+
+        assert [r['success'] for r in results] == [True, True, False]
+        assert results[0]['kpi']['totalExposure'] == 1950000.5
+        assert results[1]['summary']['gap'] == -1.4
+        assert set(results[0]['by_currency']) == {'USD', 'EUR'}
+
+
+def test_position_validation_report():
+    """검증 단계가 오류 행만 제외하고 행별 오류를 보고하는지 확인"""
+
+    print("\n" + "=" * 60)
+    print("포지션 검증 보고 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+    positions = SAMPLE_POSITIONS + [
+        {'currency': 'USD', 'amount': 100},
+        'not a position',
+        {'currency': 'USD', 'amount': 100, 'direction': 'hedge', 'rate': 'n/a'},
+    ]
+
+    results, report = registry.calculate_with_report(positions)
+    print(f"  - 보고: {report.to_dict()}")
+
+    # 오류 행이 있어도 나머지 행으로 KPI 계산
+    assert results == registry.calculate_all(SAMPLE_POSITIONS)
+    assert results['totalExposure'] == 1950000.5
+    assert report.total == 8
+    assert len(report.positions) == 4
+    assert [(e['index'], e['field']) for e in report.errors] == [
+        (3, 'amount'), (5, 'direction'), (6, None), (7, 'rate')
+    ]
+
+    # 환율을 읽지 않는 계산기만 요청하면 환율 검사 생략
+    subset = registry.validate_positions(positions, targets=['hedgeRatio'])
+    assert [e['index'] for e in subset.errors] == [3, 5, 6]
+
+
+class _Failing(BaseCalculator):
+    name = "failing"
+    required_fields = []
+
+    def calculate(self, positions, context):
+        raise RuntimeError("boom")
+
+
+def test_calculator_metrics():
+    """관측 훅이 계산기별 시간/입력 크기/상태를 기록하는지 확인"""
+
+    print("\n" + "=" * 60)
+    print("계산기 지표 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+    metrics = CalculatorMetrics()
+    events = []
+
+    def record(*event):
+        events.append(event)
+
+    registry.add_observer(metrics)
+    registry.add_observer(record)
+    registry.register(_Failing())
+    try:
+        registry.calculate_all(SAMPLE_POSITIONS)
+        registry.calculate_all([])
+    finally:
+        registry.unregister('failing')
+        registry.remove_observer(metrics)
+        registry.remove_observer(record)
+
+    statuses = {(name, status) for name, _, _, status in events}
+    assert ('totalExposure', 'ok') in statuses
+    assert ('failing', 'error') in statuses
+    assert ('hedgeRatio', 'invalid') in statuses
+    if not NUMPY_AVAILABLE:
+        assert (CalculatorRegistry.FUSED_PASS, 'ok') in statuses
+    assert all(size == 4 for name, _, size, status in events if status == 'ok')
+
+    text = metrics.render()
+    print(text.splitlines()[2])
+    assert 'hedge_calculator_runs_total{calculator="failing",status="error"} 1' in text
+    assert 'hedge_calculator_input_rows_bucket{calculator="totalExposure",le="10"} 2' in text
+    assert 'hedge_calculator_duration_seconds_count{calculator="hedgeRatio"} 2' in text
+
+
+def test_fx_scenarios():
+    """행렬 연산 시나리오 결과가 시나리오별 직접 재계산과 같은지 확인"""
+
+    print("\n" + "=" * 60)
+    print("환율 충격 시나리오 테스트")
+    print("=" * 60)
+
+    if not NUMPY_AVAILABLE:
+        print("⚠️ numpy 미설치 - 건너뜀")
+        return
+
+    positions = [
+        {'currency': 'USD', 'krwAmount': 1350000, 'hedgeStatus': '전액헤지', 'type': '수출'},
+        {'currency': 'USD', 'krwAmount': 2700000, 'hedgeStatus': '미헤지', 'type': '수입'},
+        {'currency': 'EUR', 'krwAmount': 1450000, 'hedgeStatus': '부분헤지', 'type': '수출'},
+        {'currency': 'JPY', 'krwAmount': 950000, 'hedgeStatus': '미헤지', 'type': '수출'},
+    ]
+    shocks = ShockSet.grid(['USD', 'EUR', 'JPY'], max_pct=10, step_pct=1) + ShockSet.from_moves([
+        {'name': '2022-09', 'shocks': {'USD': 7.5, 'GBP': 3.0}}
+    ])
+    assert len(shocks) == 4 * 20 + 1
+
+    result = run_fx_scenarios(positions, shocks)
+    print(f"  - 기준: {result['base']}")
+    print(f"  - {result['scenarios'][0]}")
+
+    weights = {'전액헤지': 1.0, '부분헤지': 0.5}
+    for scenario in result['scenarios']:
+        shocked = [(p['krwAmount'] * (1 + scenario['shocks'].get(p['currency'], 0) / 100),
+                    weights.get(p['hedgeStatus'], 0.0), p) for p in positions]
+        exposure = sum(krw for krw, _, _ in shocked)
+        hedged = sum(krw * w for krw, w, _ in shocked)
+        pnl = sum(p['krwAmount'] * (1 - w) * scenario['shocks'].get(p['currency'], 0) / 100
+                  * (1 if p['type'] == '수출' else -1) for _, w, p in shocked)
+        assert abs(scenario['totalExposure'] - exposure) < 0.01
+        assert abs(scenario['hedgedAmount'] - hedged) < 0.01
+        assert abs(scenario['pnl'] - pnl) < 0.01
+
+    assert result['scenarios'][-1]['shocks'] == {'USD': 7.5}
+    assert result['base']['hedgeRatio'] == round((1350000 + 725000) / 6450000 * 100, 2)
+
+
+def test_fx_var():
+    """환율 VaR가 정규분포 해석해와 같고 요청 시에만 실행되는지 확인"""
+
+    print("\n" + "=" * 60)
+    print("환율 VaR 테스트")
+    print("=" * 60)
+
+    if not NUMPY_AVAILABLE:
+        print("⚠️ numpy 미설치 - 건너뜀")
+        return
+
+    import numpy as np
+
+    registry = build_registry()
+    registry.register(FXVaRCalculator())
+    try:
+        positions = [
+            {'currency': 'USD', 'krwAmount': 1e9, 'hedgeStatus': '부분헤지', 'type': '수출'},
+            {'currency': 'EUR', 'krwAmount': 4e8, 'hedgeStatus': '미헤지', 'type': '수입'},
+            {'currency': 'JPY', 'krwAmount': 3e8, 'hedgeStatus': '전액헤지', 'type': '수출'},
+        ]
+
+        # 기본 실행에는 포함되지 않음
+        assert 'fxVaR' not in registry.calculate_all(SAMPLE_POSITIONS)
+
+        var = registry.calculate_all(positions, targets=['fxVaR'])['fxVaR']
+        print(f"  - VaR: {var}")
+        assert var['openExposure'] == {'USD': 5e8, 'EUR': -4e8, 'JPY': 0.0}
+
+        # 정규분포 손익의 해석해: VaR95 = 1.645σ, ES95 = 2.063σ
+        scale = np.sqrt(1 / 252)
+        vol = np.array([0.08, 0.09]) * scale
+        cov = np.outer(vol, vol) * np.array([[1, 0.55], [0.55, 1]])
+        exposure = np.array([5e8, -4e8])
+        sigma = float(np.sqrt(exposure @ cov @ exposure))
+        assert abs(var['sigma'] - sigma) < 0.01
+        assert abs(var['var95'] / (1.645 * sigma) - 1) < 0.001
+        assert abs(var['es95'] / (2.063 * sigma) - 1) < 0.001
+        assert var['var99'] > var['var95']
+
+        # 기간이 4배면 VaR는 √4 = 2배
+        longer = registry.calculate_all(
+            positions, context={'varOptions': {'horizonDays': 4}}, targets=['fxVaR'])['fxVaR']
+        assert abs(longer['var95'] / var['var95'] - 2) < 0.001
+    finally:
+        registry.unregister('fxVaR')
+
+
+def test_maturity_ladder():
+    """결제일 인덱스 조회가 전체 순회 결과와 같은지 확인"""
+
+    print("\n" + "=" * 60)
+    print("만기 사다리 테스트")
+    print("=" * 60)
+
+    import random
+    from datetime import date, timedelta
+
+    today = date(2026, 3, 1)
+    rng = random.Random(7)
+    positions = [
+        {'krwAmount': rng.randint(1, 100) * 1000000,
+         'hedgeStatus': rng.choice(['전액헤지', '부분헤지', '미헤지']),
+         'settlementDate': (today + timedelta(days=rng.randint(-10, 400))).isoformat()}
+        for _ in range(300)
+    ]
+    positions.append({'krwAmount': 5000000, 'hedgeStatus': '미헤지', 'daysUntil': 3})
+    positions.append({'krwAmount': 7000000, 'hedgeStatus': '미헤지'})
+
+    index = MaturityIndex(positions, reference_date=today)
+    weights = {'전액헤지': 1.0, '부분헤지': 0.5}
+
+    for days in (0, 7, 30, 90, 365):
+        last = today + timedelta(days=days)
+        rows = [p for p in positions if 'settlementDate' in p
+                and today.isoformat() <= p['settlementDate'] <= last.isoformat()]
+        if days >= 3:
+            rows.append(positions[-2])
+        expected = sum(p['krwAmount'] for p in rows)
+        hedged = sum(p['krwAmount'] * weights.get(p['hedgeStatus'], 0) for p in rows)
+        result = index.maturing_within(days, today)
+        assert result['count'] == len(rows)
+        assert abs(result['exposure'] - expected) < 0.01
+        assert abs(result['hedged'] - hedged) < 0.01
+
+    assert index.unknown['exposure'] == 7000000
+    ladder = index.ladder('month')
+    print(f"  - 월별: {[(b['period'], b['count']) for b in ladder[:4]]}")
+    assert ladder[0]['period'] == '2026-02'
+    assert sum(b['count'] for b in ladder) == 301
+    assert all(b['start'] <= b['end'] for b in index.ladder('week'))
+
+    # 레지스트리에서는 요청할 때만 실행
+    registry = build_registry()
+    registry.register(MaturityLadderCalculator())
+    try:
+        results = registry.calculate_all(
+            positions, context={'referenceDate': today, 'horizons': [30]},
+            targets=['maturityLadder'])
+        assert results['maturityLadder']['horizons']['30'] == index.maturing_within(30, today)
+    finally:
+        registry.unregister('maturityLadder')
+
+
+def test_portfolio_units():
+    """레지스트리 KPI는 amount, 만기 사다리는 krwAmount 한 단위로만 집계하는지 확인"""
+
+    print("\n" + "=" * 60)
+    print("금액 단위 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+    positions = [
+        {'currency': 'USD', 'amount': 1000, 'krwAmount': 1350000, 'direction': 'exposure'},
+        {'currency': 'USD', 'amount': 1000, 'direction': 'hedge'},
+    ]
+
+    fused, _ = registry.calculate_stream(iter(positions))
+    batched = registry.calculate_all(positions)
+    print(f"  - 레지스트리: {batched['totalExposure']:,.0f} / {batched['hedgeRatio']}%")
+    for results in (fused, batched):
+        assert results['totalExposure'] == 2000
+        assert results['hedgeRatio'] == 50.0
+
+    # krwAmount가 없는 행은 만기 사다리에서 amount로 대체하지 않음
+    index = MaturityIndex(positions)
+    assert index.unknown['exposure'] == 1350000
+    assert index.unknown['hedged'] == 0
+
+
+def test_hedged_definition_agrees():
+    """레지스트리 KPI와 만기 사다리가 같은 헤지 비중 정의를 쓰는지 확인"""
+
+    print("\n" + "=" * 60)
+    print("헤지 비중 정의 일치 테스트")
+    print("=" * 60)
+
+    registry = build_registry()
+    rate = 1300
+    positions = [
+        {'currency': 'USD', 'amount': 1000, 'rate': 1300, 'direction': 'exposure',
+         'hedgeStatus': '전액헤지', 'daysUntil': 10},
+        {'currency': 'USD', 'amount': 2000, 'rate': 1400, 'direction': 'hedge',
+         'hedgeStatus': '부분헤지', 'daysUntil': 40},
+        {'currency': 'USD', 'amount': 500, 'rate': 1500, 'direction': 'hedge',
+         'hedgeStatus': '미헤지'},
+        {'currency': 'USD', 'amount': 3000, 'rate': 1200, 'direction': 'hedge', 'daysUntil': 5},
+        {'currency': 'USD', 'amount': 4000, 'direction': 'exposure'},
+    ]
+    for position in positions:
+        position['krwAmount'] = position['amount'] * rate
+
+    index = MaturityIndex(positions)
+    ladder_hedged = index.maturing_within(365)['hedged'] + index.unknown['hedged']
+
+    legacy = {}
+    for calculator in registry.execution_plan():
+        legacy[calculator.name] = registry.calculate_one(calculator.name, positions, dict(legacy))
+    fused, _ = registry.calculate_stream(iter(positions))
+    batched = registry.calculate_all(positions)
+    print(f"  - 만기 사다리: {ladder_hedged:,.0f}원")
+    print(f"  - 레지스트리: {batched['hedgedAmount']:,.0f} / {batched['avgHedgeRate']}")
+
+    assert batched['hedgedAmount'] == 1000 + 1000 + 3000
+    assert ladder_hedged == batched['hedgedAmount'] * rate
+    # 부분헤지는 avgHedgeRate에서도 절반만 반영
+    assert batched['avgHedgeRate'] == round((1000 * 1300 + 1000 * 1400 + 3000 * 1200) / 5000, 2)
+    for results in (legacy, fused):
+        assert results == batched
+
+
+def test_lazy_plugin_manifest():
+    """매니페스트가 계산기 정의와 일치하고 처음 사용할 때만 로드되는지 확인"""
+
+    print("\n" + "=" * 60)
+    print("지연 로딩 플러그인 테스트")
+    print("=" * 60)
+
+    for entry in BUILTIN_MANIFEST:
+        lazy = lazy_from_manifest(entry)
+        calculator = lazy.load()
+        assert (calculator.priority, calculator.on_demand) == (lazy.priority, lazy.on_demand), entry
+
+    registry = build_registry()
+    lazy = LazyCalculator('fxVaR', 'calculators.fx_var:FXVaRCalculator',
+                          priority=200, on_demand=True)
+    registry.register(lazy)
+    try:
+        registry.calculate_all(SAMPLE_POSITIONS)
+        assert 'fxVaR' in registry.list_calculators()
+        assert not lazy.loaded
+
+        registry.calculate_all([{'currency': 'USD', 'krwAmount': 1e6}], targets=['fxVaR'])
+        assert lazy.loaded
+        print(f"  - {lazy!r}")
+    finally:
+        registry.unregister('fxVaR')
+
+    mismatched = LazyCalculator('fxVaR', 'calculators.fx_var:FXVaRCalculator',
+                                dependencies=['totalExposure'])
+    try:
+        mismatched.load()
+        assert False, "매니페스트 불일치가 감지되지 않음"
+    except ValueError as e:
+        print(f"  - 불일치 감지: {e}")
+
+
+def test_kpi_result_cache(tmp_path=None):
+    """KPI 결과 캐시 적중, 키 정규화, TTL 만료, LRU 제거 확인"""
+
+    print("\n" + "=" * 60)
+    print("KPI 결과 캐시 테스트")
+    print("=" * 60)
+
+    import json
+    import tempfile
+    from pathlib import Path
+
+    tmp_dir = Path(tmp_path or tempfile.mkdtemp())
+    registry = build_registry()
+    versions = registry.calculator_versions()
+    cache = KPIResultCache(tmp_dir / 'kpi_cache.sqlite3', max_entries=2)
+
+    key = cache.make_key(SAMPLE_POSITIONS, 70, versions)
+    assert cache.get(key) is None
+
+    kpi = registry.calculate_all(SAMPLE_POSITIONS)
+    cache.put(key, kpi)
+
+    # 키 순서가 달라도 같은 키, 버전/목표가 다르면 다른 키
+    reordered = [dict(reversed(list(pos.items()))) for pos in SAMPLE_POSITIONS]
+    assert cache.make_key(reordered, 70.0, versions) == key
+    assert cache.make_key(SAMPLE_POSITIONS, 60, versions) != key
+    assert cache.make_key(SAMPLE_POSITIONS, 70, dict(versions, hedgeRatio='2.0')) != key
+
+    # 요청 본문은 바이트 해시로 키 생성 (같은 바이트면 같은 키)
+    body = json.dumps({'positions': SAMPLE_POSITIONS}).encode('utf-8')
+    body_key = cache.make_key(raw_digest(body), 70, versions)
+    assert body_key == cache.make_key(raw_digest(bytes(body)), 70.0, versions)
+    assert body_key != key
+
+    # 다른 연결(다른 워커)에서도 조회 가능
+    assert KPIResultCache(cache.db_path).get(key) == kpi
+
+    # 항목 수 한도 초과 시 가장 오래 사용되지 않은 항목부터 제거
+    cache.put('k2', {'v': 2})
+    cache.get(key)
+    cache.put('k3', {'v': 3})
+    assert cache.get('k2') is None
+    assert cache.get(key) == kpi
+    print(f"  - 통계: {cache.stats()}")
+    assert cache.stats()['entries'] == 2
+
+    # TTL 만료
+    cache.ttl_seconds = -1
+    assert cache.get(key) is None
+
+    # 환경변수 접두어별 캐시 설정 (업로드 파싱 캐시 등)
+    import os
+    from calculators.result_cache import cache_from_env
+    os.environ['TEST_PARSE_CACHE'] = 'off'
+    assert cache_from_env(tmp_dir / 'off.sqlite3', prefix='TEST_PARSE_CACHE') is None
+    os.environ['TEST_PARSE_CACHE'] = 'on'
+    os.environ['TEST_PARSE_CACHE_MAX_ENTRIES'] = '5'
+    parse_cache = cache_from_env(tmp_dir / 'parse.sqlite3', prefix='TEST_PARSE_CACHE', default_ttl=86400)
+    assert parse_cache.ttl_seconds == 86400 and parse_cache.max_entries == 5
+    for name in ('TEST_PARSE_CACHE', 'TEST_PARSE_CACHE_MAX_ENTRIES'):
+        del os.environ[name]
+
+
+if __name__ == "__main__":
+    test_fused_matches_individual()
+    test_invalid_input_returns_none()
+    test_position_batch_matches_dicts()
+    test_dirty_rows_agree()
+    test_dependency_dag()
+    test_registry_snapshot()
+    test_calculate_stream()
+    test_partial_rollup()
+    test_recommendation_rules()
+    test_hedge_suggestions()
+    test_incremental_kpi()
+    test_grouped_breakdown()
+    test_portfolio_batch()
+    test_position_validation_report()
+    test_calculator_metrics()
+    test_fx_scenarios()
+    test_fx_var()
+    test_maturity_ladder()
+    test_portfolio_units()
+    test_hedged_definition_agrees()
+    test_lazy_plugin_manifest()
+    test_kpi_result_cache()
+
+    print("\n" + "=" * 60)
+    print("✅ 모든 테스트 완료!")
+    print("=" * 60)
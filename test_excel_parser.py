@@ -132,10 +132,260 @@ def test_kpi_calculation():
         traceback.print_exc()
 
 
+def test_streaming_parse():
+    """읽기 전용(스트리밍) 파싱 테스트 - 전체 로드 모드와 결과 동일"""
+    
+    print("\n\n" + "=" * 60)
+    print("스트리밍 파싱 테스트")
+    print("=" * 60)
+    
+    import types
+    
+    for filename in ['sample_trades.xlsx', 'sample_dojeon_format.xlsx', 'sample_no_header.xlsx']:
+        full = ExcelParser(file_path=filename, read_only=False).parse_trade_data()
+        
+        with ExcelParser(file_path=filename) as parser:
+            stream = parser.iter_trade_data()
+            assert isinstance(stream, types.GeneratorType)
+            streamed = list(stream)
+        
+        # daysUntil은 호출 시각 기준이라 비교에서 제외
+        strip = lambda trades: [{k: v for k, v in t.items() if k != 'daysUntil'} for t in trades]
+        assert strip(streamed) == strip(full), filename
+        print(f"✅ {filename}: {len(streamed)}건 일치")
+
+
+def test_multi_sheet_parse():
+    """다중 시트 파싱 테스트 - 거래 시트만 골라 파싱, 시트별 출처 기록"""
+    
+    print("\n\n" + "=" * 60)
+    print("다중 시트 파싱 테스트")
+    print("=" * 60)
+    
+    import io
+    import openpyxl
+    
+    header = ['거래ID', '거래처명', '통화', '외화금액', '결제예정일', '수출/수입', '헤지상태']
+    workbook = openpyxl.Workbook()
+    notes = workbook.active
+    notes.title = '안내'
+    notes.append(['이 파일은 월별 거래 내역입니다'])
+    for month, count in (('1월', 3), ('2월', 5)):
+        sheet = workbook.create_sheet(month)
+        sheet.append(header)
+        for i in range(count):
+            sheet.append([f'{month}-{i}', 'ACME', 'USD', 1000 * (i + 1), '2026-12-01', '수출', '미헤지'])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    
+    with ExcelParser(file_stream=io.BytesIO(buffer.getvalue())) as parser:
+        assert parser.trade_sheets() == ['1월', '2월']
+        parsed = parser.parse_workbook()
+    
+    assert [(sheet['name'], sheet['trades']) for sheet in parsed['sheets']] == [('1월', 3), ('2월', 5)]
+    assert [t['sheet'] for t in parsed['trades']] == ['1월'] * 3 + ['2월'] * 5
+    assert [t['id'] for t in parsed['trades']] == [f'1월-{i}' for i in range(3)] + [f'2월-{i}' for i in range(5)]
+    
+    # 시트별 워커 프로세스로 파싱해도 배치 경계, 거래 순서, 시트 요약이 순차 파싱과 같음
+    for batch_size in (2, 4, 100):
+        with ExcelParser(file_stream=io.BytesIO(buffer.getvalue())) as parser:
+            sequential = list(parser.iter_trade_batches(batch_size, max_workers=1))
+            sequential_sheets = parser.sheet_summaries
+        with ExcelParser(file_stream=io.BytesIO(buffer.getvalue())) as parser:
+            parallel = list(parser.iter_trade_batches(batch_size, max_workers=2))
+            assert parser.sheet_summaries == sequential_sheets
+        assert parallel == sequential
+    
+    # 중간에 닫아도 워커가 남지 않음
+    with ExcelParser(file_stream=io.BytesIO(buffer.getvalue())) as parser:
+        batches = parser.iter_trade_batches(1, max_workers=2)
+        next(batches)
+        batches.close()
+    import multiprocessing
+    assert not [p for p in multiprocessing.active_children() if p.name.startswith('sheet-worker')]
+    
+    # 헤더가 있는 시트가 없으면 활성 시트만 (기존 동작)
+    with ExcelParser(file_path='sample_no_header.xlsx') as parser:
+        assert len(parser.trade_sheets()) == 1
+    
+    print(f"✅ 시트 {len(parsed['sheets'])}개, {len(parsed['trades'])}건 파싱")
+
+
+def test_csv_parse():
+    """CSV/TSV 파싱 테스트 - 인코딩/구분자 자동 감지, xlsx와 결과 동일"""
+    
+    print("\n\n" + "=" * 60)
+    print("CSV/TSV 파싱 테스트")
+    print("=" * 60)
+    
+    import io
+    import openpyxl
+    
+    rows = [
+        ['거래ID', '거래처명', '통화', '외화금액', '결제예정일', '수출/수입', '헤지상태'],
+        ['T1', '에이스무역', 'USD', '1000', '2026-12-01', '수출', '미헤지'],
+        ['T2', '베타상사', 'EUR', '2500.5', '2026/11/15', '수입', '전액헤지'],
+    ]
+    
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    with ExcelParser(file_stream=io.BytesIO(buffer.getvalue())) as parser:
+        assert parser.file_format == 'xlsx'
+        expected = parser.parse_trade_data()
+    
+    strip = lambda trades: [{k: v for k, v in t.items() if k != 'daysUntil'} for t in trades]
+    
+    for encoding, delimiter in (('utf-8', ','), ('utf-8-sig', ','), ('cp949', '\t')):
+        text = '\r\n'.join(delimiter.join(row) for row in rows) + '\r\n'
+        with ExcelParser(file_stream=io.BytesIO(text.encode(encoding))) as parser:
+            assert parser.file_format == 'csv'
+            assert parser.reader.encoding == encoding
+            assert parser.reader.delimiter == delimiter
+            trades = parser.parse_trade_data()
+        
+        assert strip(trades) == strip(expected), (encoding, delimiter)
+        print(f"✅ {encoding} / {delimiter!r}: {len(trades)}건")
+
+
+def test_column_templates():
+    """컬럼 매핑 템플릿 테스트 - 헤더 지문이 같으면 자동 인식 없이 저장된 매핑 사용"""
+    
+    print("\n\n" + "=" * 60)
+    print("컬럼 매핑 템플릿 테스트")
+    print("=" * 60)
+    
+    import io
+    from excel_parser import header_signature, mapping_from_browser, mapping_to_browser
+    
+    # 공백/대소문자/뒤쪽 빈 셀은 지문에 영향 없음
+    headers = ['번호', '상대처', '통화', '외화', '만기']
+    assert header_signature([' 번호', '상대 처', '통화', '외화', '만기', None, '']) == header_signature(headers)
+    assert header_signature(headers) != header_signature(headers[::-1])
+    
+    # 브라우저 매핑(0부터) ↔ 파서 매핑(1부터)
+    browser = {'id': 0, 'counterparty': 1, 'currency': 2, 'amount': 3, 'settlementDate': 4,
+               'type': None, 'hedgeStatus': None}
+    mapping = mapping_from_browser(browser)
+    assert mapping['amount'] == 4 and mapping['trade_type'] is None
+    assert mapping_to_browser(mapping) == browser
+    
+    # 키워드가 부족해 자동 인식은 실패하는 헤더
+    content = ('\n'.join([','.join(headers), 'A1,ACME,USD,1000,2026-12-01', 'A2,BETA,EUR,2000,2026-11-01'])
+               + '\n').encode('utf-8')
+    with ExcelParser(file_stream=io.BytesIO(content)) as parser:
+        assert parser.parse_trade_data() == []
+        assert parser.sheet_mappings['CSV']['mappingSource'] == 'detected'
+    
+    templates = {header_signature(headers): mapping}
+    with ExcelParser(file_stream=io.BytesIO(content), column_templates=templates) as parser:
+        trades = parser.parse_trade_data()
+        info = parser.sheet_mappings['CSV']
+    
+    assert [(t['id'], t['amount'], t['settlementDate']) for t in trades] == [
+        ('A1', 1000.0, '2026-12-01'), ('A2', 2000.0, '2026-11-01')]
+    assert info['mappingSource'] == 'template' and info['headerRow'] == 1
+    print(f"✅ 템플릿 매핑으로 {len(trades)}건 파싱 (지문 {info['signature']})")
+
+
+def test_date_format_inference():
+    """날짜 형식 추정 테스트 - 컬럼 표본으로 형식 결정, 고정 기준일로 daysUntil 계산"""
+    
+    print("\n\n" + "=" * 60)
+    print("날짜 형식 추정 테스트")
+    print("=" * 60)
+    
+    import io
+    from datetime import date
+    from excel_parser import infer_date_format
+    
+    assert infer_date_format(['2026-12-01', '2026-1-5', None]) == '%Y-%m-%d'
+    assert infer_date_format(['03/04/2026', '05/06/2026']) == '%m/%d/%Y'    # 모호하면 우선순위
+    assert infer_date_format(['03/04/2026', '25/06/2026']) == '%d/%m/%Y'    # 일 > 12가 있으면 일/월
+    assert infer_date_format([45000, None]) is None
+    
+    rows = [
+        '거래ID,거래처명,통화,외화금액,결제예정일',
+        'T1,ACME,USD,1000,03/04/2026',
+        'T2,ACME,USD,1000,25/04/2026',
+        'T3,ACME,USD,1000,2026.05.01',   # 다른 형식 셀은 전체 형식 시도
+        'T4,ACME,USD,1000,미정',         # 파싱 실패 → 기준일 + 30일
+    ]
+    content = ('\n'.join(rows) + '\n').encode('utf-8')
+    
+    with ExcelParser(file_stream=io.BytesIO(content), reference_date=date(2026, 4, 1)) as parser:
+        trades = parser.parse_trade_data()
+        assert parser.sheet_mappings['CSV']['dateFormat'] == '%d/%m/%Y'
+    
+    assert [(t['settlementDate'], t['daysUntil']) for t in trades] == [
+        ('2026-04-03', 2), ('2026-04-25', 24), ('2026-05-01', 30), ('2026-05-01', 30)]
+    print(f"✅ {len(trades)}건, 형식 %d/%m/%Y 추정")
+
+
+def test_upload_pipeline():
+    """스트리밍 업로드 파이프라인 테스트 - 배치 결과가 parse_workbook → 익명화 → KPI와 동일"""
+    
+    print("\n\n" + "=" * 60)
+    print("스트리밍 업로드 파이프라인 테스트")
+    print("=" * 60)
+    
+    import io
+    import openpyxl
+    from excel_parser import stream_upload, run_batch_pipeline
+    
+    workbook = openpyxl.Workbook()
+    statuses = ['미헤지', '부분헤지', '전액헤지']
+    for index, title in enumerate(['1월', '2월']):
+        sheet = workbook.active if index == 0 else workbook.create_sheet()
+        sheet.title = title
+        sheet.append(['거래ID', '거래처명', '통화', '외화금액', '결제예정일', '수출/수입', '헤지상태'])
+        for i in range(25):
+            sheet.append([f'{title}-{i}', f'거래처{i % 7}', 'USD', 1000 + i, '2026-12-01',
+                          '수출', statuses[i % 3]])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    content = buffer.getvalue()
+    
+    with ExcelParser(file_stream=io.BytesIO(content)) as parser:
+        parsed = parser.parse_workbook()
+    expected = DataAnonymizer('TEST').anonymize_trades(parsed['trades'])
+    
+    written = []
+    with ExcelParser(file_stream=io.BytesIO(content)) as parser:
+        upload = stream_upload(parser, DataAnonymizer('TEST'), lambda batch: written.append(batch),
+                               batch_size=8, preview_size=5)
+    
+    assert max(len(batch) for batch in written) == 8
+    assert [t for batch in written for t in batch] == expected
+    assert upload['tradeCount'] == len(expected) == 50
+    assert upload['kpi'] == calculate_kpi(expected)
+    assert upload['sheets'] == parsed['sheets']
+    assert upload['preview'] == expected[:5]
+    print(f"✅ {upload['tradeCount']}건, 배치 {len(written)}개, KPI 일치")
+    
+    # 중간 단계 예외는 배치 읽기를 멈추고 호출자에게 전달됨
+    def fail(batch):
+        raise RuntimeError('저장 실패')
+    try:
+        run_batch_pipeline(iter([[1]] * 100), [lambda batch: batch, fail], queue_depth=1)
+        assert False, '예외가 전달되지 않음'
+    except RuntimeError as e:
+        assert str(e) == '저장 실패'
+    print("✅ 단계 예외 전달")
+
+
 if __name__ == "__main__":
     test_excel_parser()
     test_anonymization()
     test_kpi_calculation()
+    test_streaming_parse()
+    test_multi_sheet_parse()
+    test_csv_parse()
+    test_column_templates()
+    test_date_format_inference()
+    test_upload_pipeline()
     
     print("\n\n" + "=" * 60)
     print("✅ 모든 테스트 완료!")